@@ -1,11 +1,10 @@
 from flask import Flask, jsonify
 from flask_cors import CORS
-from extensions import db, login_manager, redis_client, celery, mail
+from extensions import db, login_manager, jwt_manager, migrate, redis_client, celery, mail
 from routes.auth_routes import auth_bp
 from routes.main_routes import main_bp
 from routes.user_routes import user_bp
 from routes.admin_routes import admin_bp
-from models.user import User
 from config import Config
 import os
 
@@ -15,18 +14,18 @@ def create_app():
     app.config.from_object(Config)
     
     db.init_app(app)
+    migrate.init_app(app, db, directory=os.path.join(os.path.dirname(os.path.abspath(__file__)), 'migrations'),
+                     render_as_batch=True)
     login_manager.init_app(app)
+    jwt_manager.init_app(app)
     mail.init_app(app)
+    redis_client.init_app(app)
 
     celery.conf.update(app.config)
     
     # Enable CORS for Vue.js frontend
     CORS(app, origins=['http://localhost:5173', 'http://localhost:3000'], supports_credentials=True)
     
-    @login_manager.user_loader
-    def load_user(user_id):
-        return User.query.get(int(user_id))
-    
     # blueprints
     app.register_blueprint(auth_bp)
     app.register_blueprint(main_bp)
@@ -46,28 +45,53 @@ def create_app():
     def forbidden(error):
         return jsonify({'error': 'Forbidden', 'message': 'Access denied'}), 403
     
+    @app.cli.command('init')
+    def init_command():
+        """Migrate the database, ensure the admin user and demo lots, build the Redis index."""
+        bootstrap()
+    
     @app.route('/health')
     def health_check():
+        try:
+            # Not every pool (e.g. SQLite's NullPool) can report checked-in connections
+            db.session.execute(db.text('SELECT 1'))
+            database = 'connected'
+        except Exception:
+            database = 'disconnected'
         return jsonify({
             'status': 'healthy',
-            'database': 'connected' if db.engine.pool.checkedin() > 0 else 'disconnected',
-            'redis': 'connected' if redis_client and redis_client.ping() else 'disconnected'
+            'database': database,
+            'redis': 'connected' if redis_client else 'disconnected',
+            'redis_breaker': redis_client.state
         })
     
     return app
 
+def bootstrap():
+    """Prepare a deployment inside the current app context (what `flask init` runs)"""
+    # Brings both fresh and pre-migration databases to the latest schema
+    from flask_migrate import upgrade
+    upgrade()
+
+    # Ensure admin user exists
+    from create_admin import create_admin_user
+    create_admin_user()
+
+    from init_db import init_db
+    init_db()
+
+    # Cold start for the Redis free-spot index
+    from services import spot_index
+    spot_index.rebuild()
+
+
 if __name__ == '__main__':
     app = create_app()
     
-    with app.app_context():
-        db.create_all()
-        
-        # Ensure admin user exists
-        from create_admin import create_admin_user
-        create_admin_user()
-    
-        from init_db import init_db
-        init_db()
+    # The debug reloader runs this file again in a child process; bootstrap once
+    if os.environ.get('WERKZEUG_RUN_MAIN') != 'true':
+        with app.app_context():
+            bootstrap()
     
     app.run(debug=True, host='0.0.0.0', port=5000)
 
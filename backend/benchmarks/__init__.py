@@ -0,0 +1,41 @@
+"""Standalone performance benchmarks.
+
+Run from the backend directory, e.g. ``python -m benchmarks.bench_indexes``.
+Each benchmark builds its own throwaway SQLite database and never touches app.db.
+"""
+import atexit
+import os
+import tempfile
+import time
+from contextlib import contextmanager
+
+
+def make_app(db_path=None, fresh=True):
+    """Create the Flask app bound to a scratch database
+
+    Worker processes of a multi-process benchmark pass the parent's `db_path`
+    with fresh=False to share its database.
+    """
+    from app import create_app
+
+    if db_path is None:
+        fd, db_path = tempfile.mkstemp(prefix='bench_', suffix='.db')
+        os.close(fd)
+        atexit.register(lambda: os.path.exists(db_path) and os.remove(db_path))
+    if fresh and os.path.exists(db_path):
+        os.remove(db_path)
+
+    app = create_app()
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///' + db_path
+    app.config['BENCH_DB_PATH'] = db_path
+    return app
+
+
+@contextmanager
+def timed(label, results=None):
+    start = time.perf_counter()
+    yield
+    elapsed = time.perf_counter() - start
+    if results is not None:
+        results[label] = elapsed
+    print(f"{label:<45} {elapsed * 1000:10.2f} ms")
@@ -0,0 +1,119 @@
+"""Multi-process contention benchmark for the atomic spot allocation engine.
+
+N client processes (default 50) race to fill a single lot. Like a real client,
+each one picks a random spot from the last list of free spots it fetched and
+only refetches after losing a race, so attempts collide constantly. At the end
+the lot must be exactly full with zero double bookings.
+
+    python -m benchmarks.bench_allocation --clients 50 --spots 1000
+"""
+import argparse
+import multiprocessing
+import random
+import time
+
+from benchmarks import make_app
+from extensions import db
+from models import User, ParkingLot, ParkingSpot, Reservation
+
+ENGINE_OPTIONS = {'connect_args': {'timeout': 60}}
+
+
+def fetch_free_spots(rng):
+    spot_ids = [spot_id for (spot_id,) in db.session.query(ParkingSpot.id).filter_by(lot_id=1, status='A')]
+    rng.shuffle(spot_ids)
+    return spot_ids
+
+
+def client(db_path, client_id, users_per_client, start_event, results):
+    from services import allocation
+
+    app = make_app(db_path, fresh=False)
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = ENGINE_OPTIONS
+    rng = random.Random(client_id)
+    user_ids = iter(range(client_id * users_per_client + 1, (client_id + 1) * users_per_client + 1))
+    won = lost = errors = 0
+
+    with app.app_context():
+        start_event.wait()
+        user_id = next(user_ids)
+        believed_free = fetch_free_spots(rng)
+        while believed_free:
+            spot_id = believed_free.pop()
+            try:
+                allocation.reserve_spot(user_id, 1, spot_id, f'BENCH{client_id:02d}')
+                won += 1
+                user_id = next(user_ids, None)
+                if user_id is None:
+                    break
+            except allocation.AllocationError:
+                lost += 1
+                believed_free = fetch_free_spots(rng)
+            except Exception:
+                db.session.rollback()
+                errors += 1
+    results.put((won, lost, errors))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--clients', type=int, default=50)
+    parser.add_argument('--spots', type=int, default=1000)
+    args = parser.parse_args()
+
+    app = make_app()
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = ENGINE_OPTIONS
+    db_path = app.config['BENCH_DB_PATH']
+    users_per_client = args.spots
+
+    with app.app_context():
+        db.create_all()
+        db.session.execute(User.__table__.insert(), [
+            {'id': i, 'username': f'u{i}', 'email': f'u{i}@example.com', 'password': 'x', 'is_admin': False}
+            for i in range(1, args.clients * users_per_client + 1)
+        ])
+        db.session.add(ParkingLot(id=1, name='Contention Lot', price=40, address='Bench Road', pin_code='456010',
+                                  number_of_spots=args.spots, available_spots=args.spots))
+        db.session.execute(ParkingSpot.__table__.insert(), [
+            {'id': i, 'lot_id': 1, 'status': 'A', 'spot_number': f'C{i:04d}'} for i in range(1, args.spots + 1)
+        ])
+        db.session.commit()
+        db.engine.dispose()
+
+    ctx = multiprocessing.get_context('fork')
+    start_event, results = ctx.Event(), ctx.Queue()
+    procs = [ctx.Process(target=client, args=(db_path, i, users_per_client, start_event, results))
+             for i in range(args.clients)]
+    for p in procs:
+        p.start()
+    time.sleep(1)
+    started = time.perf_counter()
+    start_event.set()
+    totals = [results.get() for _ in procs]
+    elapsed = time.perf_counter() - started
+    for p in procs:
+        p.join()
+
+    won = sum(t[0] for t in totals)
+    lost = sum(t[1] for t in totals)
+    errors = sum(t[2] for t in totals)
+
+    with app.app_context():
+        active = Reservation.query.filter_by(status='active').count()
+        occupied = ParkingSpot.query.filter_by(status='O').count()
+        double_booked = db.session.query(Reservation.spot_id).filter_by(status='active').group_by(
+            Reservation.spot_id).having(db.func.count() > 1).count()
+        lot = ParkingLot.query.get(1)
+
+    print(f"clients={args.clients} spots={args.spots} elapsed={elapsed:.2f}s")
+    print(f"reservations={won} lost_races={lost} errors={errors} -> {won / elapsed:.1f} reservations/sec")
+    print(f"active={active} occupied={occupied} double_booked_spots={double_booked} "
+          f"lot_counters=({lot.available_spots} available, {lot.occupied_spots} occupied)")
+
+    ok = double_booked == 0 and active == occupied == won == args.spots and lot.occupied_spots == args.spots
+    print('OK' if ok else 'FAILED')
+    raise SystemExit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
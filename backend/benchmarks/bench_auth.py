@@ -0,0 +1,88 @@
+"""Per-request authentication cost: session cookie versus bearer token.
+
+Logs one user in both ways and calls /user/api/parking-stats --requests
+times with each, printing wall time and the SQL statements that read the
+user table. Then deactivates the user as an admin and checks that the
+token is refused (without Redis, that the deactivation is refused instead).
+Fails when a token request reads the user table while Redis (REDIS_URL) is
+reachable; without Redis the revocation check falls back to one is_active
+query per request, which is reported instead.
+
+    python -m benchmarks.bench_auth --requests 500
+"""
+import argparse
+import time
+
+from sqlalchemy import event
+from werkzeug.security import generate_password_hash
+
+from benchmarks import make_app
+from extensions import db, redis_client
+from models import User
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--requests', type=int, default=500)
+    args = parser.parse_args()
+
+    app = make_app()
+    with app.app_context():
+        db.create_all()
+        db.session.add_all([
+            User(username='bench_admin', email='admin@bench', password=generate_password_hash('bench'), is_admin=True),
+            User(username='bench_user', email='user@bench', password=generate_password_hash('bench'))
+        ])
+        db.session.commit()
+        user_id = User.query.filter_by(email='user@bench').one().id
+        engine = db.engine
+        redis_up = bool(redis_client)
+
+    session = app.test_client()
+    assert session.post('/login', json={'email': 'user@bench', 'password': 'bench'}).json['success']
+    token = app.test_client().post('/login', json={
+        'email': 'user@bench', 'password': 'bench', 'token': True
+    }).json['access_token']
+    bearer = app.test_client()
+    headers = {'Authorization': f'Bearer {token}'}
+
+    statements = []
+    event.listen(engine, 'before_cursor_execute', lambda conn, cursor, statement, *a: statements.append(statement))
+
+    def run(client, **kwargs):
+        statements.clear()
+        started = time.perf_counter()
+        for _ in range(args.requests):
+            response = client.get('/user/api/parking-stats', **kwargs)
+            assert response.status_code == 200, response.status_code
+        elapsed = time.perf_counter() - started
+        return elapsed, sum(1 for statement in statements if 'FROM user' in statement)
+
+    results = {'session cookie': run(session), 'bearer token': run(bearer, headers=headers)}
+    for label, (elapsed, user_queries) in results.items():
+        print(f"{label:<15} {args.requests} requests  {elapsed * 1000 / args.requests:8.2f} ms/request  "
+              f"{user_queries / args.requests:5.2f} user queries/request")
+
+    admin = app.test_client()
+    assert admin.post('/login', json={'email': 'admin@bench', 'password': 'bench'}).json['success']
+    deactivated = admin.post(f'/admin/users/{user_id}/toggle-status').json['success']
+    accepted = bearer.get('/user/api/parking-stats', headers=headers).status_code == 200
+    if deactivated:
+        revoked = not accepted
+        print(f"token after deactivation: {'refused' if revoked else 'STILL ACCEPTED'}")
+    else:
+        # Without Redis the revocation cannot be recorded, so the deactivation is refused
+        revoked = not redis_up
+        print(f"deactivation refused ({'expected' if revoked else 'UNEXPECTED'} with Redis "
+              f"{'down' if not redis_up else 'up'})")
+
+    token_queries = results['bearer token'][1]
+    if not redis_up:
+        print("Redis unavailable: tokens were checked against the database (is_active) instead of the denylist")
+    ok = revoked and (token_queries == 0 or not redis_up)
+    print('OK' if ok else 'FAILED')
+    raise SystemExit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
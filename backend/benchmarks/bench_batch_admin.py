@@ -0,0 +1,83 @@
+"""Closing a section: one override request per spot versus one batch request.
+
+Seeds two lots of --spots spots and, as an admin, forces every spot of the
+first lot occupied through /admin/parking-spots/<id>/override-status and
+every spot of the second through one /admin/parking-spots/override-status
+call with a spot-number range. Prints wall time and SQL statements for each,
+and checks that both lots end up fully occupied with matching counters.
+
+    python -m benchmarks.bench_batch_admin --spots 1000
+"""
+import argparse
+import time
+
+from sqlalchemy import event
+from werkzeug.security import generate_password_hash
+
+from benchmarks import make_app
+from benchmarks.seed import seed
+from extensions import db
+from models import ParkingLot, ParkingSpot, User
+
+
+def counted(engine, fn):
+    statements = []
+    listener = lambda conn, cursor, statement, *args: statements.append(statement)
+    event.listen(engine, 'before_cursor_execute', listener)
+    try:
+        started = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - started
+    finally:
+        event.remove(engine, 'before_cursor_execute', listener)
+    return elapsed, len(statements)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--spots', type=int, default=1000)
+    args = parser.parse_args()
+
+    app = make_app()
+    with app.app_context():
+        db.create_all()
+        seed(users=1, lots=2, spots_per_lot=args.spots, reservations=0)
+        admin = User.query.get(1)
+        admin.is_admin = True
+        admin.password = generate_password_hash('bench')
+        db.session.commit()
+        email = admin.email
+        single_ids = [spot_id for (spot_id,) in db.session.query(ParkingSpot.id).filter_by(lot_id=1, status='A')]
+        numbers = [number for (number,) in db.session.query(ParkingSpot.spot_number).filter_by(lot_id=2)]
+        engine = db.engine
+
+    client = app.test_client()
+    response = client.post('/login', json={'email': email, 'password': 'bench'})
+    assert response.json['success'], response.json
+
+    def one_by_one():
+        for spot_id in single_ids:
+            response = client.post(f'/admin/parking-spots/{spot_id}/override-status', json={'status': 'O'})
+            assert response.json['success'], response.json
+
+    def batched():
+        response = client.post('/admin/parking-spots/override-status', json={
+            'status': 'O', 'lot_id': 2, 'from': min(numbers), 'to': max(numbers)
+        })
+        assert response.json['success'], response.json
+
+    single = counted(engine, one_by_one)
+    batch = counted(engine, batched)
+    for label, (elapsed, statements) in (('per-spot requests', single), ('one batch request', batch)):
+        print(f"{label:<18} {args.spots} spots  {elapsed * 1000:10.1f} ms  {statements:7d} SQL statements")
+
+    with app.app_context():
+        lots = [(lot.available_spots, lot.occupied_spots) for lot in ParkingLot.query.order_by(ParkingLot.id)]
+        occupied = [ParkingSpot.query.filter_by(lot_id=lot_id, status='O').count() for lot_id in (1, 2)]
+    ok = occupied == [args.spots] * 2 and lots == [(0, args.spots)] * 2
+    print(f"occupied spots {occupied}, lot counters {lots} -> {'OK' if ok else 'FAILED'}")
+    raise SystemExit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
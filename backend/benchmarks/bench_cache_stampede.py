@@ -0,0 +1,144 @@
+"""Cache stampede check: one recompute per expiry, however many callers.
+
+Starts --threads callers at once against a cache entry whose compute()
+sleeps for --compute-ms, in three situations: a cold cache, right after a
+bump(), and right after the entry expired. Each burst must run compute()
+exactly once. A final phase keeps all threads calling through several
+expiries; recomputes must never overlap. It reports how many happened, how
+many started early, and the slowest call made by a thread that did not compute.
+
+Uses the Redis tier when a server is reachable (the local tier is disabled
+so every call goes to Redis), otherwise the in-process single-flight path.
+Exits non-zero when a burst recomputes more than once or recomputes overlap.
+
+    python -m benchmarks.bench_cache_stampede --threads 32
+"""
+import argparse
+import threading
+import time
+
+from extensions import redis_client
+from services import cache
+
+NAME = 'bench_stampede'
+TAGS = ('reservations',)
+
+
+class Counted:
+    def __init__(self, seconds):
+        self.seconds = seconds
+        self.calls = 0
+        self.running = 0
+        self.max_running = 0
+        self.lock = threading.Lock()
+
+    def __call__(self):
+        with self.lock:
+            self.calls += 1
+            self.running += 1
+            self.max_running = max(self.max_running, self.running)
+            n = self.calls
+        time.sleep(self.seconds)
+        with self.lock:
+            self.running -= 1
+        return {'computed': n}
+
+
+def burst(threads, fetch):
+    barrier = threading.Barrier(threads)
+
+    def run():
+        barrier.wait()
+        fetch()
+
+    workers = [threading.Thread(target=run) for _ in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+
+def sustained(threads, fetch, compute, seconds):
+    slowest = [0.0]
+    lock = threading.Lock()
+    stop = time.monotonic() + seconds
+
+    def run():
+        while time.monotonic() < stop:
+            before = compute.calls
+            start = time.perf_counter()
+            fetch()
+            elapsed = time.perf_counter() - start
+            # Only count calls during which no recompute finished in this thread's favour
+            if compute.calls == before:
+                with lock:
+                    slowest[0] = max(slowest[0], elapsed)
+            time.sleep(0.005)
+
+    workers = [threading.Thread(target=run) for _ in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return slowest[0]
+
+
+def cleanup():
+    for key in redis_client.keys(f'cache:*:{NAME}*'):
+        redis_client.delete(key)
+    stale_fields = [field for field in redis_client.hkeys(cache.STATS_KEY) if field.startswith(NAME + ':')]
+    if stale_fields:
+        redis_client.hdel(cache.STATS_KEY, *stale_fields)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--threads', type=int, default=32)
+    parser.add_argument('--ttl', type=int, default=5)
+    parser.add_argument('--compute-ms', type=int, default=100)
+    parser.add_argument('--expiries', type=int, default=3)
+    args = parser.parse_args()
+
+    if redis_client:
+        print("Redis tier (local tier disabled)")
+        cache.LOCAL_TTL = 0
+        cleanup()
+    else:
+        print("no Redis server reachable; in-process single-flight only")
+
+    compute = Counted(args.compute_ms / 1000)
+
+    def fetch():
+        return cache.get_or_compute(NAME, TAGS, args.ttl, compute)
+
+    ok = True
+    for label, prepare in [
+        ('cold cache', lambda: None),
+        ('after bump', lambda: cache.bump(*TAGS)),
+        ('after expiry', lambda: time.sleep(args.ttl + 0.1)),
+    ]:
+        prepare()
+        before = compute.calls
+        burst(args.threads, fetch)
+        recomputes = compute.calls - before
+        ok = ok and recomputes == 1 and compute.max_running == 1
+        print(f"{label:<15} {args.threads} callers -> {recomputes} recompute(s)")
+
+    before = compute.calls
+    compute.max_running = 0
+    slowest = sustained(args.threads, fetch, compute, args.ttl * args.expiries)
+    recomputes = compute.calls - before
+    early = cache.stats().get(NAME, {}).get('early', 0)
+    print(f"sustained       {args.expiries} ttl periods -> {recomputes} recompute(s), "
+          f"{early} started early, at most {compute.max_running} at a time; "
+          f"slowest non-computing call {slowest * 1000:.1f} ms")
+    ok = ok and compute.max_running == 1
+    if redis_client:
+        cleanup()
+
+    print('OK' if ok else 'STAMPEDE')
+    raise SystemExit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+"""Admin statistics: recomputed, served from Redis, served from the local tier.
+
+Calls services.cache.get_or_compute for the admin_stats entry the way the
+dashboard does and reports the mean latency per call for each tier. The
+Redis tier is measured by dropping the local copy before every call; it is
+skipped when no Redis server is reachable.
+
+    python -m benchmarks.bench_cache_tiers --reservations 200000 --calls 2000
+"""
+import argparse
+import time
+
+from benchmarks import make_app
+from benchmarks.seed import seed
+from extensions import db, redis_client
+from services import cache
+
+
+def per_call(fn, calls):
+    start = time.perf_counter()
+    for _ in range(calls):
+        fn()
+    return (time.perf_counter() - start) / calls
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--reservations', type=int, default=200000)
+    parser.add_argument('--calls', type=int, default=2000)
+    args = parser.parse_args()
+
+    app = make_app()
+    with app.app_context():
+        from routes.admin_routes import ADMIN_STATS_TAGS, compute_admin_stats
+
+        db.create_all()
+        print(f"seeding {args.reservations} reservations ...")
+        seed(users=5000, lots=50, spots_per_lot=200, reservations=args.reservations, days=60)
+
+        def cached():
+            return cache.get_or_compute('admin_stats', ADMIN_STATS_TAGS, 300, compute_admin_stats)
+
+        def redis_only():
+            cache.clear_local()
+            return cached()
+
+        timings = {'recompute': per_call(compute_admin_stats, max(1, args.calls // 100))}
+        cache.bump(*ADMIN_STATS_TAGS)
+        cached()
+        if redis_client:
+            timings['redis tier'] = per_call(redis_only, args.calls)
+        else:
+            print("no Redis server reachable; skipping the Redis tier")
+        cached()
+        timings['local tier'] = per_call(cached, args.calls)
+
+    for label, seconds in timings.items():
+        print(f"{label:<15} {seconds * 1e6:12.1f} us/call  "
+              f"({timings['recompute'] / seconds:,.0f}x recompute)")
+
+
+if __name__ == '__main__':
+    main()
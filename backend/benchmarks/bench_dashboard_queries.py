@@ -0,0 +1,63 @@
+"""Query-count regression check for /user/dashboard.
+
+Seeds a small and a large database and counts the SQL statements the
+endpoint issues for a logged-in user. Exits non-zero if either run goes over
+QUERY_BUDGET or the count depends on how many lots/spots/reservations exist.
+
+    python -m benchmarks.bench_dashboard_queries
+"""
+import time
+
+from sqlalchemy import event
+from werkzeug.security import generate_password_hash
+
+from benchmarks import make_app
+from benchmarks.seed import seed
+from extensions import db
+from models import User
+
+# user load (Flask-Login) + recent reservations + stats + lot listing
+QUERY_BUDGET = 4
+
+
+def count_dashboard_queries(lots, spots_per_lot, reservations):
+    app = make_app()
+    with app.app_context():
+        db.create_all()
+        seed(users=20, lots=lots, spots_per_lot=spots_per_lot, reservations=reservations)
+        user = User.query.get(1)
+        user.password = generate_password_hash('bench')
+        db.session.commit()
+        email = user.email
+
+    client = app.test_client()
+    response = client.post('/login', json={'email': email, 'password': 'bench'})
+    assert response.json['success'], response.json
+
+    statements = []
+    with app.app_context():
+        engine = db.engine
+    listener = lambda conn, cursor, statement, *args: statements.append(statement)
+    event.listen(engine, 'before_cursor_execute', listener)
+    try:
+        started = time.perf_counter()
+        response = client.get('/user/dashboard')
+        elapsed = time.perf_counter() - started
+    finally:
+        event.remove(engine, 'before_cursor_execute', listener)
+    assert response.status_code == 200, response.status_code
+    print(f"lots={lots:<4} spots/lot={spots_per_lot:<4} reservations={reservations:<6} "
+          f"queries={len(statements)} time={elapsed * 1000:.1f} ms")
+    return len(statements)
+
+
+def main():
+    small = count_dashboard_queries(lots=1, spots_per_lot=10, reservations=50)
+    large = count_dashboard_queries(lots=200, spots_per_lot=100, reservations=20000)
+    ok = small == large and large <= QUERY_BUDGET
+    print(f"budget={QUERY_BUDGET} -> {'OK' if ok else 'FAILED'}")
+    raise SystemExit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
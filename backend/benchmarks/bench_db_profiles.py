@@ -0,0 +1,183 @@
+"""Concurrent writers against each database engine profile.
+
+--processes worker processes with --threads threads each run a booking-like
+mix for --seconds: a write transaction (insert a reservation, touch its lot's
+counters) or, --reads times as often, a read (a user's history page and the
+lot availability summary). Reported per profile: committed writes and reads
+per second, write latency percentiles and how many operations failed with
+"database is locked" or another error.
+
+SQLite is run twice on scratch files: once with SQLite's own defaults
+(rollback journal, synchronous=FULL; what app.db ran with before the engine
+profile existed) and once with the profile from config.Config (WAL,
+synchronous=NORMAL, busy timeout, larger page cache). With --postgres-url the
+pooled PostgreSQL profile runs as well; its tables are DROPPED and recreated,
+so point it at a scratch database.
+
+    python -m benchmarks.bench_db_profiles --processes 8 --threads 4 --seconds 10
+    python -m benchmarks.bench_db_profiles --postgres-url postgresql://localhost/parking_bench
+"""
+import argparse
+import multiprocessing
+import random
+import threading
+import time
+from datetime import datetime
+
+from sqlalchemy.exc import OperationalError
+
+from benchmarks import make_app
+from benchmarks.seed import seed
+from extensions import db
+from models import ParkingLot, ParkingSpot, Reservation
+
+USERS = 1000
+LOTS = 20
+SPOTS_PER_LOT = 50
+
+SQLITE_DEFAULTS = {'SQLITE_JOURNAL_MODE': 'DELETE', 'SQLITE_SYNCHRONOUS': 'FULL',
+                   'SQLITE_BUSY_TIMEOUT_MS': None, 'SQLITE_CACHE_SIZE_KB': None}
+
+
+def build_app(db_path, uri, settings):
+    app = make_app(db_path, fresh=False)
+    if uri:
+        app.config['SQLALCHEMY_DATABASE_URI'] = uri
+    app.config.update(settings)
+    return app
+
+
+def write(rng):
+    spot_id = rng.randint(1, LOTS * SPOTS_PER_LOT)
+    lot_id = (spot_id - 1) // SPOTS_PER_LOT + 1
+    now = datetime.utcnow()
+    db.session.execute(Reservation.__table__.insert(), {
+        'spot_id': spot_id, 'user_id': rng.randint(1, USERS), 'status': 'completed',
+        'parking_timestamp': now, 'leaving_timestamp': now, 'parking_cost': 40.0,
+        'vehicle_number': 'BENCH', 'created_at': now, 'updated_at': now
+    })
+    db.session.execute(ParkingLot.__table__.update().where(ParkingLot.id == lot_id).values(updated_at=now))
+    db.session.commit()
+
+
+def read(rng):
+    Reservation.query.filter_by(user_id=rng.randint(1, USERS)).order_by(
+        Reservation.created_at.desc()).limit(10).all()
+    db.session.query(ParkingSpot.lot_id, db.func.count(ParkingSpot.id)).filter_by(
+        status='A').group_by(ParkingSpot.lot_id).all()
+    db.session.commit()
+
+
+def worker(db_path, uri, settings, threads, reads, seconds, seed_value, start_event, results):
+    app = build_app(db_path, uri, settings)
+    totals = {'writes': 0, 'reads': 0, 'locked': 0, 'errors': 0, 'latencies': []}
+    lock = threading.Lock()
+
+    def run(thread_id):
+        rng = random.Random(seed_value * 1000 + thread_id)
+        counts = {'writes': 0, 'reads': 0, 'locked': 0, 'errors': 0}
+        latencies = []
+        with app.app_context():
+            stop = time.monotonic() + seconds
+            while time.monotonic() < stop:
+                is_write = rng.random() < 1 / (reads + 1)
+                started = time.perf_counter()
+                try:
+                    (write if is_write else read)(rng)
+                except OperationalError as e:
+                    db.session.rollback()
+                    counts['locked' if 'locked' in str(e) else 'errors'] += 1
+                    continue
+                except Exception:
+                    db.session.rollback()
+                    counts['errors'] += 1
+                    continue
+                if is_write:
+                    counts['writes'] += 1
+                    latencies.append(time.perf_counter() - started)
+                else:
+                    counts['reads'] += 1
+            db.session.remove()
+        with lock:
+            for key, count in counts.items():
+                totals[key] += count
+            totals['latencies'].extend(latencies)
+
+    start_event.wait()
+    pool = [threading.Thread(target=run, args=(i,)) for i in range(threads)]
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    results.put(totals)
+
+
+def prepare(app):
+    with app.app_context():
+        if db.engine.dialect.name == 'postgresql':
+            db.drop_all()
+        db.create_all()
+        seed(users=USERS, lots=LOTS, spots_per_lot=SPOTS_PER_LOT, reservations=50000, days=30)
+        if db.engine.dialect.name == 'postgresql':
+            # seed() inserts explicit ids; move the sequence past them
+            db.session.execute(db.text(
+                "SELECT setval(pg_get_serial_sequence('reservation', 'id'), (SELECT max(id) FROM reservation))"
+            ))
+        db.session.commit()
+        db.engine.dispose()
+
+
+def run_profile(label, uri, settings, args):
+    app = make_app()
+    db_path = app.config['BENCH_DB_PATH']
+    if uri:
+        app.config['SQLALCHEMY_DATABASE_URI'] = uri
+    app.config.update(settings)
+    print(f"{label}: seeding ...")
+    prepare(app)
+
+    ctx = multiprocessing.get_context('fork')
+    start_event, results = ctx.Event(), ctx.Queue()
+    procs = [ctx.Process(target=worker, args=(db_path, uri, settings, args.threads, args.reads,
+                                              args.seconds, i, start_event, results))
+             for i in range(args.processes)]
+    for p in procs:
+        p.start()
+    time.sleep(1)
+    start_event.set()
+    totals = [results.get() for _ in procs]
+    for p in procs:
+        p.join()
+
+    latencies = sorted(latency for t in totals for latency in t['latencies'])
+
+    def percentile(q):
+        return latencies[min(len(latencies) - 1, int(q * len(latencies)))] * 1000 if latencies else float('nan')
+
+    writes = sum(t['writes'] for t in totals)
+    reads = sum(t['reads'] for t in totals)
+    print(f"{label:<16} {writes / args.seconds:9.1f} writes/s {reads / args.seconds:9.1f} reads/s  "
+          f"write p50 {percentile(0.5):7.1f} ms p99 {percentile(0.99):8.1f} ms  "
+          f"locked={sum(t['locked'] for t in totals)} errors={sum(t['errors'] for t in totals)}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--processes', type=int, default=8)
+    parser.add_argument('--threads', type=int, default=4)
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--reads', type=int, default=4, help='reads per write')
+    parser.add_argument('--postgres-url', help='scratch PostgreSQL database; its tables are dropped')
+    args = parser.parse_args()
+
+    print(f"{args.processes} processes x {args.threads} threads, {args.reads} reads per write, {args.seconds:g}s each")
+    run_profile('sqlite defaults', None, SQLITE_DEFAULTS, args)
+    run_profile('sqlite profile', None, {}, args)
+    if args.postgres_url:
+        run_profile('postgres pool', args.postgres_url.replace('postgres://', 'postgresql://', 1), {}, args)
+    else:
+        print("postgres pool   skipped (pass --postgres-url)")
+
+
+if __name__ == '__main__':
+    main()
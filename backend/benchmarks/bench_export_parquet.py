@@ -0,0 +1,73 @@
+"""Monthly export: CSV versus typed Parquet.
+
+Writes the same month of bookings in both formats and compares file size,
+write time, full read time and the time to read a single day (Parquet can
+skip the other days' row groups; CSV has to be parsed in full).
+
+    python -m benchmarks.bench_export_parquet --rows 1000000
+"""
+import argparse
+import os
+import tempfile
+from datetime import datetime, timedelta, timezone
+
+import pandas as pd
+import pyarrow.parquet as pq
+
+from benchmarks import make_app, timed
+from benchmarks.seed import seed
+from extensions import db
+from services import exports
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=1000000)
+    args = parser.parse_args()
+
+    app = make_app()
+    workdir = tempfile.mkdtemp(prefix='bench_export_')
+    csv_path = os.path.join(workdir, 'month.csv')
+    parquet_path = os.path.join(workdir, 'month.parquet')
+    results = {}
+
+    with app.app_context():
+        db.create_all()
+        print(f"seeding {args.rows} bookings over 28 days ...")
+        seed(users=20000, lots=50, spots_per_lot=200, reservations=args.rows, days=28)
+        now = datetime.utcnow()
+        since = now - timedelta(days=29)
+
+        with timed('write csv', results):
+            exports.write_csv(csv_path, exports.monthly_frames(since, now), exports.MONTHLY_COLUMNS)
+        with timed('write parquet', results):
+            exports.write_monthly_parquet(parquet_path, since, now)
+
+    with timed('read csv (all columns)', results):
+        pd.read_csv(csv_path)
+    with timed('read parquet (all columns)', results):
+        pd.read_parquet(parquet_path)
+
+    day = (now - timedelta(days=7)).replace(hour=0, minute=0, second=0, microsecond=0, tzinfo=timezone.utc)
+    with timed('one day from csv', results):
+        frame = pd.read_csv(csv_path)
+        ist_day = (day + exports.IST_OFFSET).strftime('%Y-%m-%d')
+        frame[frame['Booking Time'].str.startswith(ist_day)]
+    with timed('one day from parquet (row-group skip)', results):
+        table = pq.read_table(parquet_path, filters=[('booking_time', '>=', day),
+                                                     ('booking_time', '<', day + timedelta(days=1))])
+
+    metadata = pq.ParquetFile(parquet_path).metadata
+    csv_mb = os.path.getsize(csv_path) / 1e6
+    parquet_mb = os.path.getsize(parquet_path) / 1e6
+    print(f"\ncsv      {csv_mb:8.1f} MB")
+    print(f"parquet  {parquet_mb:8.1f} MB  ({csv_mb / parquet_mb:.1f}x smaller, "
+          f"{metadata.num_row_groups} row groups, one day = {table.num_rows} rows)")
+
+    os.remove(csv_path)
+    os.remove(parquet_path)
+    os.rmdir(workdir)
+
+
+if __name__ == '__main__':
+    main()
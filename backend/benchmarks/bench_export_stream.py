@@ -0,0 +1,109 @@
+"""Monthly CSV export: ORM + pandas versus the streaming exporter.
+
+Seeds a month of bookings, then runs each exporter in its own child process
+so peak RSS can be compared fairly. The streaming run should stay roughly
+flat as --rows grows; the legacy one grows with it.
+
+    python -m benchmarks.bench_export_stream --rows 1000000
+"""
+import argparse
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from benchmarks import make_app
+from benchmarks.seed import seed
+from extensions import db
+
+
+def legacy_export(since, path):
+    """The pre-streaming implementation: ORM objects, lazy loads, one DataFrame"""
+    import pandas as pd
+    from models import Reservation
+
+    def format_local_time(utc_timestamp):
+        if not utc_timestamp:
+            return 'N/A'
+        return (utc_timestamp + timedelta(hours=5, minutes=30)).strftime('%Y-%m-%d %H:%M:%S IST')
+
+    data = []
+    for reservation in Reservation.query.filter(Reservation.created_at >= since).all():
+        spot = reservation.parking_spot
+        lot = spot.parking_lot if spot else None
+        user = reservation.user
+        duration = reservation.calculate_duration()
+        cost = reservation.total_cost or reservation.parking_cost or 0
+        data.append({
+            'Booking ID': reservation.id,
+            'User ID': user.id if user else 'N/A',
+            'User Name': f"{user.first_name} {user.last_name}".strip() if user else 'N/A',
+            'User Email': user.email if user else 'N/A',
+            'User Phone': user.phone if user else 'N/A',
+            'Parking Lot': lot.name if lot else 'N/A',
+            'Lot Address': lot.address if lot else 'N/A',
+            'Spot Number': spot.spot_number if spot else 'N/A',
+            'Vehicle Number': reservation.vehicle_number or 'N/A',
+            'Booking Time': format_local_time(reservation.created_at),
+            'Parked In Time': format_local_time(reservation.parked_in_time),
+            'Released Time': format_local_time(reservation.released_time),
+            'Duration': f"{duration}h" if duration > 0 else "-",
+            'Cost': f"₹{cost:.2f}",
+            'Status': reservation.status,
+            'Updated At': format_local_time(reservation.updated_at),
+        })
+    pd.DataFrame(data).to_csv(path, index=False)
+    return len(data)
+
+
+def streaming_export(since, path):
+    from services import exports
+    return exports.write_csv(path, exports.monthly_frames(since), exports.MONTHLY_COLUMNS)
+
+
+def run_child(mode, db_path, since):
+    app = make_app(db_path, fresh=False)
+    out = tempfile.mktemp(prefix=f'export_{mode}_', suffix='.csv')
+    exporter = legacy_export if mode == 'legacy' else streaming_export
+    with app.app_context():
+        started = time.perf_counter()
+        count = exporter(since, out)
+        elapsed = time.perf_counter() - started
+    size = os.path.getsize(out)
+    os.remove(out)
+    peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"{mode:<10} rows={count:<8} time={elapsed:7.2f}s rows/s={count / elapsed:9.0f} "
+          f"peak_rss={peak_mb:7.1f} MB file={size / 1e6:.1f} MB")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=1000000)
+    parser.add_argument('--modes', default='stream,legacy')
+    parser.add_argument('--child', choices=['stream', 'legacy'])
+    parser.add_argument('--db')
+    parser.add_argument('--since')
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args.child, args.db, datetime.fromisoformat(args.since))
+        return
+
+    app = make_app()
+    db_path = app.config['BENCH_DB_PATH']
+    with app.app_context():
+        db.create_all()
+        print(f"seeding {args.rows} bookings over 28 days ...")
+        seed(users=20000, lots=50, spots_per_lot=200, reservations=args.rows, days=28)
+    since = datetime.utcnow() - timedelta(days=29)
+
+    for mode in args.modes.split(','):
+        subprocess.run([sys.executable, '-m', 'benchmarks.bench_export_stream', '--child', mode,
+                        '--db', db_path, '--since', since.isoformat()], check=True)
+
+
+if __name__ == '__main__':
+    main()
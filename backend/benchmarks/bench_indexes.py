@@ -0,0 +1,73 @@
+"""Before/after timings for the composite indexes on the hot reservation and spot queries.
+
+    python -m benchmarks.bench_indexes --reservations 1000000
+"""
+import argparse
+import random
+from datetime import datetime
+
+from benchmarks import make_app, timed
+from benchmarks.seed import seed
+from extensions import db
+from models import ParkingSpot, Reservation
+
+HOT_INDEXES = list(Reservation.__table__.indexes) + list(ParkingSpot.__table__.indexes)
+
+
+def run_queries(label, repeat, users, spots, lots, results):
+    rng = random.Random(7)
+    month_start = datetime.utcnow().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+    with timed(f"{label}: active reservation by user x{repeat}", results):
+        for _ in range(repeat):
+            Reservation.query.filter_by(user_id=rng.randint(1, users), status='active').first()
+    with timed(f"{label}: active reservation by spot x{repeat}", results):
+        for _ in range(repeat):
+            Reservation.query.filter_by(spot_id=rng.randint(1, spots), status='active').first()
+    with timed(f"{label}: available spots in lot x{repeat}", results):
+        for _ in range(repeat):
+            ParkingSpot.query.filter_by(lot_id=rng.randint(1, lots), status='A').count()
+    with timed(f"{label}: month revenue range scan x10", results):
+        for _ in range(10):
+            db.session.query(db.func.sum(Reservation.parking_cost)).filter(
+                Reservation.created_at >= month_start
+            ).scalar()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--reservations', type=int, default=1000000)
+    parser.add_argument('--users', type=int, default=20000)
+    parser.add_argument('--lots', type=int, default=50)
+    parser.add_argument('--spots-per-lot', type=int, default=200)
+    parser.add_argument('--repeat', type=int, default=200)
+    args = parser.parse_args()
+
+    app = make_app()
+    with app.app_context():
+        db.create_all()
+        with timed('seed'):
+            counts = seed(users=args.users, lots=args.lots, spots_per_lot=args.spots_per_lot,
+                          reservations=args.reservations)
+        print(counts)
+
+        for index in HOT_INDEXES:
+            index.drop(db.engine)
+        db.session.execute(db.text('ANALYZE'))
+        results = {}
+        run_queries('before', args.repeat, args.users, counts['spots'], args.lots, results)
+
+        for index in HOT_INDEXES:
+            index.create(db.engine)
+        db.session.execute(db.text('ANALYZE'))
+        run_queries('after', args.repeat, args.users, counts['spots'], args.lots, results)
+
+        print()
+        for key in [k for k in results if k.startswith('before: ')]:
+            name = key[len('before: '):]
+            before, after = results[key], results['after: ' + name]
+            print(f"{name:<40} {before / after:8.1f}x faster")
+
+
+if __name__ == '__main__':
+    main()
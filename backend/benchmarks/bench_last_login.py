@@ -0,0 +1,107 @@
+"""Login spike: committing last_login per login versus the write-behind buffer.
+
+--threads workers each replay their share of --logins logins against
+--users users: load the user by id (as /login does), then either commit
+last_login directly (the old login path) or call services.last_login.record()
+and let one flush() write everything. Prints wall time and UPDATE statements
+for each and checks that the user table ends up with the same latest login
+per user. Needs Redis (REDIS_URL); without it record() writes through.
+
+    python -m benchmarks.bench_last_login --users 2000 --logins 20000 --threads 8
+"""
+import argparse
+import random
+import threading
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import event
+
+from benchmarks import make_app
+from extensions import db, redis_client
+from models import User
+from services import last_login
+
+
+def replay(app, schedule, threads, login):
+    def worker(part):
+        with app.app_context():
+            for user_id, when in part:
+                login(User.query.get(user_id), when)
+            db.session.remove()
+
+    # A user's logins stay in order on one thread, as one person logs in at a time
+    parts = [[(user_id, when) for user_id, when in schedule if user_id % threads == i] for i in range(threads)]
+    workers = [threading.Thread(target=worker, args=(part,)) for part in parts]
+    started = time.perf_counter()
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    return time.perf_counter() - started
+
+
+def direct(user, when):
+    user.last_login = when
+    db.session.commit()
+
+
+def latest_logins():
+    return dict(db.session.query(User.id, User.last_login).order_by(User.id))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--users', type=int, default=2000)
+    parser.add_argument('--logins', type=int, default=20000)
+    parser.add_argument('--threads', type=int, default=8)
+    args = parser.parse_args()
+
+    app = make_app()
+    with app.app_context():
+        if not redis_client:
+            raise SystemExit('Redis unavailable (REDIS_URL); the buffer would write through')
+        redis_client.delete(last_login.PENDING_KEY, last_login.FLUSHING_KEY)
+        db.create_all()
+        db.session.execute(User.__table__.insert(), [
+            {'username': f'bench{i}', 'email': f'bench{i}@example.com', 'password': 'x', 'is_admin': False}
+            for i in range(args.users)
+        ])
+        db.session.commit()
+        user_ids = [user_id for (user_id,) in db.session.query(User.id)]
+        engine = db.engine
+
+    start = datetime(2025, 7, 1, 8, 0)
+    rng = random.Random(0)
+    schedule = [(rng.choice(user_ids), start + timedelta(seconds=i)) for i in range(args.logins)]
+
+    updates = []
+    event.listen(engine, 'before_cursor_execute',
+                 lambda conn, cursor, statement, *a: statement.startswith('UPDATE') and updates.append(statement))
+
+    results = {}
+    results['commit per login'] = (replay(app, schedule, args.threads, direct), len(updates))
+    with app.app_context():
+        expected = latest_logins()
+        db.session.query(User).update({'last_login': None})
+        db.session.commit()
+
+    updates.clear()
+    elapsed = replay(app, schedule, args.threads, last_login.record)
+    with app.app_context():
+        started = time.perf_counter()
+        flushed = last_login.flush()
+        flush_time = time.perf_counter() - started
+        buffered = latest_logins()
+    results['buffered + flush'] = (elapsed + flush_time, len(updates))
+
+    for label, (seconds, statements) in results.items():
+        print(f"{label:<17} {args.logins} logins  {seconds * 1000:10.1f} ms  {statements:7d} UPDATE statements")
+    print(f"flush wrote {flushed} users in {flush_time * 1000:.1f} ms")
+    ok = buffered == expected
+    print('same last_login per user -> ' + ('OK' if ok else 'FAILED'))
+    raise SystemExit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,101 @@
+"""Spot provisioning: the old per-object loops versus services.provisioning.
+
+Creates a lot of --spots spots and then shrinks it to a tenth, once with
+the loops previously in admin_routes.create_parking_lot/edit_parking_lot and
+once with the set-based service (a templated multi-level garage for the
+create). Both must leave the same spot and counter totals. Fails when the
+bulk create takes longer than --budget-ms.
+
+    python -m benchmarks.bench_provisioning --spots 10000
+"""
+import argparse
+
+from benchmarks import make_app, timed
+from extensions import db
+from models import ParkingLot, ParkingSpot
+from services import provisioning
+from services.availability import spot_status_changed
+
+
+def legacy_create(name, count):
+    lot = ParkingLot(name=name, price=40, address='Bench Road', pin_code='456010',
+                     number_of_spots=count, available_spots=count)
+    db.session.add(lot)
+    db.session.commit()
+    for i in range(lot.number_of_spots):
+        db.session.add(ParkingSpot(lot_id=lot.id, spot_number=f"{lot.name}-{i+1:03d}", status='A'))
+    db.session.commit()
+    return lot.id
+
+
+def legacy_shrink(lot_id, new_count):
+    lot = ParkingLot.query.get(lot_id)
+    for spot in lot.parking_spots[new_count:]:
+        if spot.status == 'A':
+            spot_status_changed(lot.id, spot.id, 'A', None)
+            db.session.delete(spot)
+    lot.number_of_spots = new_count
+    db.session.commit()
+
+
+def garage_template(count):
+    """A template with `count` spots: levels of 10 rows (A-J) of 100 spots"""
+    levels, rest = divmod(count, 1000)
+    if rest or not 1 <= levels <= 99:
+        raise SystemExit('--spots must be a multiple of 1000, at most 99000')
+    return 'L{level}-{row}{n:03d}', {'level': f'1-{levels}', 'row': 'A-J', 'n': 100}
+
+
+def bulk_create(name, count):
+    lot = ParkingLot(name=name, price=40, address='Bench Road', pin_code='456010', number_of_spots=0)
+    db.session.add(lot)
+    db.session.flush()
+    provisioning.add_template_spots(lot, *garage_template(count))
+    db.session.commit()
+    return lot.id
+
+
+def bulk_shrink(lot_id, new_count):
+    provisioning.resize_lot(ParkingLot.query.get(lot_id), new_count)
+    db.session.commit()
+
+
+def totals(lot_id):
+    db.session.expire_all()
+    lot = ParkingLot.query.get(lot_id)
+    return (ParkingSpot.query.filter_by(lot_id=lot_id).count(), lot.number_of_spots,
+            lot.available_spots, lot.occupied_spots)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--spots', type=int, default=10000)
+    parser.add_argument('--budget-ms', type=float, default=1000)
+    args = parser.parse_args()
+    garage_template(args.spots)
+
+    results = {}
+    app = make_app()
+    with app.app_context():
+        db.create_all()
+        with timed(f'legacy create {args.spots} spots', results):
+            legacy_id = legacy_create('Legacy', args.spots)
+        with timed(f'bulk create {args.spots} spots', results):
+            bulk_id = bulk_create('Bulk', args.spots)
+        with timed(f'legacy shrink to {args.spots // 10}', results):
+            legacy_shrink(legacy_id, args.spots // 10)
+        with timed(f'bulk shrink to {args.spots // 10}', results):
+            bulk_shrink(bulk_id, args.spots // 10)
+        legacy_totals, bulk_totals = totals(legacy_id), totals(bulk_id)
+
+    print(f"spots/number_of_spots/available/occupied: legacy {legacy_totals}, bulk {bulk_totals}")
+    bulk_ms = results[f'bulk create {args.spots} spots'] * 1000
+    ok = legacy_totals == bulk_totals and bulk_ms <= args.budget_ms
+    if bulk_ms > args.budget_ms:
+        print(f"bulk create took {bulk_ms:.0f} ms, over the {args.budget_ms:.0f} ms budget")
+    print('OK' if ok else 'FAILED')
+    raise SystemExit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
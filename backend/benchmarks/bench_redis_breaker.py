@@ -0,0 +1,80 @@
+"""Lot listing latency while Redis hangs.
+
+Starts a fake Redis server that accepts connections and never answers, points
+REDIS_URL at it, and times --calls lot listings (routes.user_routes.list_lots:
+the Redis availability index with its database fallback). The calls are run
+twice, first with the circuit breaker off (every call waits out the socket
+timeout) and then with the configured breaker. Without socket timeouts at
+all, the old client would wait on the first call forever.
+
+    python -m benchmarks.bench_redis_breaker --calls 50
+"""
+import argparse
+import socket
+import threading
+import time
+
+from benchmarks import make_app
+from benchmarks.seed import seed
+from extensions import db, redis_client
+
+
+def hung_server():
+    """Listen on a free local port; accept connections and read, but never reply"""
+    listener = socket.socket()
+    listener.bind(('127.0.0.1', 0))
+    listener.listen(128)
+    held = []
+
+    def accept():
+        while True:
+            conn, _ = listener.accept()
+            held.append(conn)
+
+    threading.Thread(target=accept, daemon=True).start()
+    return listener.getsockname()[1]
+
+
+def run(app, calls, settings):
+    from routes.user_routes import list_lots
+
+    app.config.update(settings)
+    redis_client.init_app(app)
+    latencies = []
+    with app.app_context():
+        for _ in range(calls):
+            start = time.perf_counter()
+            lots = list_lots()
+            latencies.append(time.perf_counter() - start)
+            assert lots, 'the database fallback should list the lots'
+    latencies.sort()
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--calls', type=int, default=50)
+    args = parser.parse_args()
+
+    app = make_app()
+    app.config['REDIS_URL'] = f'redis://127.0.0.1:{hung_server()}/0'
+    with app.app_context():
+        db.create_all()
+        seed(users=100, lots=50, spots_per_lot=20, reservations=0)
+        db.session.commit()
+
+    print(f"socket timeout {app.config['REDIS_SOCKET_TIMEOUT']}s, breaker opens after "
+          f"{app.config['REDIS_BREAKER_THRESHOLD']} failures for {app.config['REDIS_BREAKER_COOLDOWN']}s")
+    threshold, cooldown = app.config['REDIS_BREAKER_THRESHOLD'], app.config['REDIS_BREAKER_COOLDOWN']
+    for label, settings in [
+        ('timeouts only', {'REDIS_BREAKER_COOLDOWN': 0}),
+        ('with breaker', {'REDIS_BREAKER_THRESHOLD': threshold, 'REDIS_BREAKER_COOLDOWN': cooldown}),
+    ]:
+        latencies = run(app, args.calls, settings)
+        total = sum(latencies)
+        print(f"{label:<14} {args.calls} listings in {total:7.2f}s  "
+              f"p50 {latencies[len(latencies) // 2] * 1000:8.2f} ms  max {latencies[-1] * 1000:8.2f} ms")
+
+
+if __name__ == '__main__':
+    main()
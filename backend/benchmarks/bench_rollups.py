@@ -0,0 +1,101 @@
+"""Dashboard/analytics aggregates: raw reservation scans versus daily_lot_stats.
+
+Times the original queries (month revenue and count, per-lot revenue loop,
+today's revenue via func.date) against services.stats reading the rollup
+plus the raw delta, times the backfill and an incremental refresh, and
+checks that both give the same numbers.
+
+    python -m benchmarks.bench_rollups --reservations 1000000
+"""
+import argparse
+import random
+from datetime import datetime, timedelta
+
+from benchmarks import make_app, timed
+from benchmarks.seed import seed
+from extensions import db
+from models import ParkingLot, ParkingSpot, Reservation
+from services import stats
+
+
+def raw_aggregates(now):
+    month_start = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    today_revenue = db.session.query(db.func.sum(Reservation.parking_cost)).filter(
+        db.func.date(Reservation.created_at) == now.date()
+    ).scalar() or 0
+    month_revenue = db.session.query(db.func.sum(Reservation.parking_cost)).filter(
+        Reservation.created_at >= month_start
+    ).scalar() or 0
+    monthly_reservations = Reservation.query.filter(Reservation.created_at >= month_start).count()
+    lot_revenue = {}
+    for lot in ParkingLot.query.all():
+        revenue = db.session.query(db.func.sum(Reservation.parking_cost)).join(
+            ParkingSpot, Reservation.spot_id == ParkingSpot.id
+        ).filter(ParkingSpot.lot_id == lot.id, Reservation.created_at >= month_start).scalar() or 0
+        lot_revenue[lot.id] = float(revenue)
+    return float(today_revenue), float(month_revenue), monthly_reservations, lot_revenue
+
+
+def rollup_aggregates(now):
+    month_start = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    today = stats.day_start(now)
+    today_revenue = stats.revenue_between(today, today + timedelta(days=1))
+    lot_totals = stats.lot_totals(month_start, now)
+    month_revenue = sum(t['revenue'] for t in lot_totals.values())
+    monthly_reservations = sum(t['reservations'] for t in lot_totals.values())
+    lot_revenue = {lot.id: lot_totals.get(lot.id, {}).get('revenue', 0.0) for lot in ParkingLot.query.all()}
+    return today_revenue, month_revenue, monthly_reservations, lot_revenue
+
+
+def same(a, b):
+    close = lambda x, y: abs(x - y) <= 1e-6 * max(1.0, abs(x))
+    return (close(a[0], b[0]) and close(a[1], b[1]) and a[2] == b[2]
+            and a[3].keys() == b[3].keys() and all(close(a[3][k], b[3][k]) for k in a[3]))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--reservations', type=int, default=1000000)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--touched', type=int, default=10, help='old bookings updated before the incremental refresh')
+    args = parser.parse_args()
+
+    app = make_app()
+    with app.app_context():
+        db.create_all()
+        print(f"seeding {args.reservations} reservations over 90 days ...")
+        seed(users=20000, lots=50, spots_per_lot=200, reservations=args.reservations, days=90)
+        now = datetime.utcnow()
+        results = {}
+
+        with timed('backfill refresh (all days)', results):
+            stats.refresh(now, full=True)
+            db.session.commit()
+
+        # Touch a few older bookings the way a release/cancel would
+        rng = random.Random(1)
+        ids = [rng.randint(1, args.reservations) for _ in range(args.touched)]
+        Reservation.query.filter(Reservation.id.in_(ids)).update(
+            {'parking_cost': Reservation.parking_cost + 1, 'updated_at': datetime.utcnow()},
+            synchronize_session=False)
+        db.session.commit()
+        with timed(f'incremental refresh ({args.touched} touched bookings)', results):
+            days = stats.refresh()
+            db.session.commit()
+        print(f"  recomputed {len(days)} days")
+
+        for label, fn in [('raw aggregates', raw_aggregates), ('rollup + today delta', rollup_aggregates)]:
+            fn(now)  # warm the page cache
+            with timed(f'{label} x{args.repeat}', results):
+                for _ in range(args.repeat):
+                    values = fn(now)
+            if label == 'raw aggregates':
+                expected = values
+        ok = same(expected, values)
+        print(f"results {'match' if ok else 'DIFFER'}; "
+              f"{results[f'raw aggregates x{args.repeat}'] / results[f'rollup + today delta x{args.repeat}']:.0f}x faster")
+    raise SystemExit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
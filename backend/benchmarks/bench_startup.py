@@ -0,0 +1,102 @@
+"""Cold start: web app, Celery worker and `flask init`, each in a fresh interpreter.
+
+Times --runs fresh subprocesses per phase and reports the median:
+    web     import app and call create_app() (what every web worker does)
+    worker  import tasks (what `celery -A tasks worker` does)
+    init    create the app and run app.bootstrap() on a scratch SQLite file
+
+Fails when a phase's median exceeds its budget, when pandas, NumPy, pyarrow
+or reportlab get imported by the web or worker start-up (they belong to the
+export/report code paths), or when init builds the app more than once.
+
+    python -m benchmarks.bench_startup --runs 5 --web-budget-ms 1500
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+HEAVY_MODULES = ('pandas', 'numpy', 'pyarrow', 'reportlab')
+
+PHASES = {
+    'web': """
+from app import create_app
+create_app()
+""",
+    'worker': """
+import tasks
+""",
+    'init': """
+import app
+calls = []
+original = app.create_app
+app.create_app = lambda: calls.append(1) or original()
+with app.create_app().app_context():
+    app.bootstrap()
+result['create_app_calls'] = len(calls)
+""",
+}
+
+WRAPPER = """
+import json, sys, time
+start = time.perf_counter()
+result = {{}}
+{body}
+result['seconds'] = time.perf_counter() - start
+result['heavy'] = [name for name in {heavy!r} if name in sys.modules]
+print('RESULT ' + json.dumps(result))
+"""
+
+
+def run_phase(phase):
+    fd, db_path = tempfile.mkstemp(prefix='bench_startup_', suffix='.db')
+    os.close(fd)
+    os.remove(db_path)
+    env = dict(os.environ, DATABASE_URL='sqlite:///' + db_path)
+    try:
+        output = subprocess.run(
+            [sys.executable, '-c', WRAPPER.format(body=PHASES[phase], heavy=HEAVY_MODULES)],
+            env=env, capture_output=True, text=True, check=True
+        ).stdout
+    finally:
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(db_path + suffix):
+                os.remove(db_path + suffix)
+    line = next(line for line in output.splitlines() if line.startswith('RESULT '))
+    return json.loads(line[len('RESULT '):])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--web-budget-ms', type=float, default=1500)
+    parser.add_argument('--worker-budget-ms', type=float, default=1500)
+    parser.add_argument('--init-budget-ms', type=float, default=3000)
+    args = parser.parse_args()
+    budgets = {'web': args.web_budget_ms, 'worker': args.worker_budget_ms, 'init': args.init_budget_ms}
+
+    ok = True
+    for phase in PHASES:
+        results = [run_phase(phase) for _ in range(args.runs)]
+        median = statistics.median(r['seconds'] for r in results) * 1000
+        heavy = sorted({name for r in results for name in r['heavy']})
+        problems = []
+        if median > budgets[phase]:
+            problems.append(f"over the {budgets[phase]:.0f} ms budget")
+        if heavy and phase != 'init':
+            problems.append(f"imports {', '.join(heavy)}")
+        if any(r.get('create_app_calls', 1) != 1 for r in results):
+            problems.append("builds the app more than once")
+        ok = ok and not problems
+        print(f"{phase:<7} median {median:8.1f} ms over {args.runs} runs  "
+              f"{'; '.join(problems) if problems else 'ok'}")
+
+    print('OK' if ok else 'REGRESSED')
+    raise SystemExit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
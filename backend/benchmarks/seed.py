@@ -0,0 +1,119 @@
+"""Bulk data generators shared by the benchmarks"""
+import random
+from datetime import datetime, timedelta
+
+from extensions import db
+from models import User, ParkingLot, ParkingSpot, Reservation
+
+CHUNK = 50000
+
+
+def _insert(table, rows):
+    for i in range(0, len(rows), CHUNK):
+        db.session.execute(table.insert(), rows[i:i + CHUNK])
+
+
+def seed(users=5000, lots=50, spots_per_lot=200, reservations=1000000, days=365, seed_value=42):
+    """Fill the current database with synthetic lots, spots, users and reservations.
+
+    Every user gets at most one active reservation and every spot at most one,
+    matching what the app itself allows.
+    """
+    rng = random.Random(seed_value)
+    now = datetime.utcnow()
+
+    _insert(User.__table__, [
+        {'id': i, 'username': f'user{i}', 'email': f'user{i}@example.com', 'password': 'x',
+         'is_admin': False, 'is_active': True, 'created_at': now,
+         'last_login': now - timedelta(days=rng.randint(0, 60))}
+        for i in range(1, users + 1)
+    ])
+    _insert(ParkingLot.__table__, [
+        {'id': i, 'name': f'Lot {i}', 'price': 20 + i % 30, 'address': f'{i} Main Road',
+         'pin_code': '456010', 'number_of_spots': spots_per_lot, 'available_spots': 0,
+         'occupied_spots': 0, 'created_at': now, 'updated_at': now}
+        for i in range(1, lots + 1)
+    ])
+
+    spot_rows = []
+    for lot_id in range(1, lots + 1):
+        for n in range(spots_per_lot):
+            spot_rows.append({'id': len(spot_rows) + 1, 'lot_id': lot_id, 'status': 'A',
+                              'spot_number': f'L{lot_id}-{n + 1:04d}', 'created_at': now, 'updated_at': now})
+
+    active_users = rng.sample(range(1, users + 1), min(users, len(spot_rows)) // 4)
+    active_spots = rng.sample(range(1, len(spot_rows) + 1), len(active_users))
+    for spot_id in active_spots:
+        spot_rows[spot_id - 1]['status'] = 'O'
+    _insert(ParkingSpot.__table__, spot_rows)
+
+    rows = []
+    for i in range(reservations):
+        created = now - timedelta(seconds=rng.randint(3600, days * 86400))
+        hours = rng.uniform(0.25, 8)
+        rows.append({
+            'spot_id': rng.randint(1, len(spot_rows)),
+            'user_id': rng.randint(1, users),
+            'vehicle_number': f'MP{rng.randint(10, 99)}AB{rng.randint(1000, 9999)}',
+            'parking_timestamp': created,
+            'parked_in_time': created,
+            'leaving_timestamp': created + timedelta(hours=hours),
+            'released_time': created + timedelta(hours=hours),
+            'parking_cost': round(hours * 40, 2),
+            'total_cost': round(hours * 40, 2),
+            'status': 'cancelled' if rng.random() < 0.05 else 'completed',
+            'created_at': created,
+            'updated_at': created + timedelta(hours=hours),
+        })
+        if len(rows) == CHUNK:
+            _insert(Reservation.__table__, rows)
+            rows = []
+    for user_id, spot_id in zip(active_users, active_spots):
+        created = now - timedelta(minutes=rng.randint(1, 600))
+        rows.append({'spot_id': spot_id, 'user_id': user_id, 'vehicle_number': 'MP09ZZ0001',
+                     'parking_timestamp': created, 'parked_in_time': None, 'leaving_timestamp': None,
+                     'released_time': None, 'parking_cost': 0.0, 'total_cost': None, 'status': 'active',
+                     'created_at': created, 'updated_at': created})
+    _insert(Reservation.__table__, rows)
+
+    ParkingLot.recount_spots()
+    db.session.commit()
+    return {'users': users, 'lots': lots, 'spots': len(spot_rows), 'reservations': reservations + len(active_users)}
+
+
+def seed_spot_events(events=2000000, days=80, seed_value=42):
+    """Log synthetic A->O / O->A spot_event history that ends in each spot's current status.
+
+    Call after seed(); spots that are occupied now end on an A->O event.
+    """
+    import numpy as np
+    from models import SpotEvent
+
+    rng = np.random.default_rng(seed_value)
+    now = datetime.utcnow()
+    start = now - timedelta(days=days)
+    spots = db.session.query(ParkingSpot.id, ParkingSpot.lot_id, ParkingSpot.status).order_by(ParkingSpot.id).all()
+    sessions = max(1, events // (2 * len(spots)))
+    window = (now - start).total_seconds()
+
+    spot_ids, lot_ids, offsets, parked = [], [], [], []
+    for spot_id, lot_id, status in spots:
+        times = np.sort(rng.uniform(0, window - 60, 2 * sessions + (status == 'O')))
+        spot_ids.append(np.full(len(times), spot_id))
+        lot_ids.append(np.full(len(times), lot_id))
+        offsets.append(times)
+        parked.append(np.arange(len(times)) % 2 == 0)
+    spot_ids, lot_ids, offsets, parked = (np.concatenate(a) for a in (spot_ids, lot_ids, offsets, parked))
+
+    # Appended in time order, as the application writes them
+    rows = []
+    for i in np.argsort(offsets, kind='stable'):
+        rows.append({'spot_id': int(spot_ids[i]), 'lot_id': int(lot_ids[i]),
+                     'old_status': 'A' if parked[i] else 'O', 'new_status': 'O' if parked[i] else 'A',
+                     'created_at': start + timedelta(seconds=float(offsets[i]))})
+        if len(rows) == CHUNK:
+            _insert(SpotEvent.__table__, rows)
+            rows = []
+    _insert(SpotEvent.__table__, rows)
+    db.session.commit()
+    return SpotEvent.query.count()
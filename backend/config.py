@@ -1,25 +1,63 @@
 import os
+from datetime import timedelta
 
 BASE_DIR = os.path.abspath(os.path.dirname(__file__))
 
+
+def _database_url():
+    url = os.environ.get('DATABASE_URL', 'sqlite:///' + os.path.join(BASE_DIR, 'app.db'))
+    # Heroku-style URLs use a scheme SQLAlchemy 1.4 no longer accepts
+    if url.startswith('postgres://'):
+        url = 'postgresql://' + url[len('postgres://'):]
+    return url
+
+
+def _optional_int(name, default):
+    value = os.environ.get(name, default)
+    return int(value) if value not in (None, '') else None
+
+
 class Config:
     SECRET_KEY = 'your_secret_key_here'
-    SQLALCHEMY_DATABASE_URI = 'sqlite:///' + os.path.join(BASE_DIR, 'app.db')
+    SQLALCHEMY_DATABASE_URI = _database_url()
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+
+    # SQLite profile, applied to every new connection (empty value = SQLite's default)
+    SQLITE_JOURNAL_MODE = os.environ.get('SQLITE_JOURNAL_MODE', 'WAL')
+    SQLITE_SYNCHRONOUS = os.environ.get('SQLITE_SYNCHRONOUS', 'NORMAL')
+    SQLITE_BUSY_TIMEOUT_MS = _optional_int('SQLITE_BUSY_TIMEOUT_MS', 5000)
+    SQLITE_CACHE_SIZE_KB = _optional_int('SQLITE_CACHE_SIZE_KB', 20000)
+
+    # PostgreSQL profile: connection pool per process, statement timeout per connection
+    DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', 10))
+    DB_MAX_OVERFLOW = int(os.environ.get('DB_MAX_OVERFLOW', 20))
+    DB_POOL_TIMEOUT = int(os.environ.get('DB_POOL_TIMEOUT', 30))
+    DB_POOL_RECYCLE = int(os.environ.get('DB_POOL_RECYCLE', 1800))
+    DB_STATEMENT_TIMEOUT_MS = int(os.environ.get('DB_STATEMENT_TIMEOUT_MS', 30000))  # 0 disables
     
-    # Redis Configuration
-    REDIS_URL = 'redis://localhost:6379/0'
+    # Redis Configuration (see extensions.LazyRedis)
+    REDIS_URL = os.environ.get('REDIS_URL', 'redis://localhost:6379/0')
+    REDIS_MAX_CONNECTIONS = int(os.environ.get('REDIS_MAX_CONNECTIONS', 50))
+    REDIS_POOL_TIMEOUT = float(os.environ.get('REDIS_POOL_TIMEOUT', 1.0))  # wait for a free pooled connection
+    REDIS_SOCKET_TIMEOUT = float(os.environ.get('REDIS_SOCKET_TIMEOUT', 0.5))
+    REDIS_CONNECT_TIMEOUT = float(os.environ.get('REDIS_CONNECT_TIMEOUT', 0.5))
+    REDIS_HEALTH_CHECK_INTERVAL = int(os.environ.get('REDIS_HEALTH_CHECK_INTERVAL', 30))
+    REDIS_BREAKER_THRESHOLD = int(os.environ.get('REDIS_BREAKER_THRESHOLD', 3))  # consecutive failures
+    REDIS_BREAKER_COOLDOWN = float(os.environ.get('REDIS_BREAKER_COOLDOWN', 30))
     
     # Celery Configuration
-    CELERY_BROKER_URL = 'redis://localhost:6379/0'
-    CELERY_RESULT_BACKEND = 'redis://localhost:6379/0'
+    CELERY_BROKER_URL = os.environ.get('CELERY_BROKER_URL', 'redis://localhost:6379/0')
+    CELERY_RESULT_BACKEND = os.environ.get('CELERY_RESULT_BACKEND', 'redis://localhost:6379/0')
     
     # ADMIN
     ADMIN_USERNAME = 'admin'
     ADMIN_EMAIL = 'admin@parking.com'
     ADMIN_PASSWORD = 'admin123'
 
-    JWT_SECRET_KEY = 'parking_app_jwt_secret_key_2024_secure_and_unique'
+    JWT_SECRET_KEY = os.environ.get('JWT_SECRET_KEY', 'parking_app_jwt_secret_key_2024_secure_and_unique')
+    JWT_TOKEN_LOCATION = ['headers']
+    # Also how long revocations are kept in Redis
+    JWT_ACCESS_TOKEN_EXPIRES = timedelta(minutes=int(os.environ.get('JWT_ACCESS_TOKEN_MINUTES', 60)))
     SESSION_COOKIE_SAMESITE = None
     SESSION_COOKIE_SECURE = False
 
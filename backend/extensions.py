@@ -1,26 +1,251 @@
-from flask_sqlalchemy import SQLAlchemy
+import threading
+import time
+
+from flask_sqlalchemy import SQLAlchemy as _SQLAlchemy
 from flask_login import LoginManager
+from flask_jwt_extended import JWTManager
 from flask_migrate import Migrate
 from flask_cors import CORS
 import redis
 from celery import Celery
 from flask_mail import Mail
+from sqlalchemy import event
+
+from config import Config
+
+SQLITE_JOURNAL_MODES = ('DELETE', 'TRUNCATE', 'PERSIST', 'MEMORY', 'WAL', 'OFF')
+SQLITE_SYNCHRONOUS_LEVELS = ('OFF', 'NORMAL', 'FULL', 'EXTRA')
+
+
+def _sqlite_pragmas(config):
+    """[(pragma, value)] for the SQLITE_* settings that are set"""
+    journal_mode = (config.get('SQLITE_JOURNAL_MODE') or '').upper()
+    synchronous = (config.get('SQLITE_SYNCHRONOUS') or '').upper()
+    if journal_mode and journal_mode not in SQLITE_JOURNAL_MODES:
+        raise ValueError(f"SQLITE_JOURNAL_MODE must be one of: {', '.join(SQLITE_JOURNAL_MODES)}")
+    if synchronous and synchronous not in SQLITE_SYNCHRONOUS_LEVELS:
+        raise ValueError(f"SQLITE_SYNCHRONOUS must be one of: {', '.join(SQLITE_SYNCHRONOUS_LEVELS)}")
+    cache_size = config.get('SQLITE_CACHE_SIZE_KB')
+    pragmas = [
+        ('journal_mode', journal_mode or None),
+        ('synchronous', synchronous or None),
+        # A negative cache_size is in KiB rather than pages
+        ('cache_size', -int(cache_size) if cache_size is not None else None),
+    ]
+    return [(name, value) for name, value in pragmas if value is not None]
+
+
+class SQLAlchemy(_SQLAlchemy):
+    """Flask-SQLAlchemy with the engine profile from config.Config
+
+    SQLite connections get the SQLITE_* PRAGMAs as they are opened (WAL lets
+    readers carry on while a write commits) and a busy timeout, so a writer
+    waits for the lock instead of failing with "database is locked". PostgreSQL
+    gets a pre-pinged pool sized by DB_POOL_* and a server-side statement
+    timeout. SQLALCHEMY_ENGINE_OPTIONS still takes precedence.
+    """
+
+    def apply_driver_hacks(self, app, sa_url, options):
+        sa_url, options = super().apply_driver_hacks(app, sa_url, options)
+        if sa_url.drivername.startswith('sqlite'):
+            options['sqlite_pragmas'] = _sqlite_pragmas(app.config)
+            busy_timeout = app.config.get('SQLITE_BUSY_TIMEOUT_MS')
+            if busy_timeout is not None:
+                # sqlite3's timeout is SQLite's busy timeout, in seconds
+                options['connect_args'] = {'timeout': int(busy_timeout) / 1000, **options.get('connect_args', {})}
+        elif sa_url.drivername.startswith('postgresql'):
+            options.setdefault('pool_size', app.config['DB_POOL_SIZE'])
+            options.setdefault('max_overflow', app.config['DB_MAX_OVERFLOW'])
+            options.setdefault('pool_timeout', app.config['DB_POOL_TIMEOUT'])
+            options.setdefault('pool_recycle', app.config['DB_POOL_RECYCLE'])
+            options.setdefault('pool_pre_ping', True)
+            timeout = app.config['DB_STATEMENT_TIMEOUT_MS']
+            if timeout:
+                options['connect_args'] = {'options': f'-c statement_timeout={int(timeout)}',
+                                           **options.get('connect_args', {})}
+        return sa_url, options
+
+    def create_engine(self, sa_url, engine_opts):
+        pragmas = engine_opts.pop('sqlite_pragmas', None)
+        engine = super().create_engine(sa_url, engine_opts)
+        if pragmas:
+            @event.listens_for(engine, 'connect')
+            def _apply_pragmas(dbapi_connection, connection_record):
+                cursor = dbapi_connection.cursor()
+                try:
+                    for name, value in pragmas:
+                        cursor.execute(f'PRAGMA {name}={value}')
+                finally:
+                    cursor.close()
+        return engine
+
 
 db = SQLAlchemy()
 login_manager = LoginManager()
 login_manager.login_view = 'auth.login'
 migrate = Migrate()
+jwt_manager = JWTManager()
 cors = CORS()
 mail = Mail()
 
-# Redis client
-try:
-    redis_client = redis.Redis(host='localhost', port=6379, db=0, decode_responses=True)
-    
-    redis_client.ping()
-except Exception as e:
-    print(f"Warning: Redis connection failed: {e}")
-    redis_client = None
+class RedisUnavailable(redis.ConnectionError):
+    """Raised instead of calling Redis while the circuit breaker is open"""
+
+
+class _BreakerPipeline:
+    """A redis-py pipeline whose execute() goes through the circuit breaker"""
+
+    def __init__(self, breaker, pipe):
+        self._breaker = breaker
+        self._pipe = pipe
+
+    def __getattr__(self, name):
+        return getattr(self._pipe, name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self._pipe.reset()
+
+    def execute(self, *args, **kwargs):
+        return self._breaker.call(self._pipe.execute, *args, **kwargs)
+
+
+class LazyRedis:
+    """Stand-in for redis.Redis that connects on first use and backs off a failing server
+
+    Commands are forwarded to a client on a BlockingConnectionPool built from
+    the REDIS_* settings (init_app, or config.Config until then), with short
+    socket timeouts so a hung server costs a request at most that long.
+
+    Truthiness means "Redis is usable", so `if redis_client:` guards keep
+    working. After REDIS_BREAKER_THRESHOLD consecutive connection errors or
+    timeouts the breaker opens: for REDIS_BREAKER_COOLDOWN seconds the client
+    is falsy and commands raise RedisUnavailable (a redis.ConnectionError)
+    without touching the network. Then a single caller gets to try again; a
+    success closes the breaker. The state starts out like that, so the first
+    use pings.
+    """
+
+    FAILURES = (redis.ConnectionError, redis.TimeoutError)
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._settings = None
+        self._client = None
+        self._configure(vars(Config))
+
+    def _configure(self, config):
+        settings = {key: config[key] for key in (
+            'REDIS_URL', 'REDIS_MAX_CONNECTIONS', 'REDIS_POOL_TIMEOUT', 'REDIS_SOCKET_TIMEOUT',
+            'REDIS_CONNECT_TIMEOUT', 'REDIS_HEALTH_CHECK_INTERVAL', 'REDIS_BREAKER_THRESHOLD',
+            'REDIS_BREAKER_COOLDOWN'
+        )}
+        with self._lock:
+            if settings == self._settings:
+                return
+            if self._client is not None:
+                self._client.connection_pool.disconnect()
+            self._settings = settings
+            self._client = None
+            self._failures = settings['REDIS_BREAKER_THRESHOLD']
+            self._retry_at = 0.0
+            self._reported = False
+
+    def init_app(self, app):
+        self._configure(app.config)
+
+    @property
+    def client(self):
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    settings = self._settings
+                    pool = redis.BlockingConnectionPool.from_url(
+                        settings['REDIS_URL'],
+                        max_connections=settings['REDIS_MAX_CONNECTIONS'],
+                        timeout=settings['REDIS_POOL_TIMEOUT'],
+                        socket_timeout=settings['REDIS_SOCKET_TIMEOUT'],
+                        socket_connect_timeout=settings['REDIS_CONNECT_TIMEOUT'],
+                        health_check_interval=settings['REDIS_HEALTH_CHECK_INTERVAL'],
+                        decode_responses=True
+                    )
+                    self._client = redis.Redis(connection_pool=pool)
+        return self._client
+
+    @property
+    def state(self):
+        if self._failures < self._settings['REDIS_BREAKER_THRESHOLD']:
+            return 'closed'
+        return 'open' if time.monotonic() < self._retry_at else 'half-open'
+
+    def _allow(self):
+        """Whether a command may go to Redis now; claims the single retry once the cool-down is over"""
+        if self._failures < self._settings['REDIS_BREAKER_THRESHOLD']:
+            return True
+        with self._lock:
+            if self._failures < self._settings['REDIS_BREAKER_THRESHOLD']:
+                return True
+            now = time.monotonic()
+            if now < self._retry_at:
+                return False
+            self._retry_at = now + self._settings['REDIS_BREAKER_COOLDOWN']
+            return True
+
+    def _succeeded(self):
+        if self._failures:
+            with self._lock:
+                self._failures = 0
+                self._reported = False
+
+    def _failed(self, error):
+        with self._lock:
+            self._failures += 1
+            if self._failures >= self._settings['REDIS_BREAKER_THRESHOLD']:
+                cooldown = self._settings['REDIS_BREAKER_COOLDOWN']
+                self._retry_at = time.monotonic() + cooldown
+                if not self._reported:
+                    print(f"Warning: Redis unavailable, skipping it for {cooldown}s at a time: {error}")
+                    self._reported = True
+
+    def call(self, fn, *args, **kwargs):
+        if not self._allow():
+            raise RedisUnavailable('Redis circuit breaker is open')
+        try:
+            result = fn(*args, **kwargs)
+        except self.FAILURES as e:
+            self._failed(e)
+            raise
+        self._succeeded()
+        return result
+
+    def __bool__(self):
+        if self._failures < self._settings['REDIS_BREAKER_THRESHOLD']:
+            return True
+        try:
+            self.call(self.client.ping)
+        except redis.RedisError:
+            return False
+        return True
+
+    def __getattr__(self, name):
+        attr = getattr(self.client, name)
+        if not callable(attr):
+            return attr
+        if name == 'pipeline':
+            return lambda *args, **kwargs: _BreakerPipeline(self, attr(*args, **kwargs))
+        if name == 'pubsub':
+            # Creating a PubSub does no I/O; its connection fails on its own
+            def pubsub(*args, **kwargs):
+                if not self._allow():
+                    raise RedisUnavailable('Redis circuit breaker is open')
+                return attr(*args, **kwargs)
+            return pubsub
+        return lambda *args, **kwargs: self.call(attr, *args, **kwargs)
+
+
+redis_client = LazyRedis()
 
 # Celery
 celery = Celery('parking_app') 
\ No newline at end of file
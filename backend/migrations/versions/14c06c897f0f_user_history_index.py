@@ -0,0 +1,24 @@
+"""index reservation history by user and created_at
+
+Revision ID: 14c06c897f0f
+Revises: e883b1c692af
+Create Date: 2026-10-18 11:05:31.662150
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '14c06c897f0f'
+down_revision = 'e883b1c692af'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_reservation_user_created', 'reservation', ['user_id', 'created_at'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_reservation_user_created', table_name='reservation')
@@ -0,0 +1,39 @@
+"""daily lot stats rollup table and reservation.updated_at index
+
+Revision ID: 22a28e3ce87d
+Revises: 14c06c897f0f
+Create Date: 2026-10-18 18:47:47.073711
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '22a28e3ce87d'
+down_revision = '14c06c897f0f'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('daily_lot_stats',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('lot_id', sa.Integer(), nullable=False),
+    sa.Column('reservations', sa.Integer(), nullable=False),
+    sa.Column('revenue', sa.Float(), nullable=False),
+    sa.Column('occupied_hours', sa.Float(), nullable=False),
+    sa.Column('unique_users', sa.Integer(), nullable=False),
+    sa.Column('computed_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['lot_id'], ['parking_lot.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('day', 'lot_id', name='uq_daily_lot_stats_day_lot')
+    )
+    op.create_index('ix_reservation_updated_at', 'reservation', ['updated_at'], unique=False)
+    # Rows are filled by tasks.refresh_daily_stats; until then readers fall back to raw queries
+
+
+def downgrade():
+    op.drop_index('ix_reservation_updated_at', table_name='reservation')
+    op.drop_table('daily_lot_stats')
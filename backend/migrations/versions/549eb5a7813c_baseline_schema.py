@@ -0,0 +1,100 @@
+"""baseline schema
+
+Revision ID: 549eb5a7813c
+Revises: 
+Create Date: 2026-10-18 09:12:41.204113
+
+Tables as created by db.create_all() before migrations were wired up.
+Databases that already have them (e.g. an existing app.db) are left as they
+are, so `flask db upgrade` works on both fresh and pre-migration databases.
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '549eb5a7813c'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    existing = set(sa.inspect(op.get_bind()).get_table_names())
+
+    if 'user' not in existing:
+        op.create_table(
+            'user',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('username', sa.String(length=150), nullable=False),
+            sa.Column('email', sa.String(length=150), nullable=False),
+            sa.Column('password', sa.String(length=150), nullable=False),
+            sa.Column('is_admin', sa.Boolean(), nullable=True),
+            sa.Column('first_name', sa.String(length=100), nullable=True),
+            sa.Column('last_name', sa.String(length=100), nullable=True),
+            sa.Column('phone', sa.String(length=20), nullable=True),
+            sa.Column('address', sa.String(length=255), nullable=True),
+            sa.Column('pin_code', sa.String(length=10), nullable=True),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+            sa.Column('last_login', sa.DateTime(), nullable=True),
+            sa.Column('is_active', sa.Boolean(), nullable=True),
+            sa.PrimaryKeyConstraint('id'),
+            sa.UniqueConstraint('email'),
+            sa.UniqueConstraint('username')
+        )
+
+    if 'parking_lot' not in existing:
+        op.create_table(
+            'parking_lot',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('name', sa.String(length=255), nullable=False),
+            sa.Column('price', sa.Float(), nullable=False),
+            sa.Column('address', sa.String(length=500), nullable=False),
+            sa.Column('pin_code', sa.String(length=10), nullable=False),
+            sa.Column('number_of_spots', sa.Integer(), nullable=False),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+            sa.Column('updated_at', sa.DateTime(), nullable=True),
+            sa.PrimaryKeyConstraint('id')
+        )
+
+    if 'parking_spot' not in existing:
+        op.create_table(
+            'parking_spot',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('lot_id', sa.Integer(), nullable=False),
+            sa.Column('status', sa.String(length=1), nullable=True),
+            sa.Column('spot_number', sa.String(length=10), nullable=False),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+            sa.Column('updated_at', sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(['lot_id'], ['parking_lot.id'], ),
+            sa.PrimaryKeyConstraint('id')
+        )
+
+    if 'reservation' not in existing:
+        op.create_table(
+            'reservation',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('spot_id', sa.Integer(), nullable=False),
+            sa.Column('user_id', sa.Integer(), nullable=False),
+            sa.Column('parking_timestamp', sa.DateTime(), nullable=True),
+            sa.Column('leaving_timestamp', sa.DateTime(), nullable=True),
+            sa.Column('parking_cost', sa.Float(), nullable=True),
+            sa.Column('status', sa.String(length=20), nullable=True),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+            sa.Column('updated_at', sa.DateTime(), nullable=True),
+            sa.Column('vehicle_number', sa.String(length=20), nullable=True),
+            sa.Column('parked_in_time', sa.DateTime(), nullable=True),
+            sa.Column('released_time', sa.DateTime(), nullable=True),
+            sa.Column('total_cost', sa.Float(), nullable=True),
+            sa.ForeignKeyConstraint(['spot_id'], ['parking_spot.id'], ),
+            sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+            sa.PrimaryKeyConstraint('id')
+        )
+
+
+def downgrade():
+    op.drop_table('reservation')
+    op.drop_table('parking_spot')
+    op.drop_table('parking_lot')
+    op.drop_table('user')
@@ -0,0 +1,37 @@
+"""spot event log
+
+Revision ID: b78d5704878b
+Revises: 22a28e3ce87d
+Create Date: 2026-10-18 19:00:48.245995
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b78d5704878b'
+down_revision = '22a28e3ce87d'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('spot_event',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('spot_id', sa.Integer(), nullable=False),
+    sa.Column('lot_id', sa.Integer(), nullable=False),
+    sa.Column('old_status', sa.String(length=1), nullable=True),
+    sa.Column('new_status', sa.String(length=1), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_spot_event_created_at', 'spot_event', ['created_at'], unique=False)
+    op.create_index('ix_spot_event_lot_created', 'spot_event', ['lot_id', 'created_at', 'old_status', 'new_status'], unique=False)
+    # History starts empty; services.occupancy anchors on the current lot counters
+
+
+def downgrade():
+    op.drop_index('ix_spot_event_lot_created', table_name='spot_event')
+    op.drop_index('ix_spot_event_created_at', table_name='spot_event')
+    op.drop_table('spot_event')
@@ -0,0 +1,71 @@
+"""one active reservation per spot and per user
+
+Revision ID: e883b1c692af
+Revises: ee4bc8d4af35
+Create Date: 2026-10-18 10:02:55.143871
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e883b1c692af'
+down_revision = 'ee4bc8d4af35'
+branch_labels = None
+depends_on = None
+
+ACTIVE = sa.text("status = 'active'")
+CHUNK = 500  # ids per IN (...), well below SQLite's bound-parameter limit
+
+
+def _chunks(ids):
+    ids = sorted(ids)
+    for i in range(0, len(ids), CHUNK):
+        yield ids[i:i + CHUNK]
+
+
+def upgrade():
+    bind = op.get_bind()
+
+    # Double bookings left behind by the old read-then-write reserve path would
+    # block the unique indexes; keep the newest active reservation of each group.
+    cancelled_spots = set()
+    for column in ('spot_id', 'user_id'):
+        duplicates = bind.execute(sa.text(
+            f"SELECT id, spot_id FROM reservation "
+            f"WHERE status = 'active' AND id NOT IN ("
+            f"SELECT MAX(id) FROM reservation WHERE status = 'active' GROUP BY {column})"
+        )).fetchall()
+        for chunk in _chunks(reservation_id for reservation_id, _ in duplicates):
+            bind.execute(sa.text("UPDATE reservation SET status = 'cancelled' WHERE id IN :ids").bindparams(
+                sa.bindparam('ids', expanding=True)), {'ids': chunk})
+        cancelled_spots.update(spot_id for _, spot_id in duplicates if spot_id is not None)
+
+    # A cancelled duplicate on another spot held that spot occupied; free it unless
+    # an active reservation remains on it, then bring the lot counters back in line
+    for chunk in _chunks(cancelled_spots):
+        bind.execute(sa.text(
+            "UPDATE parking_spot SET status = 'A' "
+            "WHERE id IN :ids AND status = 'O' AND NOT EXISTS ("
+            "SELECT 1 FROM reservation WHERE reservation.spot_id = parking_spot.id "
+            "AND reservation.status = 'active')"
+        ).bindparams(sa.bindparam('ids', expanding=True)), {'ids': chunk})
+    if cancelled_spots:
+        op.execute(
+            "UPDATE parking_lot SET "
+            "available_spots = (SELECT COUNT(*) FROM parking_spot "
+            "WHERE parking_spot.lot_id = parking_lot.id AND parking_spot.status = 'A'), "
+            "occupied_spots = (SELECT COUNT(*) FROM parking_spot "
+            "WHERE parking_spot.lot_id = parking_lot.id AND parking_spot.status = 'O')"
+        )
+
+    op.create_index('uq_reservation_active_spot', 'reservation', ['spot_id'], unique=True,
+                    sqlite_where=ACTIVE, postgresql_where=ACTIVE)
+    op.create_index('uq_reservation_active_user', 'reservation', ['user_id'], unique=True,
+                    sqlite_where=ACTIVE, postgresql_where=ACTIVE)
+
+
+def downgrade():
+    op.drop_index('uq_reservation_active_user', table_name='reservation')
+    op.drop_index('uq_reservation_active_spot', table_name='reservation')
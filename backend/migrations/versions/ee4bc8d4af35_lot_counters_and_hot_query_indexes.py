@@ -0,0 +1,47 @@
+"""lot availability counters and hot query indexes
+
+Revision ID: ee4bc8d4af35
+Revises: 549eb5a7813c
+Create Date: 2026-10-18 09:20:07.518342
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'ee4bc8d4af35'
+down_revision = '549eb5a7813c'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('parking_lot', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('available_spots', sa.Integer(), nullable=False, server_default='0'))
+        batch_op.add_column(sa.Column('occupied_spots', sa.Integer(), nullable=False, server_default='0'))
+
+    # Backfill the counters from the spots that already exist
+    op.execute(
+        "UPDATE parking_lot SET "
+        "available_spots = (SELECT COUNT(*) FROM parking_spot "
+        "WHERE parking_spot.lot_id = parking_lot.id AND parking_spot.status = 'A'), "
+        "occupied_spots = (SELECT COUNT(*) FROM parking_spot "
+        "WHERE parking_spot.lot_id = parking_lot.id AND parking_spot.status = 'O')"
+    )
+
+    op.create_index('ix_parking_spot_lot_status', 'parking_spot', ['lot_id', 'status'], unique=False)
+    op.create_index('ix_reservation_user_status', 'reservation', ['user_id', 'status'], unique=False)
+    op.create_index('ix_reservation_spot_status', 'reservation', ['spot_id', 'status'], unique=False)
+    op.create_index('ix_reservation_created_at', 'reservation', ['created_at'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_reservation_created_at', table_name='reservation')
+    op.drop_index('ix_reservation_spot_status', table_name='reservation')
+    op.drop_index('ix_reservation_user_status', table_name='reservation')
+    op.drop_index('ix_parking_spot_lot_status', table_name='parking_spot')
+
+    with op.batch_alter_table('parking_lot', schema=None) as batch_op:
+        batch_op.drop_column('occupied_spots')
+        batch_op.drop_column('available_spots')
@@ -2,5 +2,7 @@ from .user import User
 from .parking_lot import ParkingLot
 from .parking_spot import ParkingSpot
 from .reservation import Reservation
+from .daily_lot_stats import DailyLotStats
+from .spot_event import SpotEvent
 
-__all__ = ['User', 'ParkingLot', 'ParkingSpot', 'Reservation']
+__all__ = ['User', 'ParkingLot', 'ParkingSpot', 'Reservation', 'DailyLotStats', 'SpotEvent']
@@ -0,0 +1,34 @@
+from extensions import db
+from datetime import datetime
+
+class DailyLotStats(db.Model):
+    """Per-lot reservation totals for one UTC day (by reservation created_at).
+
+    Maintained by tasks.refresh_daily_stats; read through services.stats.
+    """
+    __tablename__ = 'daily_lot_stats'
+    __table_args__ = (
+        db.UniqueConstraint('day', 'lot_id', name='uq_daily_lot_stats_day_lot'),
+    )
+    id = db.Column(db.Integer, primary_key=True)
+    day = db.Column(db.Date, nullable=False)
+    lot_id = db.Column(db.Integer, db.ForeignKey('parking_lot.id'), nullable=False)
+    reservations = db.Column(db.Integer, nullable=False, default=0)
+    revenue = db.Column(db.Float, nullable=False, default=0.0)
+    occupied_hours = db.Column(db.Float, nullable=False, default=0.0)
+    unique_users = db.Column(db.Integer, nullable=False, default=0)
+    computed_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<DailyLotStats {self.day} lot={self.lot_id}>'
+    
+    def to_dict(self):
+        return {
+            'day': self.day.isoformat(),
+            'lot_id': self.lot_id,
+            'reservations': self.reservations,
+            'revenue': self.revenue,
+            'occupied_hours': self.occupied_hours,
+            'unique_users': self.unique_users,
+            'computed_at': self.computed_at.isoformat() if self.computed_at else None
+        }
@@ -1,6 +1,10 @@
 from extensions import db
 from datetime import datetime
 
+# Spot status -> ParkingLot counter column
+SPOT_COUNTER_COLUMNS = {'A': 'available_spots', 'O': 'occupied_spots'}
+
+
 class ParkingLot(db.Model):
     __tablename__ = 'parking_lot'
     id = db.Column(db.Integer, primary_key=True)
@@ -9,15 +13,67 @@ class ParkingLot(db.Model):
     address = db.Column(db.String(500), nullable=False)
     pin_code = db.Column(db.String(10), nullable=False)
     number_of_spots = db.Column(db.Integer, nullable=False, default=0)
+    # Stored counters, kept in step with ParkingSpot.status by shift_spot_counts
+    available_spots = db.Column(db.Integer, nullable=False, default=0)
+    occupied_spots = db.Column(db.Integer, nullable=False, default=0)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     # Parking spots
     parking_spots = db.relationship('ParkingSpot', backref='parking_lot', lazy=True, cascade='all, delete-orphan')
+    # Daily rollups go with the lot, like its reservations do
+    daily_stats = db.relationship('DailyLotStats', backref='parking_lot', lazy=True, cascade='all, delete-orphan')
     
     def __repr__(self):
         return f'<ParkingLot {self.name}>'
     
+    @staticmethod
+    def shift_spot_counts(lot_id, old_status=None, new_status=None, count=1):
+        """Move `count` spots between the stored counters of a lot.
+
+        `old_status` is None for newly added spots and `new_status` is None for
+        removed ones. Runs as a single UPDATE in the caller's transaction.
+        """
+        if old_status == new_status or not count:
+            return
+        values = {'updated_at': ParkingLot.updated_at}
+        for status, delta in ((old_status, -count), (new_status, count)):
+            column = SPOT_COUNTER_COLUMNS.get(status)
+            if column is not None:
+                values[column] = getattr(ParkingLot, column) + delta
+        if len(values) > 1:
+            ParkingLot.query.filter_by(id=lot_id).update(values, synchronize_session=False)
+
+    @staticmethod
+    def recount_spots(lot_id=None):
+        """Rebuild the stored counters from parking_spot with one grouped query"""
+        from .parking_spot import ParkingSpot
+
+        query = db.session.query(
+            ParkingSpot.lot_id, ParkingSpot.status, db.func.count(ParkingSpot.id)
+        ).group_by(ParkingSpot.lot_id, ParkingSpot.status)
+        lots = ParkingLot.query
+        if lot_id is not None:
+            query = query.filter(ParkingSpot.lot_id == lot_id)
+            lots = lots.filter_by(id=lot_id)
+
+        counts = {}
+        for spot_lot_id, status, total in query:
+            counts[(spot_lot_id, status)] = total
+        for lot in lots:
+            lot.available_spots = counts.get((lot.id, 'A'), 0)
+            lot.occupied_spots = counts.get((lot.id, 'O'), 0)
+
+    def to_summary(self):
+        """Slim lot payload for embedding in reservation/booking rows"""
+        return {
+            'id': self.id,
+            'name': self.name,
+            'price': self.price,
+            'address': self.address,
+            'pin_code': self.pin_code
+        }
+    
     def to_dict(self):
         return {
             'id': self.id,
@@ -26,8 +82,8 @@ class ParkingLot(db.Model):
             'address': self.address,
             'pin_code': self.pin_code,
             'number_of_spots': self.number_of_spots,
-            'available_spots': len([spot for spot in self.parking_spots if spot.status == 'A']),
-            'occupied_spots': len([spot for spot in self.parking_spots if spot.status == 'O']),
+            'available_spots': self.available_spots or 0,
+            'occupied_spots': self.occupied_spots or 0,
             'created_at': self.created_at.isoformat() if self.created_at else None,
             'updated_at': self.updated_at.isoformat() if self.updated_at else None
         } 
\ No newline at end of file
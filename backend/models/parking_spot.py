@@ -3,6 +3,9 @@ from datetime import datetime
 
 class ParkingSpot(db.Model):
     __tablename__ = 'parking_spot'
+    __table_args__ = (
+        db.Index('ix_parking_spot_lot_status', 'lot_id', 'status'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     lot_id = db.Column(db.Integer, db.ForeignKey('parking_lot.id'), nullable=False)
     status = db.Column(db.String(1), default='A')  # A-available, O-Occupied
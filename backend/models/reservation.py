@@ -3,6 +3,20 @@ from datetime import datetime
 
 class Reservation(db.Model):
     __tablename__ = 'reservation'
+    __table_args__ = (
+        db.Index('ix_reservation_user_status', 'user_id', 'status'),
+        db.Index('ix_reservation_spot_status', 'spot_id', 'status'),
+        db.Index('ix_reservation_created_at', 'created_at'),
+        # Per-user history, including keyset pages on (created_at, id)
+        db.Index('ix_reservation_user_created', 'user_id', 'created_at'),
+        # Finds days touched since the last daily_lot_stats refresh
+        db.Index('ix_reservation_updated_at', 'updated_at'),
+        # At most one active reservation per spot and per user
+        db.Index('uq_reservation_active_spot', 'spot_id', unique=True,
+                 sqlite_where=db.text("status = 'active'"), postgresql_where=db.text("status = 'active'")),
+        db.Index('uq_reservation_active_user', 'user_id', unique=True,
+                 sqlite_where=db.text("status = 'active'"), postgresql_where=db.text("status = 'active'")),
+    )
     id = db.Column(db.Integer, primary_key=True)
     spot_id = db.Column(db.Integer, db.ForeignKey('parking_spot.id'), nullable=False)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
@@ -0,0 +1,36 @@
+from extensions import db
+from datetime import datetime
+
+class SpotEvent(db.Model):
+    """One ParkingSpot status transition (append-only).
+
+    Written by services.availability for every spot_status_changed() call,
+    in the same transaction as the change; read by services.occupancy.
+    spot_id and lot_id are plain columns so history outlives deleted spots.
+    old_status is None for a new spot and new_status is None for a removed one.
+    """
+    __tablename__ = 'spot_event'
+    __table_args__ = (
+        # Covers the occupancy scans, which read nothing else
+        db.Index('ix_spot_event_lot_created', 'lot_id', 'created_at', 'old_status', 'new_status'),
+        db.Index('ix_spot_event_created_at', 'created_at'),
+    )
+    id = db.Column(db.Integer, primary_key=True)
+    spot_id = db.Column(db.Integer, nullable=False)
+    lot_id = db.Column(db.Integer, nullable=False)
+    old_status = db.Column(db.String(1))
+    new_status = db.Column(db.String(1))
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<SpotEvent spot={self.spot_id} {self.old_status}->{self.new_status}>'
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'spot_id': self.spot_id,
+            'lot_id': self.lot_id,
+            'old_status': self.old_status,
+            'new_status': self.new_status,
+            'created_at': self.created_at.isoformat() if self.created_at else None
+        }
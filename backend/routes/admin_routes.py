@@ -1,17 +1,29 @@
-from flask import Blueprint, request, jsonify, g
+from flask import Blueprint, Response, request, jsonify, g, stream_with_context
 from flask_login import login_required, current_user
-from extensions import db, redis_client
+from extensions import db
 from models import User, ParkingLot, ParkingSpot, Reservation
+from services import auth_tokens, batch, cache, provisioning, spot_index
+from services import stats as stats_service
+from services.availability import spot_status_changed, spots_status_changed
+from services.pagination import InvalidCursor, keyset_page
+from collections import defaultdict
 from datetime import datetime, timedelta
 from functools import wraps
 import json
 
 admin_bp = Blueprint('admin', __name__, url_prefix='/admin')
 
+BOOKINGS_PER_PAGE = 25
+BOOKINGS_MAX_PER_PAGE = 100
+
+# What each cached statistics entry is derived from (see services.cache)
+ADMIN_STATS_TAGS = ('users', 'lots', 'spots', 'reservations')
+ADMIN_ANALYTICS_TAGS = ('users', 'lots', 'reservations')
+
 def admin_required(f):
     @wraps(f)
     def decorated_function(*args, **kwargs):
-        if not current_user.is_authenticated or not current_user.is_admin:
+        if not current_user.is_authenticated or not current_user.is_active or not current_user.is_admin:
             return jsonify({'success': False, 'message': 'Access denied. Admin privileges required.'}), 403
         g.current_user = current_user
         return f(*args, **kwargs)
@@ -19,50 +31,64 @@ def admin_required(f):
 
 # All protected routes now use @login_required and @admin_required
 
+def compute_admin_stats():
+    """Headline counters shared by /admin/dashboard and /admin/api/stats"""
+    total_users = User.query.filter_by(is_admin=False).count()
+    total_lots = ParkingLot.query.count()
+    total_spots = ParkingSpot.query.count()
+    available_spots = db.session.query(db.func.sum(ParkingLot.available_spots)).scalar() or 0
+    active_reservations = Reservation.query.filter_by(status='active').count()
+    
+    
+    now = datetime.utcnow()
+    today_start = stats_service.day_start(now)
+    today_revenue = stats_service.revenue_between(today_start, today_start + timedelta(days=1))
+    
+    # Rolled-up days of the month plus the raw rows since the last rollup refresh
+    month_start = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    month_revenue = stats_service.period_totals(month_start, now)['revenue']
+    
+    return {
+        'total_users': total_users,
+        'total_lots': total_lots,
+        'total_spots': total_spots,
+        'available_spots': available_spots,
+        'active_reservations': active_reservations,
+        'today_revenue': float(today_revenue),
+        'month_revenue': float(month_revenue)
+    }
+
+def compute_admin_analytics():
+    now = datetime.utcnow()
+    month_start = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    
+    
+    lot_totals = stats_service.lot_totals(month_start, now)
+    monthly_reservations = sum(t['reservations'] for t in lot_totals.values())
+    
+    # Keyed by lot id (names are not unique); lots without bookings are omitted
+    lot_revenue = {lot_id: totals['revenue'] for lot_id, totals in lot_totals.items()}
+    
+   
+    active_users = User.query.filter(
+        User.last_login >= month_start,
+        User.is_admin == False
+    ).count()
+    
+    return {
+        'monthly_reservations': monthly_reservations,
+        'lot_revenue': lot_revenue,
+        'active_users': active_users,
+        'generated_at': now.isoformat()
+    }
+
 @admin_bp.route('/dashboard')
 @login_required
 @admin_required
 def dashboard():
     """Admin dashboard data"""
-   
-    stats_cache_key = "admin_stats"
-    cached_stats = redis_client.get(stats_cache_key) if redis_client else None
-    
-    if cached_stats:
-        stats = json.loads(cached_stats)
-    else:
-        
-        total_users = User.query.filter_by(is_admin=False).count()
-        total_lots = ParkingLot.query.count()
-        total_spots = ParkingSpot.query.count()
-        available_spots = ParkingSpot.query.filter_by(status='A').count()
-        active_reservations = Reservation.query.filter_by(status='active').count()
-        
-        
-        today = datetime.utcnow().date()
-        today_revenue = db.session.query(db.func.sum(Reservation.parking_cost)).filter(
-            db.func.date(Reservation.created_at) == today
-        ).scalar() or 0
-        
-        month_start = datetime.utcnow().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-        month_revenue = db.session.query(db.func.sum(Reservation.parking_cost)).filter(
-            Reservation.created_at >= month_start
-        ).scalar() or 0
-        
-        stats = {
-            'total_users': total_users,
-            'total_lots': total_lots,
-            'total_spots': total_spots,
-            'available_spots': available_spots,
-            'active_reservations': active_reservations,
-            'today_revenue': float(today_revenue),
-            'month_revenue': float(month_revenue)
-        }
-        
-        # Cache for 5 minutes
-        if redis_client:
-            redis_client.setex(stats_cache_key, 300, json.dumps(stats))
-    
+    # Cache for 5 minutes, or until any of these change
+    stats = cache.get_or_compute('admin_stats', ADMIN_STATS_TAGS, 300, compute_admin_stats)
     return jsonify(stats)
 
 @admin_bp.route('/parking-lots')
@@ -89,7 +115,7 @@ def parking_lots():
         
         lot_ids = db.session.query(ParkingSpot.lot_id).filter(ParkingSpot.spot_number.ilike(f"%{spot}%")).distinct()
         query = query.filter(ParkingLot.id.in_(lot_ids))
-    lots = query.all()
+    lots = query.options(db.selectinload(ParkingLot.parking_spots)).all()
     
     def lot_with_spots(lot):
         d = lot.to_dict()
@@ -104,7 +130,12 @@ def parking_lots():
 @login_required
 @admin_required
 def create_parking_lot():
-    """Create NEW parking lot"""
+    """Create NEW parking lot
+
+    Spots are numbered "<name>-001".. unless `spot_template` is given, e.g.
+    {"template": "L{level}-{row}{n:02d}", "ranges": {"level": "1-3", "row": "A-F", "n": 40}};
+    the template then decides the number of spots.
+    """
     try:
         data = request.get_json()
         lot = ParkingLot(
@@ -112,27 +143,27 @@ def create_parking_lot():
             price=float(data['price']),
             address=data['address'],
             pin_code=data['pin_code'],
-            number_of_spots=int(data['number_of_spots'])
+            number_of_spots=0
         )
         db.session.add(lot)
-        db.session.commit()
-        
+        db.session.flush()
         
-        for i in range(lot.number_of_spots):
-            spot = ParkingSpot(
-                lot_id=lot.id,
-                spot_number=f"{lot.name}-{i+1:03d}",
-                status='A'
-            )
-            db.session.add(spot)
+        template = data.get('spot_template')
+        if template:
+            provisioning.add_template_spots(lot, template.get('template'), template.get('ranges'))
+        else:
+            provisioning.resize_lot(lot, int(data['number_of_spots']))
         
         db.session.commit()
+        spot_index.refresh_lot(lot.id)
         
-        # Clear cache
-        if redis_client:
-            redis_client.delete("admin_stats")
+        # Invalidate cached statistics
+        cache.bump('lots', 'spots')
         
         return jsonify({'success': True, 'message': 'Parking lot created successfully'})
+    except ValueError as e:
+        db.session.rollback()
+        return jsonify({'success': False, 'message': str(e)}), 400
     except Exception as e:
         db.session.rollback()
         return jsonify({'success': False, 'message': str(e)})
@@ -151,34 +182,46 @@ def edit_parking_lot(lot_id):
         lot.address = data['address']
         lot.pin_code = data['pin_code']
         
-        # spot number changes
-        new_spot_count = int(data['number_of_spots'])
-        current_spot_count = len(lot.parking_spots)
+        # spot number changes; occupied spots are never removed
+        removed = provisioning.resize_lot(lot, int(data['number_of_spots'])) < 0
+        db.session.commit()
+        spot_index.refresh_lot(lot.id)
         
-        if new_spot_count > current_spot_count:
-            
-            for i in range(current_spot_count, new_spot_count):
-                spot = ParkingSpot(
-                    lot_id=lot.id,
-                    spot_number=f"{lot.name}-{i+1:03d}",
-                    status='A'
-                )
-                db.session.add(spot)
-        elif new_spot_count < current_spot_count:
-            
-            spots_to_remove = lot.parking_spots[new_spot_count:]
-            for spot in spots_to_remove:
-                if spot.status == 'A': 
-                    db.session.delete(spot)
+        # Invalidate cached statistics
+        cache.bump(*(('lots', 'spots', 'reservations') if removed else ('lots', 'spots')))
         
-        lot.number_of_spots = new_spot_count
+        return jsonify({'success': True, 'message': 'Parking lot updated successfully'})
+    except ValueError as e:
+        db.session.rollback()
+        return jsonify({'success': False, 'message': str(e)}), 400
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'success': False, 'message': str(e)})
+
+@admin_bp.route('/parking-lots/<int:lot_id>/spots/bulk', methods=['POST'])
+@login_required
+@admin_required
+def bulk_add_spots(lot_id):
+    """Add a templated block of spots (e.g. a new level) to a lot
+
+    Body: {"template": "L4-{row}{n:02d}", "ranges": {"row": "A-F", "n": 40}}.
+    Spot numbers the lot already has are skipped.
+    """
+    lot = ParkingLot.query.get_or_404(lot_id)
+    try:
+        data = request.get_json() or {}
+        added = provisioning.add_template_spots(lot, data.get('template'), data.get('ranges'))
         db.session.commit()
+        spot_index.refresh_lot(lot.id)
         
-        # Clear cache
-        if redis_client:
-            redis_client.delete("admin_stats")
+        # Invalidate cached statistics
+        cache.bump('lots', 'spots')
         
-        return jsonify({'success': True, 'message': 'Parking lot updated successfully'})
+        return jsonify({'success': True, 'added': added, 'number_of_spots': lot.number_of_spots,
+                        'message': f'Added {added} parking spots'})
+    except ValueError as e:
+        db.session.rollback()
+        return jsonify({'success': False, 'message': str(e)}), 400
     except Exception as e:
         db.session.rollback()
         return jsonify({'success': False, 'message': str(e)})
@@ -196,12 +239,19 @@ def delete_parking_lot(lot_id):
         if occupied_spots > 0:
             return jsonify({'success': False, 'message': f'Cannot delete lot with {occupied_spots} occupied spots'})
         
+        # The cascade removes the spots; close their history in spot_event first
+        spots_by_status = defaultdict(list)
+        for spot_id, status in db.session.query(ParkingSpot.id, ParkingSpot.status).filter_by(lot_id=lot_id):
+            spots_by_status[status].append(spot_id)
+        for status, spot_ids in spots_by_status.items():
+            spots_status_changed(lot_id, spot_ids, status, None)
+        
         db.session.delete(lot)
         db.session.commit()
+        spot_index.refresh_lot(lot_id)
         
-        # Clear cache
-        if redis_client:
-            redis_client.delete("admin_stats")
+        # Invalidate cached statistics
+        cache.bump('lots', 'spots', 'reservations')
         
         return jsonify({'success': True, 'message': 'Parking lot deleted successfully'})
     except Exception as e:
@@ -225,7 +275,13 @@ def toggle_user_status(user_id):
     
     try:
         user.is_active = not user.is_active
+        # Revoke before committing: a deactivation whose tokens stay valid must not stand
+        if not user.is_active and not auth_tokens.revoke_user(user.id):
+            db.session.rollback()
+            return jsonify({'success': False,
+                            'message': 'Could not revoke the user\'s access tokens. Please try again.'}), 503
         db.session.commit()
+        cache.bump('users')
         
         status = "activated" if user.is_active else "deactivated"
         return jsonify({'success': True, 'message': f'User {status} successfully'})
@@ -238,52 +294,67 @@ def toggle_user_status(user_id):
 @admin_required
 def analytics():
     """Get analytics data"""
+    # Cache for 10 minutes, or until any of these change
+    analytics_data = cache.get_or_compute('admin_analytics', ADMIN_ANALYTICS_TAGS, 600, compute_admin_analytics)
+    return jsonify(analytics_data)
 
-    cache_key = "admin_analytics"
-    cached_data = redis_client.get(cache_key) if redis_client else None
+def _analytics_range(default_days):
+    """(start, end) from the start/end query args, defaulting to the last `default_days` days"""
+    end = datetime.fromisoformat(request.args['end']) if request.args.get('end') else datetime.utcnow()
+    start = datetime.fromisoformat(request.args['start']) if request.args.get('start') else end - timedelta(days=default_days)
+    return start, end
+
+@admin_bp.route('/analytics/timeseries')
+@login_required
+@admin_required
+def analytics_timeseries():
+    """Reservations and revenue bucketed by hour, day or week.
+
+    Query args: start, end (ISO datetimes, UTC; default the last 30 days),
+    bucket (hour/day/week, default day) and optional lot_id.
+    """
+    try:
+        start, end = _analytics_range(30)
+        bucket = request.args.get('bucket', 'day')
+        series = stats_service.timeseries(start, end, bucket, lot_id=request.args.get('lot_id', type=int))
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    return jsonify({'bucket': bucket, 'series': series})
+
+@admin_bp.route('/analytics/occupancy')
+@login_required
+@admin_required
+def analytics_occupancy():
+    """Average occupied spots and occupancy rate per lot over time, from the spot event log.
+
+    Query args: start, end (default the last 7 days), bucket (hour/day/week,
+    default hour) and optional lot_id.
+    """
+    from services import occupancy
     
-    if cached_data:
-        analytics_data = json.loads(cached_data)
-    else:
-        
-        now = datetime.utcnow()
-        month_start = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-        
-        
-        monthly_reservations = Reservation.query.filter(
-            Reservation.created_at >= month_start
-        ).count()
-        
-       
-        lots = ParkingLot.query.all()
-        lot_revenue = {}
-        for lot in lots:
-            revenue = db.session.query(db.func.sum(Reservation.parking_cost)).join(
-                ParkingSpot, Reservation.spot_id == ParkingSpot.id
-            ).filter(
-                ParkingSpot.lot_id == lot.id,
-                Reservation.created_at >= month_start
-            ).scalar() or 0
-            lot_revenue[lot.name] = float(revenue)
-        
-       
-        active_users = User.query.filter(
-            User.last_login >= month_start,
-            User.is_admin == False
-        ).count()
-        
-        analytics_data = {
-            'monthly_reservations': monthly_reservations,
-            'lot_revenue': lot_revenue,
-            'active_users': active_users,
-            'generated_at': now.isoformat()
-        }
-        
-        # Cache for 10 minutes
-        if redis_client:
-            redis_client.setex(cache_key, 600, json.dumps(analytics_data))
+    lot_id = request.args.get('lot_id', type=int)
+    try:
+        start, end = _analytics_range(7)
+        curves = occupancy.occupancy_curves(start, end, request.args.get('bucket', 'hour'),
+                                            lot_ids=[lot_id] if lot_id else None)
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    return jsonify(curves)
+
+@admin_bp.route('/analytics/occupancy-heatmap')
+@login_required
+@admin_required
+def analytics_occupancy_heatmap():
+    """Occupancy rate by weekday and hour (IST). Query args: start, end (default the last 28 days), lot_id"""
+    from services import occupancy
     
-    return jsonify(analytics_data)
+    lot_id = request.args.get('lot_id', type=int)
+    try:
+        start, end = _analytics_range(28)
+        heatmap = occupancy.hour_of_week_heatmap(start, end, lot_ids=[lot_id] if lot_id else None)
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    return jsonify(heatmap)
 
 @admin_bp.route('/reports/generate-monthly', methods=['POST'])
 @login_required
@@ -316,28 +387,14 @@ def report_status(task_id):
 @admin_required
 def api_stats():
     """API endpoint for dashboard statistics"""
-    stats_cache_key = "admin_stats"
-    cached_stats = redis_client.get(stats_cache_key) if redis_client else None
-    
-    if cached_stats:
-        return jsonify(json.loads(cached_stats))
-    else:
-        # Recalculate and return
-        total_users = User.query.filter_by(is_admin=False).count()
-        total_lots = ParkingLot.query.count()
-        total_spots = ParkingSpot.query.count()
-        available_spots = ParkingSpot.query.filter_by(status='A').count()
-        active_reservations = Reservation.query.filter_by(status='active').count()
-        
-        stats = {
-            'total_users': total_users,
-            'total_lots': total_lots,
-            'total_spots': total_spots,
-            'available_spots': available_spots,
-            'active_reservations': active_reservations
-        }
-        
-        return jsonify(stats)
+    return jsonify(cache.get_or_compute('admin_stats', ADMIN_STATS_TAGS, 300, compute_admin_stats))
+
+@admin_bp.route('/cache/stats')
+@login_required
+@admin_required
+def cache_stats():
+    """Hit/miss counters for the admin statistics cache"""
+    return jsonify(cache.stats())
 
 # --- Parking Spot Management ---
 @admin_bp.route('/parking-spots', methods=['GET'])
@@ -386,11 +443,12 @@ def add_parking_spot():
         
         spot = ParkingSpot(lot_id=lot_id, spot_number=spot_number, status=status)
         db.session.add(spot)
+        db.session.flush()
+        spot_status_changed(lot_id, spot.id, None, status)
         db.session.commit()
         
-        # Clear cache
-        if redis_client:
-            redis_client.delete("admin_stats")
+        # Invalidate cached statistics
+        cache.bump('spots')
         
         return jsonify({'success': True, 'message': 'Parking spot added successfully'})
     except Exception as e:
@@ -421,13 +479,13 @@ def edit_parking_spot(spot_id):
         if new_spot_number:
             spot.spot_number = new_spot_number
         if new_status:
+            spot_status_changed(spot.lot_id, spot.id, spot.status, new_status)
             spot.status = new_status
         
         db.session.commit()
         
-        # Clear cache
-        if redis_client:
-            redis_client.delete("admin_stats")
+        # Invalidate cached statistics
+        cache.bump('spots')
         
         return jsonify({'success': True, 'message': 'Parking spot updated successfully'})
     except Exception as e:
@@ -450,12 +508,12 @@ def delete_parking_spot(spot_id):
         if active_reservation:
             return jsonify({'success': False, 'message': 'Cannot delete spot with active reservation'})
         
+        spot_status_changed(spot.lot_id, spot.id, spot.status, None)
         db.session.delete(spot)
         db.session.commit()
         
-        # Clear cache
-        if redis_client:
-            redis_client.delete("admin_stats")
+        # Invalidate cached statistics
+        cache.bump('spots', 'reservations')
         
         return jsonify({'success': True, 'message': 'Parking spot deleted successfully'})
     except Exception as e:
@@ -467,7 +525,14 @@ def delete_parking_spot(spot_id):
 @login_required
 @admin_required
 def get_bookings():
-    """View all bookings with optional filters"""
+    """View bookings with optional filters, one page at a time.
+
+    Pass `cursor` (empty for the first page) to page by the returned
+    `next_cursor` instead of `page`; add `include_total=1` for the total count.
+    """
+    page = request.args.get('page', 1, type=int)
+    cursor = request.args.get('cursor', type=str)
+    per_page = min(max(request.args.get('per_page', BOOKINGS_PER_PAGE, type=int), 1), BOOKINGS_MAX_PER_PAGE)
     lot_id = request.args.get('lot_id', type=int)
     user_id = request.args.get('user_id', type=int)
     spot_id = request.args.get('spot_id', type=int)
@@ -475,10 +540,15 @@ def get_bookings():
     date_from = request.args.get('date_from')
     date_to = request.args.get('date_to')
     
-    query = Reservation.query
+    query = Reservation.query.options(
+        db.joinedload(Reservation.user),
+        db.joinedload(Reservation.parking_spot).joinedload(ParkingSpot.parking_lot)
+    )
     
     if lot_id:
-        query = query.join(ParkingSpot).filter(ParkingSpot.lot_id == lot_id)
+        query = query.filter(Reservation.spot_id.in_(
+            db.session.query(ParkingSpot.id).filter(ParkingSpot.lot_id == lot_id)
+        ))
     if user_id:
         query = query.filter(Reservation.user_id == user_id)
     if spot_id:
@@ -490,18 +560,41 @@ def get_bookings():
     if date_to:
         query = query.filter(Reservation.created_at <= date_to)
     
-    bookings = query.order_by(Reservation.created_at.desc()).all()
-    
-    # user and spot details
-    result = []
-    for booking in bookings:
+    def booking_with_nested(booking):
+        # user and spot details (already loaded by the joins above)
         booking_data = booking.to_dict()
         booking_data['user'] = booking.user.to_dict() if booking.user else None
         booking_data['spot'] = booking.parking_spot.to_dict() if booking.parking_spot else None
-        booking_data['lot'] = booking.parking_spot.parking_lot.to_dict() if booking.parking_spot and booking.parking_spot.parking_lot else None
-        result.append(booking_data)
+        booking_data['lot'] = booking.parking_spot.parking_lot.to_summary() if booking.parking_spot and booking.parking_spot.parking_lot else None
+        return booking_data
     
-    return jsonify(result)
+    if cursor is not None:
+        try:
+            items, next_cursor = keyset_page(query, Reservation.created_at, Reservation.id,
+                                             cursor=cursor, per_page=per_page)
+        except InvalidCursor as e:
+            return jsonify({'success': False, 'message': str(e)}), 400
+        result = {
+            'items': [booking_with_nested(b) for b in items],
+            'next_cursor': next_cursor,
+            'per_page': per_page
+        }
+        if request.args.get('include_total', type=int):
+            result['total'] = query.order_by(None).count()
+        return jsonify(result)
+    
+    bookings = query.order_by(Reservation.created_at.desc(), Reservation.id.desc()).paginate(
+        page=page, per_page=per_page, error_out=False
+    )
+    result = [booking_with_nested(b) for b in bookings.items]
+    
+    return jsonify({
+        'items': result,
+        'total': bookings.total,
+        'pages': bookings.pages,
+        'current_page': bookings.page,
+        'per_page': per_page
+    })
 
 @admin_bp.route('/bookings/<int:booking_id>/cancel', methods=['POST'])
 @login_required
@@ -514,17 +607,41 @@ def cancel_booking(booking_id):
         booking.leaving_timestamp = datetime.utcnow()
         
         # Free up the spot
-        if booking.parking_spot:
-            booking.parking_spot.status = 'A'
+        spot = booking.parking_spot
+        if spot:
+            spot_status_changed(spot.lot_id, spot.id, spot.status, 'A')
+            spot.status = 'A'
         
         db.session.commit()
-        if redis_client:
-            redis_client.delete("admin_stats")
+        cache.bump('reservations', 'spots')
         return jsonify({'success': True, 'message': 'Booking cancelled successfully'})
     except Exception as e:
         db.session.rollback()
         return jsonify({'success': False, 'message': str(e)})
 
+@admin_bp.route('/bookings/cancel', methods=['POST'])
+@login_required
+@admin_required
+def cancel_bookings():
+    """Cancel many bookings in one transaction: {"booking_ids": [...]}; results per booking"""
+    try:
+        data = request.get_json() or {}
+        results, cancelled = batch.cancel_bookings(data.get('booking_ids'))
+        db.session.commit()
+        if cancelled:
+            cache.bump('reservations', 'spots')
+        return jsonify({'success': True, 'cancelled': cancelled, 'results': results,
+                        'message': f'{cancelled} booking(s) cancelled'})
+    except ValueError as e:
+        db.session.rollback()
+        return jsonify({'success': False, 'message': str(e)}), 400
+    except batch.BatchConflict as e:
+        db.session.rollback()
+        return jsonify({'success': False, 'message': str(e)}), 409
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'success': False, 'message': str(e)})
+
 @admin_bp.route('/spot/<int:spot_id>/reservation')
 @login_required
 @admin_required
@@ -616,111 +733,97 @@ def override_spot_status(spot_id):
             if active_reservation:
                 return jsonify({'success': False, 'message': 'Spot has active reservation. Cannot force occupied.'})
         
+        spot_status_changed(spot.lot_id, spot.id, spot.status, new_status)
         spot.status = new_status
         db.session.commit()
-        if redis_client:
-            redis_client.delete("admin_stats")
+        cache.bump('spots')
         
         return jsonify({'success': True, 'message': f'Spot status changed to {"Available" if new_status == "A" else "Occupied"}'})
     except Exception as e:
         db.session.rollback()
         return jsonify({'success': False, 'message': str(e)}) 
 
+@admin_bp.route('/parking-spots/override-status', methods=['POST'])
+@login_required
+@admin_required
+def override_spots_status():
+    """Override the status of many spots in one transaction; results per spot
+
+    Body: {"status": "A"|"O", "spot_ids": [...]} or
+    {"status": ..., "lot_id": 3, "from": "L2-A01", "to": "L2-F40"} (spot numbers, inclusive).
+    """
+    try:
+        data = request.get_json() or {}
+        number_range = (data.get('from'), data.get('to')) if 'spot_ids' not in data else None
+        results, changed = batch.override_spot_status(
+            data.get('status'), spot_ids=data.get('spot_ids'), lot_id=data.get('lot_id'), number_range=number_range
+        )
+        db.session.commit()
+        if changed:
+            cache.bump('spots')
+        return jsonify({'success': True, 'changed': changed, 'results': results,
+                        'message': f'{changed} spot(s) changed'})
+    except ValueError as e:
+        db.session.rollback()
+        return jsonify({'success': False, 'message': str(e)}), 400
+    except batch.BatchConflict as e:
+        db.session.rollback()
+        return jsonify({'success': False, 'message': str(e)}), 409
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'success': False, 'message': str(e)})
+
 @admin_bp.route('/reports/export-monthly-csv', methods=['POST'])
 @login_required
 @admin_required
 def export_monthly_csv():
-    """Export monthly booking data as CSV with detailed information"""
+    """Export monthly booking data as CSV (or typed Parquet with "format": "parquet")"""
     try:
+        from services import exports
+        
         data = request.get_json() or {}
         use_background_task = data.get('background', False)
+        export_format = data.get('format', 'csv')
+        if export_format not in exports.EXPORT_FORMATS:
+            return jsonify({'success': False, 'message': f"Unsupported export format '{export_format}'."}), 400
         
         if use_background_task:
             
             from tasks import export_monthly_bookings_csv
-            task = export_monthly_bookings_csv.delay()
+            task = export_monthly_bookings_csv.delay(export_format)
             return jsonify({
                 'success': True,
-                'message': 'Monthly CSV export started in background',
+                'message': f'Monthly {export_format.upper()} export started in background',
                 'task_id': task.id,
                 'background': True
             })
         
-        
-        
         now = datetime.utcnow()
-        start_of_month = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-        
         
-        reservations = Reservation.query.filter(
-            Reservation.created_at >= start_of_month
-        ).all()
-        
-        
-        data = []
-        for reservation in reservations:
-            spot = reservation.parking_spot
-            lot = spot.parking_lot if spot else None
-            user = reservation.user
-            
-            # Convert UTC timestamps to local timezone (IST - UTC+5:30)
-            def format_local_time(utc_timestamp):
-                if not utc_timestamp:
-                    return 'N/A'
-                
-                local_time = utc_timestamp + timedelta(hours=5, minutes=30)
-                return local_time.strftime('%Y-%m-%d %H:%M:%S IST')
-            
-            
-            duration = reservation.calculate_duration()
-            duration_str = f"{duration}h" if duration > 0 else "-"
-            
-            
-            cost = reservation.total_cost or reservation.parking_cost or 0
-            cost_str = f"₹{cost:.2f}"
-            
-            data.append({
-                'Booking ID': reservation.id,
-                'User ID': user.id if user else 'N/A',
-                'User Name': f"{user.first_name} {user.last_name}".strip() if user else 'N/A',
-                'User Email': user.email if user else 'N/A',
-                'User Phone': user.phone if user else 'N/A',
-                'Parking Lot': lot.name if lot else 'N/A',
-                'Lot Address': lot.address if lot else 'N/A',
-                'Spot Number': spot.spot_number if spot else 'N/A',
-                'Vehicle Number': reservation.vehicle_number or 'N/A',
-                'Booking Time': format_local_time(reservation.created_at),
-                
-                'Parked In Time': format_local_time(reservation.parked_in_time),
-                'Released Time': format_local_time(reservation.released_time),
-                'Duration': duration_str,
-                'Cost': cost_str,
-                'Status': reservation.status,
-                'Updated At': format_local_time(reservation.updated_at)
+        if data.get('stream', False) and export_format == 'csv':
+            # Send rows to the client as they are read instead of writing a file first
+            csv_filename = f"monthly_bookings_{now.strftime('%Y_%m')}_{now.strftime('%Y%m%d_%H%M%S')}.csv"
+            body = exports.iter_csv(exports.monthly_frames(exports.start_of_month(now), now), exports.MONTHLY_COLUMNS)
+            return Response(stream_with_context(body), mimetype='text/csv', headers={
+                'Content-Disposition': f'attachment; filename={csv_filename}'
             })
         
+        filename, path, count = exports.export_monthly_file(export_format, now)
         
-        import pandas as pd
-        import os
-        
-        df = pd.DataFrame(data)
-        csv_filename = f"monthly_bookings_{now.strftime('%Y_%m')}_{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}.csv"
-        csv_path = os.path.join('static', 'exports', csv_filename)
-        
-        
-        os.makedirs(os.path.dirname(csv_path), exist_ok=True)
-        
-        df.to_csv(csv_path, index=False)
-        
-        print(f"Monthly CSV export completed: {csv_filename} with {len(data)} records")
-        print(f"File saved to: {csv_path}")
+        print(f"Monthly {export_format.upper()} export completed: {filename} with {count} records")
+        print(f"File saved to: {path}")
         
         return jsonify({
             'success': True,
-            'message': f'Monthly booking data exported successfully with {len(data)} records.',
-            'filename': csv_filename,
-            'download_url': f'/admin/reports/download-csv/{csv_filename}'
+            'message': f'Monthly booking data exported successfully with {count} records.',
+            'filename': filename,
+            'download_url': f'/admin/reports/download-csv/{filename}'
         })
+    except ImportError as e:
+        # pyarrow is only imported by the Parquet writer; any other missing module is reported as is
+        if (e.name or '').split('.')[0] == 'pyarrow':
+            return jsonify({'success': False, 'message': 'Parquet export requires pyarrow to be installed.'})
+        return jsonify({'success': False, 'message': str(e)})
     except Exception as e:
         return jsonify({'success': False, 'message': str(e)})
 
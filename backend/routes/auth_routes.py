@@ -1,7 +1,8 @@
 from flask import Blueprint, jsonify, request
 from werkzeug.security import generate_password_hash, check_password_hash
 from flask_login import login_user, logout_user, current_user
-from extensions import db, redis_client
+from extensions import db
+from services import auth_tokens, cache, last_login
 from models.user import User
 from datetime import datetime
 from config import Config
@@ -35,8 +36,7 @@ def register():
         db.session.add(new_user)
         db.session.commit()
         # Clear cached user data
-        if redis_client:
-            redis_client.delete("admin_stats")
+        cache.bump('users')
         return jsonify({'success': True, 'message': 'Registration successful! Please login.'})
     except Exception as e:
         db.session.rollback()
@@ -50,15 +50,24 @@ def login():
         password = data['password']
         user = User.query.filter_by(email=email).first()
         if user and check_password_hash(user.password, password) and user.is_active:
-            login_user(user)
-            user.last_login = datetime.utcnow()
-            db.session.commit()
-            return jsonify({
+            # Token clients send "Authorization: Bearer <access_token>" instead of the session cookie
+            token_mode = bool(data.get('token'))
+            if not token_mode:
+                login_user(user)
+            # Buffered and flushed in batches by tasks.flush_last_logins
+            logged_in_at = datetime.utcnow()
+            last_login.record(user, logged_in_at)
+            user_data = user.to_dict()
+            user_data['last_login'] = logged_in_at.isoformat()
+            response = {
                 'success': True, 
                 'message': 'Login successful',
-                'user': user.to_dict(),
+                'user': user_data,
                 'is_admin': user.is_admin
-            })
+            }
+            if token_mode:
+                response['access_token'] = auth_tokens.issue_token(user)
+            return jsonify(response)
         else:
             message = 'Invalid email or password'
             if user and not user.is_active:
@@ -69,6 +78,9 @@ def login():
 
 @auth_bp.route('/logout')
 def logout():
+    claims = auth_tokens.current_claims()
+    if claims:
+        auth_tokens.revoke_token(claims)
     logout_user()
     return jsonify({'success': True, 'message': 'Logged out successfully'})
 
@@ -108,12 +120,16 @@ def create_admin():
 
 @auth_bp.route('/check-auth')
 def check_auth():
-    """Check if user is authenticated and return user info (session-based)"""
+    """Check if user is authenticated (session or bearer token) and return user info"""
     if current_user.is_authenticated:
+        # Token users carry no row; for sessions this is the already loaded user
+        user = User.query.get(current_user.id)
+        if user is None or not user.is_active:
+            return jsonify({'authenticated': False})
         return jsonify({
             'authenticated': True,
-            'user': current_user.to_dict(),
-            'is_admin': current_user.is_admin
+            'user': user.to_dict(),
+            'is_admin': user.is_admin
         })
     else:
         return jsonify({'authenticated': False})
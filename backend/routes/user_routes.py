@@ -1,7 +1,10 @@
 from flask import Blueprint, request, jsonify, g
 from flask_login import login_required, current_user
-from extensions import db, redis_client
+from extensions import db
 from models import User, ParkingLot, ParkingSpot, Reservation
+from services import allocation, cache, spot_index
+from services.pagination import InvalidCursor, keyset_page
+from services.availability import spot_status_changed
 from datetime import datetime, timedelta
 from functools import wraps
 
@@ -12,12 +15,32 @@ user_bp = Blueprint('user', __name__, url_prefix='/user')
 def user_required(f):
     @wraps(f)
     def decorated_function(*args, **kwargs):
-        if not current_user.is_authenticated or current_user.is_admin:
+        if not current_user.is_authenticated or not current_user.is_active or current_user.is_admin:
             return jsonify({'success': False, 'message': 'Access denied. User privileges required.'}), 403
+        # A User row for sessions, a services.auth_tokens.TokenUser (id, is_admin) for bearer tokens
         g.current_user = current_user
         return f(*args, **kwargs)
     return decorated_function
 
+# Without Redis, availability bumps only reach this process; keep the copy young
+LOT_LISTING_TTL = 5
+
+def list_lots():
+    """Lot dicts from the Redis availability index, falling back to the database"""
+    lots = spot_index.lot_listing()
+    if lots is None:
+        lots = cache.get_or_compute(
+            'lot_listing', ('lots', 'spots'), LOT_LISTING_TTL,
+            lambda: [lot.to_dict() for lot in ParkingLot.query.all()], shared=False
+        )
+    return lots
+
+def reservation_with_nested(r):
+    d = r.to_dict()
+    d['spot'] = r.parking_spot.to_dict() if r.parking_spot else None
+    d['lot'] = r.parking_spot.parking_lot.to_dict() if r.parking_spot and r.parking_spot.parking_lot else None
+    return d
+
 # All protected routes now use @login_required and @user_required
 
 @user_bp.route('/dashboard')
@@ -26,49 +49,38 @@ def user_required(f):
 def dashboard():
     """User dashboard data"""
     user = g.current_user
-    # user's active reservation
-    active_reservation = Reservation.query.filter_by(
-        user_id=user.id, 
-        status='active'
-    ).first()
-    
-    # user's recent reservations
-    recent_reservations = Reservation.query.filter_by(
+    # user's recent reservations, with spot and lot loaded in the same query
+    recent_reservations = Reservation.query.options(
+        db.joinedload(Reservation.parking_spot).joinedload(ParkingSpot.parking_lot)
+    ).filter_by(
         user_id=user.id
     ).order_by(Reservation.created_at.desc()).limit(5).all()
-
-    def reservation_with_nested(r):
-        d = r.to_dict()
-        d['spot'] = r.parking_spot.to_dict() if r.parking_spot else None
-        d['lot'] = r.parking_spot.parking_lot.to_dict() if r.parking_spot and r.parking_spot.parking_lot else None
-        return d
     
-    # parking statistics
-    total_reservations = Reservation.query.filter_by(user_id=user.id).count()
-    # User Monetary statistics
-    total_spent = db.session.query(db.func.sum(
-        db.case(
+    # parking and monetary statistics plus the active reservation id, in one pass
+    total_reservations, total_spent, active_id = db.session.query(
+        db.func.count(Reservation.id),
+        db.func.sum(db.case(
             [(Reservation.total_cost != None, Reservation.total_cost)],
             else_=Reservation.parking_cost
-        )
-    )).filter_by(user_id=user.id).scalar() or 0
+        )),
+        db.func.max(db.case([(Reservation.status == 'active', Reservation.id)]))
+    ).filter(Reservation.user_id == user.id).one()
+    
+    # user's active reservation (at most one); usually among the recent ones
+    active_reservation = next((r for r in recent_reservations if r.id == active_id), None)
+    if active_id and not active_reservation:
+        active_reservation = Reservation.query.get(active_id)
     
     # available parking lots
-    lots = ParkingLot.query.all()
-    lot_availability = {}
-    for lot in lots:
-        available_spots = ParkingSpot.query.filter_by(
-            lot_id=lot.id, 
-            status='A'
-        ).count()
-        lot_availability[lot.id] = available_spots
+    lots = list_lots()
+    lot_availability = {lot['id']: lot['available_spots'] for lot in lots}
     
     return jsonify({
         'active_reservation': active_reservation.to_dict() if active_reservation else None,
         'recent_reservations': [reservation_with_nested(r) for r in recent_reservations],
         'total_reservations': total_reservations,
-        'total_spent': float(total_spent),
-        'lots': [lot.to_dict() for lot in lots],
+        'total_spent': float(total_spent or 0),
+        'lots': lots,
         'lot_availability': lot_availability
     })
 
@@ -77,24 +89,13 @@ def dashboard():
 @user_required
 def parking_lots():
     """Get available parking lots"""
-    lots = ParkingLot.query.all()
-    
-    # Get availability for each lot
-    for lot in lots:
-        available_spots = ParkingSpot.query.filter_by(
-            lot_id=lot.id, 
-            status='A'
-        ).count()
-        lot.available_spots = available_spots
-        lot.occupied_spots = lot.number_of_spots - available_spots
-    
-    return jsonify([lot.to_dict() for lot in lots])
+    return jsonify(list_lots())
 
 @user_bp.route('/reserve/<int:lot_id>', methods=['POST'])
 @login_required
 @user_required
 def reserve_spot(lot_id):
-    """Reserve a parking spot (user selects spot and provides vehicle number)"""
+    """Reserve a parking spot (user selects a spot, or sends spot_id "any"/none to be assigned one)"""
     lot = ParkingLot.query.get_or_404(lot_id)
     user = g.current_user
     active_reservation = Reservation.query.filter_by(user_id=user.id, status='active').first()
@@ -105,32 +106,16 @@ def reserve_spot(lot_id):
         spot_id = data.get('spot_id')
         vehicle_number = data.get('vehicle_number')
         
-        if not spot_id or not vehicle_number:
-            return jsonify({'success': False, 'message': 'Spot ID and vehicle number are required.'})
-        
-        spot = ParkingSpot.query.filter_by(id=spot_id, lot_id=lot_id, status='A').first()
-        if not spot:
-            return jsonify({'success': False, 'message': 'Selected spot is not available or does not exist.'})
-        
-        if spot.status != 'A':
-            return jsonify({'success': False, 'message': 'Selected spot is no longer available.'})
-        
-        reservation = Reservation(
-            spot_id=spot.id,  
-            user_id=user.id,
-            vehicle_number=vehicle_number,
-            parking_timestamp=datetime.utcnow(),
-            status='active'
-        )
-        
-        spot.status = 'O'
+        if not vehicle_number:
+            return jsonify({'success': False, 'message': 'Vehicle number is required.'})
         
-        db.session.add(reservation)
-        db.session.commit()
+        if not spot_id or spot_id == 'any':
+            reservation = allocation.reserve_any_spot(user.id, lot_id, vehicle_number)
+        else:
+            reservation = allocation.reserve_spot(user.id, lot_id, spot_id, vehicle_number)
         
-        # Clear cache
-        if redis_client:
-            redis_client.delete("admin_stats")
+        # Invalidate cached statistics
+        cache.bump('reservations', 'spots')
         
         return jsonify({
             'success': True, 
@@ -141,9 +126,11 @@ def reserve_spot(lot_id):
                 'vehicle_number': reservation.vehicle_number,
                 'parking_timestamp': reservation.parking_timestamp.isoformat(),
                 'lot_name': lot.name,
-                'spot_number': spot.spot_number
+                'spot_number': reservation.parking_spot.spot_number
             }
         })
+    except allocation.AllocationError as e:
+        return jsonify({'success': False, 'message': str(e)})
     except Exception as e:
         db.session.rollback()
         return jsonify({'success': False, 'message': str(e)})
@@ -200,8 +187,11 @@ def release_reservation(reservation_id):
     reservation.parking_cost = total_cost 
     reservation.status = 'completed'
     # Free the spot
-    reservation.parking_spot.status = 'A'
+    spot = reservation.parking_spot
+    spot_status_changed(spot.lot_id, spot.id, spot.status, 'A')
+    spot.status = 'A'
     db.session.commit()
+    cache.bump('reservations', 'spots')
     return jsonify({'success': True, 'message': 'Parking session released', 'duration': round(duration_hours, 2), 'total_cost': total_cost})
 
 @user_bp.route('/end-session', methods=['POST'])
@@ -244,11 +234,12 @@ def end_session():
         active_reservation.total_cost = cost  
         active_reservation.status = 'completed'
         
-        active_reservation.parking_spot.status = 'A'
+        spot = active_reservation.parking_spot
+        spot_status_changed(spot.lot_id, spot.id, spot.status, 'A')
+        spot.status = 'A'
         db.session.commit()
-        # Clear cache
-        if redis_client:
-            redis_client.delete("admin_stats")
+        # Invalidate cached statistics
+        cache.bump('reservations', 'spots')
         return jsonify({
             'success': True, 
             'message': 'Parking session ended successfully',
@@ -263,31 +254,48 @@ def end_session():
 @login_required
 @user_required
 def history():
-    """Get parking history with filters and sorting"""
+    """Get parking history with filters and sorting.
+
+    Pass `cursor` (empty for the first page) to page by the returned
+    `next_cursor` instead of `page`; add `include_total=1` for the total count.
+    """
     user = g.current_user
     page = request.args.get('page', 1, type=int)
+    cursor = request.args.get('cursor', type=str)
     status = request.args.get('status', type=str)
     sort = request.args.get('sort', 'created_at', type=str)
     order = request.args.get('order', 'desc', type=str)
 
-    query = Reservation.query.filter_by(user_id=user.id)
+    query = Reservation.query.options(
+        db.joinedload(Reservation.parking_spot).joinedload(ParkingSpot.parking_lot)
+    ).filter_by(user_id=user.id)
     if status:
         query = query.filter_by(status=status)
     
     allowed_sorts = {'created_at', 'parking_timestamp', 'parking_cost'}
     sort_field = sort if sort in allowed_sorts else 'created_at'
     sort_col = getattr(Reservation, sort_field)
+    
+    if cursor is not None:
+        try:
+            items, next_cursor = keyset_page(query, sort_col, Reservation.id, cursor=cursor,
+                                             per_page=10, descending=order != 'asc')
+        except InvalidCursor as e:
+            return jsonify({'success': False, 'message': str(e)}), 400
+        result = {
+            'items': [reservation_with_nested(r) for r in items],
+            'next_cursor': next_cursor
+        }
+        if request.args.get('include_total', type=int):
+            result['total'] = query.order_by(None).count()
+        return jsonify(result)
+    
     if order == 'asc':
         query = query.order_by(sort_col.asc())
     else:
         query = query.order_by(sort_col.desc())
 
     reservations = query.paginate(page=page, per_page=10, error_out=False)
-    def reservation_with_nested(r):
-        d = r.to_dict()
-        d['spot'] = r.parking_spot.to_dict() if r.parking_spot else None
-        d['lot'] = r.parking_spot.parking_lot.to_dict() if r.parking_spot and r.parking_spot.parking_lot else None
-        return d
     return jsonify({
         'items': [reservation_with_nested(r) for r in reservations.items],
         'total': reservations.total,
@@ -302,75 +310,14 @@ def export_csv():
     """Export user's parking history to CSV"""
     user = g.current_user
     try:
-        
-        reservations = Reservation.query.filter_by(user_id=user.id).all()
-        
-        data = []
-        for reservation in reservations:
-            spot = reservation.parking_spot
-            lot = spot.parking_lot if spot else None
-            
-            
-            def format_local_time(utc_timestamp):
-                if not utc_timestamp:
-                    return 'N/A'
-                
-                local_time = utc_timestamp + timedelta(hours=5, minutes=30)
-                return local_time.strftime('%Y-%m-%d %H:%M:%S IST')
-            
-            duration = reservation.calculate_duration()
-            duration_str = f"{duration}h" if duration > 0 else "-"
-            
-            cost = reservation.total_cost or reservation.parking_cost or 0
-            cost_str = f"₹{cost:.2f}"
-            
-            data.append({
-                'ID': reservation.id,
-                'Location': lot.name if lot else 'N/A',
-                'Address': lot.address if lot else 'N/A',
-                'Spot': spot.spot_number if spot else 'N/A',
-                'Vehicle': reservation.vehicle_number or 'N/A',
-                'Start Time': format_local_time(reservation.parking_timestamp),
-                'End Time': format_local_time(reservation.released_time or reservation.leaving_timestamp),
-                'Duration': duration_str,
-                'Cost': cost_str,
-                'Status': reservation.status
-            })
-        
-    
-        import pandas as pd
-        import os
-        from datetime import datetime
-        
-        df = pd.DataFrame(data)
-        csv_filename = f"user_{user.id}_parking_history_{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}.csv"
-        csv_path = os.path.join('static', 'exports', csv_filename)
-        
-        os.makedirs(os.path.dirname(csv_path), exist_ok=True)
-        
-        df.to_csv(csv_path, index=False)
-
-        print(f"CSV export completed: {csv_filename} with {len(data)} records")
-        print(f"File saved to: {csv_path}")
-        print(f"Download URL: /user/download-csv/{csv_filename}")
-
-        # email with CSV attachment
-        from flask_mail import Message
-        from extensions import mail
-        with open(csv_path, 'rb') as f:
-            msg = Message(
-                subject="Your Parking History Report",
-                recipients=[user.email],
-                body="Attached is your parking history report as requested. All timestamps are in Indian Standard Time (IST)."
-            )
-            msg.attach(csv_filename, "text/csv", f.read())
-            mail.send(msg)
-        
+        # Building the file and talking to the mail server happen in the worker
+        from tasks import export_user_data_csv
+        task = export_user_data_csv.delay(user.id, send_email=True)
         return jsonify({
-            'success': True, 
-            'message': f'CSV export completed successfully with {len(data)} records.',
-            'filename': csv_filename,
-            'download_url': f'/user/download-csv/{csv_filename}'
+            'success': True,
+            'message': 'CSV export started. It will be emailed to you when ready.',
+            'task_id': task.id,
+            'background': True
         })
     except Exception as e:
         return jsonify({'success': False, 'message': str(e)})
@@ -380,12 +327,16 @@ def export_csv():
 @user_required
 def export_status(task_id):
     """Check CSV export status"""
+    from tasks import export_user_data_csv
+    
     task = export_user_data_csv.AsyncResult(task_id)
     if task.ready():
-        result = task.result
+        result = str(task.result)
         if 'completed' in result:
             # Extract filename from result
             filename = result.split(': ')[-1]
+            if not filename.startswith(f"user_{g.current_user.id}_"):
+                return jsonify({'status': 'error', 'message': 'Export not found'}), 404
             return jsonify({
                 'status': 'completed', 
                 'filename': filename,
@@ -401,7 +352,7 @@ def export_status(task_id):
 @user_required
 def profile():
     """Get user profile"""
-    user = g.current_user
+    user = User.query.get_or_404(g.current_user.id)
     return jsonify(user.to_dict())
 
 @user_bp.route('/profile/edit', methods=['POST'])
@@ -409,7 +360,7 @@ def profile():
 @user_required
 def edit_profile():
     """Edit user profile"""
-    user = g.current_user
+    user = User.query.get_or_404(g.current_user.id)
     try:
         data = request.get_json()
         user.first_name = data.get('first_name', '')
@@ -0,0 +1 @@
+"""Domain logic shared by the route blueprints and Celery tasks"""
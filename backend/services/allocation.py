@@ -0,0 +1,81 @@
+from extensions import db
+from models import ParkingSpot, Reservation
+from services import spot_index
+from services.availability import spot_status_changed
+from datetime import datetime
+from sqlalchemy.exc import IntegrityError
+
+# Spots popped from a stale free-spot index before giving up
+AUTO_ASSIGN_ATTEMPTS = 5
+
+
+class AllocationError(Exception):
+    """A spot could not be reserved; the message is safe to show to the user"""
+
+
+class UserHasActiveReservation(AllocationError):
+    pass
+
+
+def claim_spot(lot_id, spot_id):
+    """Flip one spot from available to occupied with a single conditional UPDATE.
+
+    Returns True only for the caller whose UPDATE matched the row, so two workers
+    racing for the same spot can never both win.
+    """
+    claimed = ParkingSpot.query.filter_by(id=spot_id, lot_id=lot_id, status='A').update(
+        {'status': 'O', 'updated_at': datetime.utcnow()}, synchronize_session=False
+    )
+    return claimed == 1
+
+
+def reserve_spot(user_id, lot_id, spot_id, vehicle_number):
+    """Claim `spot_id` and create the active reservation in one transaction"""
+    if not claim_spot(lot_id, spot_id):
+        db.session.rollback()
+        raise AllocationError('Selected spot is not available or does not exist.')
+
+    spot_status_changed(lot_id, spot_id, 'A', 'O')
+    reservation = Reservation(
+        spot_id=spot_id,
+        user_id=user_id,
+        vehicle_number=vehicle_number,
+        parking_timestamp=datetime.utcnow(),
+        status='active'
+    )
+    db.session.add(reservation)
+    try:
+        db.session.commit()
+    except IntegrityError as e:
+        # uq_reservation_active_user / uq_reservation_active_spot; the rollback also releases the spot
+        db.session.rollback()
+        if 'user_id' in str(e.orig) or 'uq_reservation_active_user' in str(e.orig):
+            raise UserHasActiveReservation('You already have an active parking reservation.')
+        raise AllocationError('Selected spot is no longer available.')
+    return reservation
+
+
+def reserve_any_spot(user_id, lot_id, vehicle_number):
+    """Auto-assign a free spot in the lot.
+
+    Pops candidates from the Redis free-spot index (O(1), no spot listing) and
+    falls back to an indexed lookup in the database when the index is empty or
+    Redis is unavailable. Candidates that turn out to be taken were stale index
+    entries and are simply skipped.
+    """
+    for _ in range(AUTO_ASSIGN_ATTEMPTS):
+        spot_id = spot_index.pop_free_spot(lot_id)
+        popped = spot_id is not None
+        if not popped:
+            spot_id = db.session.query(ParkingSpot.id).filter_by(lot_id=lot_id, status='A').limit(1).scalar()
+            if spot_id is None:
+                break
+        try:
+            return reserve_spot(user_id, lot_id, spot_id, vehicle_number)
+        except UserHasActiveReservation:
+            if popped:
+                spot_index.mark_free(lot_id, spot_id)
+            raise
+        except AllocationError:
+            continue
+    raise AllocationError('No spots are available in this parking lot.')
@@ -0,0 +1,113 @@
+"""Signed access tokens, so API requests skip the per-request user lookup.
+
+POST /login with {"token": true} returns an access token instead of starting
+a session. Its claims carry what admin_required and user_required check
+(sub = user id, is_admin, is_active), so a request sent with
+"Authorization: Bearer <token>" is authorized by Flask-Login's request_loader
+without reading the user table. Session cookies keep working as before.
+
+Revocation lives in Redis, each key expiring with the token lifetime:
+    auth:revoked:<user_id>  epoch seconds; the user's older tokens are refused
+                            (written when an admin deactivates the user)
+    auth:denied:<jti>       one token, written on logout
+A deactivation is refused (and rolled back) when its revocation cannot be
+written, so a token's is_active claim is never trusted past a recorded
+deactivation. While Redis is unavailable the user's is_active is read from
+the database instead.
+"""
+import time
+
+import redis
+from flask import current_app
+from flask_jwt_extended import create_access_token, get_jwt, verify_jwt_in_request
+from flask_jwt_extended.exceptions import JWTExtendedException
+from jwt import PyJWTError
+
+from extensions import db, jwt_manager, login_manager, redis_client
+from models import User
+
+
+def revoked_user_key(user_id):
+    return f"auth:revoked:{user_id}"
+
+
+def denied_token_key(jti):
+    return f"auth:denied:{jti}"
+
+
+class TokenUser:
+    """The current user as described by a verified access token (no database row)"""
+    is_authenticated = True
+    is_anonymous = False
+
+    def __init__(self, claims):
+        self.id = int(claims['sub'])
+        self.is_admin = bool(claims.get('is_admin'))
+        self.is_active = bool(claims.get('is_active'))
+        self.claims = claims
+
+    def get_id(self):
+        return str(self.id)
+
+
+def issue_token(user):
+    return create_access_token(identity=str(user.id), additional_claims={
+        'is_admin': bool(user.is_admin),
+        'is_active': bool(user.is_active)
+    })
+
+
+def _lifetime():
+    return int(current_app.config['JWT_ACCESS_TOKEN_EXPIRES'].total_seconds())
+
+
+def revoke_user(user_id):
+    """Refuse every token issued to the user so far; False if Redis could not record it
+
+    Call before committing the deactivation, and abandon it on False.
+    """
+    try:
+        redis_client.set(revoked_user_key(user_id), time.time(), ex=_lifetime())
+        return True
+    except redis.RedisError as e:
+        print(f"Warning: could not revoke tokens of user {user_id}: {e}")
+        return False
+
+
+def revoke_token(claims):
+    """Refuse one token (logout) until it would have expired anyway"""
+    ttl = int(claims['exp'] - time.time())
+    if ttl <= 0:
+        return
+    try:
+        redis_client.set(denied_token_key(claims['jti']), 1, ex=ttl)
+    except redis.RedisError as e:
+        print(f"Warning: could not revoke token: {e}")
+
+
+@jwt_manager.token_in_blocklist_loader
+def is_revoked(jwt_header, claims):
+    user_id = int(claims['sub'])
+    try:
+        revoked_at, denied = redis_client.mget(revoked_user_key(user_id), denied_token_key(claims['jti']))
+    except redis.RedisError:
+        # Fail closed on deactivation, at the price of one query per request
+        return not db.session.query(User.is_active).filter(User.id == user_id).scalar()
+    # iat is whole seconds, so a token issued in the same second is refused too
+    return denied is not None or (revoked_at is not None and claims['iat'] < float(revoked_at))
+
+
+def current_claims():
+    """Claims of a valid bearer token on this request, or None"""
+    try:
+        if verify_jwt_in_request(optional=True) is None:
+            return None
+    except (JWTExtendedException, PyJWTError):
+        return None
+    return get_jwt()
+
+
+@login_manager.request_loader
+def load_token_user(request):
+    claims = current_claims()
+    return TokenUser(claims) if claims else None
@@ -0,0 +1,76 @@
+"""Single entry point for spot status transitions.
+
+Routes call `spot_status_changed` next to every write to ParkingSpot.status.
+The lot counters are updated inside the caller's transaction; the Redis
+availability index is queued on the session and only touched after the
+commit succeeds, so a rolled-back request never leaks into Redis. Each
+transition is also logged to spot_event, with one multi-row INSERT per
+transaction issued just before it commits.
+"""
+from datetime import datetime
+
+import redis
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from extensions import db
+from models import ParkingLot, SpotEvent
+from services import spot_index
+
+PENDING_KEY = 'pending_spot_index_changes'
+EVENTS_KEY = 'pending_spot_events'
+
+
+def spot_status_changed(lot_id, spot_id, old_status, new_status):
+    """Record one spot moving from `old_status` to `new_status`.
+
+    Pass None as `old_status` for a new spot and as `new_status` for a deleted one.
+    """
+    if old_status == new_status:
+        return
+    ParkingLot.shift_spot_counts(lot_id, old_status, new_status)
+    db.session.info.setdefault(PENDING_KEY, []).append((lot_id, spot_id, old_status, new_status))
+    db.session.info.setdefault(EVENTS_KEY, []).append({
+        'spot_id': spot_id, 'lot_id': lot_id, 'old_status': old_status,
+        'new_status': new_status, 'created_at': datetime.utcnow()
+    })
+
+
+def spots_status_changed(lot_id, spot_ids, old_status, new_status):
+    """spot_status_changed for many spots of one lot making the same transition"""
+    if old_status == new_status or not spot_ids:
+        return
+    ParkingLot.shift_spot_counts(lot_id, old_status, new_status, len(spot_ids))
+    now = datetime.utcnow()
+    db.session.info.setdefault(PENDING_KEY, []).extend(
+        (lot_id, spot_id, old_status, new_status) for spot_id in spot_ids
+    )
+    db.session.info.setdefault(EVENTS_KEY, []).extend(
+        {'spot_id': spot_id, 'lot_id': lot_id, 'old_status': old_status,
+         'new_status': new_status, 'created_at': now}
+        for spot_id in spot_ids
+    )
+
+
+@event.listens_for(Session, 'before_commit')
+def _write_spot_events(session):
+    events = session.info.pop(EVENTS_KEY, None)
+    if events:
+        session.execute(SpotEvent.__table__.insert(), events)
+
+
+@event.listens_for(Session, 'after_commit')
+def _flush_spot_index(session):
+    changes = session.info.pop(PENDING_KEY, None)
+    if changes:
+        try:
+            spot_index.apply(changes)
+        except redis.RedisError as e:
+            # The database is already committed; the reconcile task repairs the index
+            print(f"Warning: availability index update failed: {e}")
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_spot_index(session):
+    session.info.pop(PENDING_KEY, None)
+    session.info.pop(EVENTS_KEY, None)
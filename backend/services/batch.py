@@ -0,0 +1,169 @@
+"""Batch admin operations on spots and bookings.
+
+Each operation reads the targeted rows once, decides per item, then applies
+every change with a few set-based UPDATEs (one per chunk of ids and status
+transition) in the caller's transaction. The UPDATEs repeat the status the
+rows were read with, so a row that changed in between makes the counts
+disagree and the whole batch is refused with BatchConflict instead of being
+half-applied. Lot counters, the spot_event log and the Redis availability
+index follow through services.availability, as for single changes.
+
+Results come back per item in request order:
+{'id': ..., 'success': bool, 'message': str}.
+"""
+from collections import defaultdict
+from datetime import datetime
+
+from extensions import db
+from models import ParkingSpot, Reservation
+from services.availability import spots_status_changed
+
+MAX_BATCH = 10000
+ID_CHUNK = 500  # ids per IN (...), well below SQLite's bound-parameter limit
+
+SPOT_STATUS_NAMES = {'A': 'Available', 'O': 'Occupied'}
+
+
+class BatchConflict(Exception):
+    """Targeted rows changed while the batch ran; nothing was applied"""
+
+
+def _chunks(ids):
+    for i in range(0, len(ids), ID_CHUNK):
+        yield ids[i:i + ID_CHUNK]
+
+
+def _ids(values, label):
+    if not isinstance(values, list) or not values:
+        raise ValueError(f"{label} must be a non-empty list")
+    try:
+        ids = list(dict.fromkeys(int(value) for value in values))
+    except (TypeError, ValueError):
+        raise ValueError(f"{label} must contain integer ids")
+    if len(ids) > MAX_BATCH:
+        raise ValueError(f"At most {MAX_BATCH} {label.replace('_', ' ')} per batch")
+    return ids
+
+
+def _result(item_id, success, message):
+    return {'id': item_id, 'success': success, 'message': message}
+
+
+def _spot_rows(spot_ids=None, lot_id=None, number_range=None):
+    """{spot_id: (lot_id, status)} and the ids in request order (lot ranges: by spot number)"""
+    query = db.session.query(ParkingSpot.id, ParkingSpot.lot_id, ParkingSpot.status)
+    if spot_ids is not None:
+        rows = {}
+        for chunk in _chunks(spot_ids):
+            rows.update((spot_id, (lot, status)) for spot_id, lot, status in query.filter(ParkingSpot.id.in_(chunk)))
+        return rows, spot_ids
+
+    first, last = number_range
+    ordered = query.filter(
+        ParkingSpot.lot_id == lot_id,
+        ParkingSpot.spot_number >= first,
+        ParkingSpot.spot_number <= last
+    ).order_by(ParkingSpot.spot_number).limit(MAX_BATCH + 1).all()
+    if len(ordered) > MAX_BATCH:
+        raise ValueError(f"At most {MAX_BATCH} spots per batch")
+    return {spot_id: (lot, status) for spot_id, lot, status in ordered}, [row[0] for row in ordered]
+
+
+def override_spot_status(new_status, spot_ids=None, lot_id=None, number_range=None):
+    """Force spots available ('A') or occupied ('O'), like the single override endpoint
+
+    Targets `spot_ids`, or the spots of `lot_id` whose numbers fall within
+    `number_range` = (first, last), compared as text (zero-padded numbers,
+    as templates produce, range as expected). Returns (results, changed).
+    """
+    if new_status not in SPOT_STATUS_NAMES:
+        raise ValueError('Invalid status. Use A (Available) or O (Occupied)')
+    if spot_ids is not None:
+        spot_ids = _ids(spot_ids, 'spot_ids')
+    elif lot_id is None or not number_range or len(number_range) != 2 or not all(number_range):
+        raise ValueError('Give spot_ids, or lot_id with from and to spot numbers')
+    rows, order = _spot_rows(spot_ids, lot_id, number_range)
+
+    blocked = set()
+    if new_status == 'O':
+        to_occupy = [spot_id for spot_id, (_, status) in rows.items() if status == 'A']
+        for chunk in _chunks(to_occupy):
+            blocked.update(spot_id for (spot_id,) in db.session.query(Reservation.spot_id).filter(
+                Reservation.spot_id.in_(chunk), Reservation.status == 'active'
+            ))
+
+    results = []
+    transitions = defaultdict(list)  # (lot_id, old_status) -> spot ids
+    for spot_id in order:
+        if spot_id not in rows:
+            results.append(_result(spot_id, False, 'Parking spot not found'))
+            continue
+        lot, status = rows[spot_id]
+        if spot_id in blocked:
+            results.append(_result(spot_id, False, 'Spot has active reservation. Cannot force occupied.'))
+        elif status == new_status:
+            results.append(_result(spot_id, True, f'Spot is already {SPOT_STATUS_NAMES[new_status]}'))
+        else:
+            transitions[(lot, status)].append(spot_id)
+            results.append(_result(spot_id, True, f'Spot status changed to {SPOT_STATUS_NAMES[new_status]}'))
+
+    now = datetime.utcnow()
+    changed = 0
+    for (lot, old_status), ids in transitions.items():
+        for chunk in _chunks(ids):
+            updated = ParkingSpot.query.filter(
+                ParkingSpot.id.in_(chunk), ParkingSpot.status == old_status
+            ).update({'status': new_status, 'updated_at': now}, synchronize_session=False)
+            if updated != len(chunk):
+                raise BatchConflict('Some spots changed while the batch ran; nothing was applied, please retry')
+        spots_status_changed(lot, ids, old_status, new_status)
+        changed += len(ids)
+    return results, changed
+
+
+def cancel_bookings(booking_ids):
+    """Cancel active bookings and free their spots, like the single cancel endpoint
+
+    Bookings that are no longer active are reported and left alone.
+    Returns (results, cancelled).
+    """
+    booking_ids = _ids(booking_ids, 'booking_ids')
+    rows = {}
+    query = db.session.query(
+        Reservation.id, Reservation.status, ParkingSpot.id, ParkingSpot.lot_id, ParkingSpot.status
+    ).outerjoin(ParkingSpot, Reservation.spot_id == ParkingSpot.id)
+    for chunk in _chunks(booking_ids):
+        rows.update((row[0], row[1:]) for row in query.filter(Reservation.id.in_(chunk)))
+
+    results = []
+    to_cancel = []
+    spots = defaultdict(list)  # (lot_id, old spot status) -> spot ids to free
+    for booking_id in booking_ids:
+        if booking_id not in rows:
+            results.append(_result(booking_id, False, 'Booking not found'))
+            continue
+        status, spot_id, lot, spot_status = rows[booking_id]
+        if status != 'active':
+            results.append(_result(booking_id, False, f'Booking is already {status}'))
+            continue
+        to_cancel.append(booking_id)
+        if spot_id is not None and spot_status != 'A':
+            spots[(lot, spot_status)].append(spot_id)
+        results.append(_result(booking_id, True, 'Booking cancelled successfully'))
+
+    now = datetime.utcnow()
+    for chunk in _chunks(to_cancel):
+        updated = Reservation.query.filter(
+            Reservation.id.in_(chunk), Reservation.status == 'active'
+        ).update({'status': 'cancelled', 'leaving_timestamp': now, 'updated_at': now}, synchronize_session=False)
+        if updated != len(chunk):
+            raise BatchConflict('Some bookings changed while the batch ran; nothing was applied, please retry')
+    for (lot, old_status), ids in spots.items():
+        for chunk in _chunks(ids):
+            updated = ParkingSpot.query.filter(
+                ParkingSpot.id.in_(chunk), ParkingSpot.status == old_status
+            ).update({'status': 'A', 'updated_at': now}, synchronize_session=False)
+            if updated != len(chunk):
+                raise BatchConflict('Some spots changed while the batch ran; nothing was applied, please retry')
+        spots_status_changed(lot, ids, old_status, 'A')
+    return results, len(to_cancel)
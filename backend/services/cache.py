@@ -0,0 +1,373 @@
+"""Two-tier tagged cache for computed read-mostly data.
+
+Each entry depends on one or more tags (TAGS). Its Redis key embeds the
+current generation number of every tag it depends on, so bump(tag) makes
+all dependent entries miss from then on; the orphaned keys simply expire.
+Code that changes data names the kind of data it changed instead of the
+keys that happen to depend on it.
+
+In front of Redis sits a small per-process LRU (LOCAL_MAX_ENTRIES entries,
+at most LOCAL_TTL seconds old) holding the decoded values, so a hot entry
+costs neither a round-trip nor a json.loads. bump() also publishes the tags
+on INVALIDATE_CHANNEL; a listener thread in every process bumps its local
+generations when a message arrives. Without Redis the local tier is all
+there is: other processes only notice a change once their copy expires.
+
+Recomputes are single-flight. In Redis, the caller that wins LOCK_KEY
+recomputes while everyone else is served the previous value (kept for
+STALE_GRACE past its expiry, and under LATEST_KEY across bumps); busy
+entries are refreshed shortly before expiry (XFetch). Without Redis,
+threads of one process wait for a single compute instead.
+
+Values handed out from the local tier are shared; callers must not mutate
+them. Hits and misses are counted per entry name in a Redis hash, except
+local hits, which stay in process memory (as everything does without Redis).
+"""
+import json
+import math
+import os
+import random
+import socket
+import threading
+import time
+import uuid
+from collections import Counter, OrderedDict
+
+import redis
+from flask import current_app, has_app_context
+
+from extensions import redis_client
+
+TAGS = ('users', 'lots', 'spots', 'reservations')
+
+GENERATION_KEY = 'cache:gen:{}'
+ENTRY_KEY = 'cache:item:{}:{}'
+LATEST_KEY = 'cache:latest:{}'
+LOCK_KEY = 'cache:lock:{}'
+STATS_KEY = 'cache:stats'
+INVALIDATE_CHANNEL = 'cache:invalidate'
+
+LOCAL_MAX_ENTRIES = 256
+LOCAL_TTL = 30
+LISTENER_RETRY = 30
+
+LOCK_TTL = 60       # seconds a recompute may hold an entry's lock
+LOCK_WAIT = 5       # how long a caller with no value to serve waits for the lock holder
+LOCK_POLL = 0.05
+STALE_GRACE = 60    # seconds an entry stays servable after it expires
+XFETCH_BETA = 1.0
+
+_local_stats = Counter()
+_local_generations = Counter()
+_local_entries = OrderedDict()  # (database URI, name) -> (generations, expires_at, value)
+_compute_locks = {}
+_lock = threading.Lock()
+_listener = None
+_listener_pid = None
+_listener_retry_at = 0.0
+
+
+def _check_tags(tags):
+    unknown = set(tags) - set(TAGS)
+    if unknown:
+        raise ValueError(f"Unknown cache tags: {', '.join(sorted(unknown))}")
+
+
+def _record(pipe, name, outcome):
+    if pipe is not None:
+        pipe.hincrby(STATS_KEY, f'{name}:{outcome}', 1)
+    else:
+        _local_stats[f'{name}:{outcome}'] += 1
+
+
+def _origin():
+    return f'{socket.gethostname()}:{os.getpid()}'
+
+
+# --- Local tier ---
+
+def _local_key(name):
+    """Local entries are kept per database, so apps bound to different databases
+    in one process (benchmarks, scripts) never see each other's values"""
+    database = current_app.config.get('SQLALCHEMY_DATABASE_URI') if has_app_context() else None
+    return (database, name)
+
+
+def _local_get(key, generations):
+    with _lock:
+        entry = _local_entries.get(key)
+        if entry is None:
+            return None
+        if entry[0] != generations or entry[1] <= time.monotonic():
+            del _local_entries[key]
+            return None
+        _local_entries.move_to_end(key)
+        return entry[2]
+
+
+def _local_put(key, generations, ttl, value):
+    with _lock:
+        _local_entries[key] = (generations, time.monotonic() + min(ttl, LOCAL_TTL), value)
+        _local_entries.move_to_end(key)
+        while len(_local_entries) > LOCAL_MAX_ENTRIES:
+            _local_entries.popitem(last=False)
+
+
+def _bump_local(tags):
+    with _lock:
+        for tag in tags:
+            _local_generations[tag] += 1
+
+
+def clear_local():
+    with _lock:
+        _local_entries.clear()
+
+
+# --- Cross-process invalidation ---
+
+def _on_invalidate(message):
+    try:
+        payload = json.loads(message['data'])
+    except (TypeError, ValueError):
+        return
+    if payload.get('origin') != _origin():
+        _bump_local([tag for tag in payload.get('tags', ()) if tag in TAGS])
+
+
+def _on_listener_error(error, pubsub, thread):
+    print(f"Warning: cache invalidation listener stopped: {error}")
+    thread.stop()
+
+
+def _ensure_listener():
+    """Start (or restart, after a fork or a dropped connection) the invalidation listener"""
+    global _listener, _listener_pid, _listener_retry_at
+    if not redis_client:
+        return
+    pid = os.getpid()
+    if _listener_pid == pid and _listener is not None and _listener.is_alive():
+        return
+    if time.monotonic() < _listener_retry_at:
+        return
+    with _lock:
+        if _listener_pid == pid and _listener is not None and _listener.is_alive():
+            return
+        _listener_retry_at = time.monotonic() + LISTENER_RETRY
+        try:
+            pubsub = redis_client.pubsub(ignore_subscribe_messages=True)
+            pubsub.subscribe(**{INVALIDATE_CHANNEL: _on_invalidate})
+            _listener = pubsub.run_in_thread(sleep_time=1, daemon=True,
+                                             exception_handler=_on_listener_error)
+            _listener_pid = pid
+        except redis.RedisError as e:
+            print(f"Warning: could not subscribe to cache invalidations: {e}")
+            _listener = None
+        # Messages may have been missed while nobody was listening
+        _local_entries.clear()
+
+
+# --- Public API ---
+
+def _count(name, outcome):
+    try:
+        redis_client.hincrby(STATS_KEY, f'{name}:{outcome}', 1)
+    except redis.RedisError:
+        pass
+
+
+def _compute_lock(key):
+    with _lock:
+        return _compute_locks.setdefault(key, threading.Lock())
+
+
+def _refresh_now(payload, now):
+    """XFetch: refresh with a probability that rises as expiry nears
+
+    Scaled by how long the value took to compute, so slow entries start
+    refreshing earlier; always true once the entry has expired.
+    """
+    return now - payload['delta'] * XFETCH_BETA * math.log(1.0 - random.random()) >= payload['expires']
+
+
+def _acquire(name):
+    token = uuid.uuid4().hex
+    if redis_client.set(LOCK_KEY.format(name), token, nx=True, ex=LOCK_TTL):
+        return token
+    return None
+
+
+def _release(name, token):
+    key = LOCK_KEY.format(name)
+    try:
+        with redis_client.pipeline() as pipe:
+            pipe.watch(key)
+            if pipe.get(key) == token:
+                pipe.multi()
+                pipe.delete(key)
+                pipe.execute()
+    except redis.RedisError:
+        pass  # the lock expires on its own
+
+
+def _wait_for(key):
+    """Poll for the entry another process is computing; None if it does not show up"""
+    deadline = time.monotonic() + LOCK_WAIT
+    while time.monotonic() < deadline:
+        time.sleep(LOCK_POLL)
+        cached = redis_client.get(key)
+        if cached is not None:
+            return json.loads(cached)
+    return None
+
+
+def _compute_local(name, local_key, local_generations, ttl, compute):
+    # Single-flight within the process: concurrent callers wait for one compute
+    with _compute_lock(local_key):
+        value = _local_get(local_key, local_generations)
+        if value is not None:
+            _record(None, name, 'local_hits')
+            return value
+        _record(None, name, 'misses')
+        value = compute()
+        if value is not None:
+            _local_put(local_key, local_generations, ttl, value)
+        return value
+
+
+def get_or_compute(name, tags, ttl, compute, shared=True):
+    """Return the cached value of `name`, calling compute() on a miss
+
+    Values must be JSON-serialisable and are not cached when compute() returns
+    None. `tags` lists what the value is derived from. With shared=False the
+    value is only kept in the local tier (e.g. when it is itself read from Redis).
+
+    Shared entries are recomputed by one caller at a time (LOCK_KEY); the others
+    keep getting the previous value meanwhile, or wait for the new one when there
+    is none. Entries are refreshed a little before they expire (see _refresh_now).
+    """
+    _check_tags(tags)
+    _ensure_listener()
+    local_key = _local_key(name)
+    local_generations = tuple(_local_generations[tag] for tag in tags)
+    value = _local_get(local_key, local_generations)
+    if value is not None:
+        _record(None, name, 'local_hits')
+        return value
+
+    if not redis_client or not shared:
+        return _compute_local(name, local_key, local_generations, ttl, compute)
+
+    try:
+        # Generations are read before computing, so a bump that lands while
+        # compute() runs leaves this result under a key nobody reads again.
+        generations = redis_client.mget([GENERATION_KEY.format(tag) for tag in tags])
+        key = ENTRY_KEY.format(name, '.'.join(g or '0' for g in generations))
+        cached, latest = redis_client.mget([key, LATEST_KEY.format(name)])
+    except redis.RedisError as e:
+        print(f"Warning: cache read failed for {name}: {e}")
+        return _compute_local(name, local_key, local_generations, ttl, compute)
+
+    now = time.time()
+    early = False
+    if cached is not None:
+        payload = json.loads(cached)
+        if not _refresh_now(payload, now):
+            _count(name, 'hits')
+            _local_put(local_key, local_generations, min(ttl, payload['expires'] - now), payload['value'])
+            return payload['value']
+        early = payload['expires'] > now
+        stale = payload
+    else:
+        # Nothing for the current generations; the newest older value can stand in
+        stale = json.loads(latest) if latest is not None else None
+
+    try:
+        token = _acquire(name)
+    except redis.RedisError as e:
+        print(f"Warning: cache lock failed for {name}: {e}")
+        token = None
+    if token is None:
+        if stale is not None:
+            _count(name, 'stale')
+            return stale['value']
+        try:
+            payload = _wait_for(key)
+        except redis.RedisError:
+            payload = None
+        if payload is not None:
+            _count(name, 'hits')
+            _local_put(local_key, local_generations, min(ttl, payload['expires'] - time.time()), payload['value'])
+            return payload['value']
+        # The lock holder is slow or gone; compute without it
+
+    try:
+        started = time.perf_counter()
+        value = compute()
+        delta = time.perf_counter() - started
+    finally:
+        if token is not None:
+            _release(name, token)
+    if value is None:
+        return value
+    _local_put(local_key, local_generations, ttl, value)
+    payload = json.dumps({'value': value, 'delta': delta, 'expires': time.time() + ttl})
+    try:
+        pipe = redis_client.pipeline(transaction=False)
+        # Kept past its expiry so it can be served while the next compute runs
+        pipe.setex(key, ttl + STALE_GRACE, payload)
+        pipe.setex(LATEST_KEY.format(name), ttl + STALE_GRACE, payload)
+        _record(pipe, name, 'misses')
+        if early:
+            _record(pipe, name, 'early')
+        pipe.execute()
+    except redis.RedisError as e:
+        print(f"Warning: cache write failed for {name}: {e}")
+    return value
+
+
+def bump(*tags):
+    """Invalidate every entry that depends on any of `tags`, in every process; call after committing"""
+    _check_tags(tags)
+    _bump_local(tags)
+    if not redis_client:
+        return
+    try:
+        pipe = redis_client.pipeline(transaction=False)
+        for tag in tags:
+            pipe.incr(GENERATION_KEY.format(tag))
+        pipe.publish(INVALIDATE_CHANNEL, json.dumps({'origin': _origin(), 'tags': list(tags)}))
+        pipe.execute()
+    except redis.RedisError as e:
+        print(f"Warning: cache invalidation failed for {', '.join(tags)}: {e}")
+
+
+def stats():
+    """{entry name: {'local_hits', 'hits', 'stale', 'misses', 'early', 'hit_rate'}}
+
+    local_hits are this process's. stale counts callers served the previous
+    value during a recompute; early counts recomputes started before expiry.
+    """
+    raw = dict(_local_stats)
+    if redis_client:
+        try:
+            for field, count in redis_client.hgetall(STATS_KEY).items():
+                raw[field] = raw.get(field, 0) + int(count)
+        except redis.RedisError as e:
+            print(f"Warning: could not read cache stats: {e}")
+
+    result = {}
+    for field, count in raw.items():
+        name, outcome = field.rsplit(':', 1)
+        result.setdefault(name, {'local_hits': 0, 'hits': 0, 'stale': 0, 'misses': 0, 'early': 0})[outcome] = count
+    for entry in result.values():
+        served = entry['local_hits'] + entry['hits'] + entry['stale']
+        total = served + entry['misses']
+        entry['hit_rate'] = round(served / total, 4) if total else 0.0
+    return result
+
+
+def reset_stats():
+    _local_stats.clear()
+    if redis_client:
+        redis_client.delete(STATS_KEY)
@@ -0,0 +1,287 @@
+"""Reservation CSV exports.
+
+Every export is one joined column query read in chunks of CHUNK_ROWS with a
+streaming cursor. Each chunk becomes a DataFrame and all formatting (IST
+shift, durations, costs, N/A placeholders) is done as whole-column
+pandas/NumPy operations, so memory stays bounded by the chunk size and no
+ORM objects are built. The resulting frames can be written to a file or
+streamed as CSV text.
+
+The monthly report can also be written as Parquet (requires pyarrow) with
+typed columns instead of display strings, one row group per UTC day.
+"""
+import os
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+from extensions import db
+from models import User, ParkingLot, ParkingSpot, Reservation
+
+CHUNK_ROWS = 20000
+IST_OFFSET = timedelta(hours=5, minutes=30)
+
+USER_HISTORY_COLUMNS = [
+    'ID', 'Location', 'Address', 'Spot', 'Vehicle', 'Start Time', 'End Time',
+    'Duration', 'Cost', 'Status',
+]
+
+MONTHLY_COLUMNS = [
+    'Booking ID', 'User ID', 'User Name', 'User Email', 'User Phone',
+    'Parking Lot', 'Lot Address', 'Spot Number', 'Vehicle Number',
+    'Booking Time', 'Parked In Time', 'Released Time', 'Duration', 'Cost',
+    'Status', 'Updated At',
+]
+
+EXPORT_FORMATS = ('csv', 'parquet')
+
+
+def start_of_month(now=None):
+    now = now or datetime.utcnow()
+    return now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+# --- column formatters -----------------------------------------------------
+
+def local_time(series):
+    """Naive UTC timestamps -> 'YYYY-MM-DD HH:MM:SS IST', 'N/A' where missing"""
+    shifted = pd.to_datetime(series) + IST_OFFSET
+    text = np.datetime_as_string(shifted.to_numpy(dtype='datetime64[s]'), unit='s')
+    text = np.char.add(np.char.replace(text, 'T', ' '), ' IST')
+    return pd.Series(np.where(shifted.isna().to_numpy(), 'N/A', text), index=series.index)
+
+
+def duration_text(start, end, now):
+    """Hours between start and end (or now while still open), as '1.5h' or '-'"""
+    start = pd.to_datetime(start)
+    end = pd.to_datetime(end).fillna(pd.Timestamp(now))
+    hours = ((end - start).dt.total_seconds() / 3600).round(2).fillna(0).to_numpy()
+    return pd.Series(np.where(hours > 0, np.char.add(hours.astype(str), 'h'), '-'), index=start.index)
+
+
+def cost_text(total_cost, parking_cost):
+    """`total_cost or parking_cost or 0` rendered as '₹12.50'"""
+    total = pd.to_numeric(total_cost).fillna(0)
+    parking = pd.to_numeric(parking_cost).fillna(0)
+    cost = total.where(total != 0, parking).to_numpy(dtype=float)
+    return pd.Series(np.char.add('₹', np.char.mod('%.2f', cost)), index=total_cost.index)
+
+
+def or_na(series, present):
+    return series.where(present, 'N/A')
+
+
+# --- layouts -----------------------------------------------------------------
+
+def _joined(*columns):
+    return (
+        db.session.query(*columns)
+        .outerjoin(ParkingSpot, Reservation.spot_id == ParkingSpot.id)
+        .outerjoin(ParkingLot, ParkingSpot.lot_id == ParkingLot.id)
+    )
+
+
+def user_history_query(user_id):
+    return _joined(
+        Reservation.id, Reservation.vehicle_number, Reservation.status,
+        Reservation.parking_timestamp, Reservation.leaving_timestamp, Reservation.released_time,
+        Reservation.total_cost, Reservation.parking_cost,
+        ParkingSpot.spot_number, ParkingLot.name.label('lot_name'), ParkingLot.address,
+    ).filter(Reservation.user_id == user_id).order_by(Reservation.id)
+
+
+def monthly_bookings_query(since):
+    return _joined(
+        Reservation.id, Reservation.vehicle_number, Reservation.status,
+        Reservation.created_at, Reservation.parked_in_time, Reservation.released_time,
+        Reservation.updated_at, Reservation.parking_timestamp, Reservation.leaving_timestamp,
+        Reservation.total_cost, Reservation.parking_cost,
+        User.id.label('user_id'), User.first_name, User.last_name, User.email, User.phone,
+        ParkingSpot.spot_number, ParkingLot.name.label('lot_name'), ParkingLot.address,
+    ).outerjoin(User, Reservation.user_id == User.id).filter(
+        Reservation.created_at >= since
+    ).order_by(Reservation.id)
+
+
+def _user_history_frame(raw, now):
+    has_lot = raw['lot_name'].notna()
+    return pd.DataFrame({
+        'ID': raw['id'],
+        'Location': or_na(raw['lot_name'], has_lot),
+        'Address': or_na(raw['address'], has_lot),
+        'Spot': or_na(raw['spot_number'], raw['spot_number'].notna()),
+        'Vehicle': raw['vehicle_number'].fillna('N/A').replace('', 'N/A'),
+        'Start Time': local_time(raw['parking_timestamp']),
+        'End Time': local_time(raw['released_time'].fillna(raw['leaving_timestamp'])),
+        'Duration': duration_text(raw['parking_timestamp'], raw['leaving_timestamp'], now),
+        'Cost': cost_text(raw['total_cost'], raw['parking_cost']),
+        'Status': raw['status'],
+    }, columns=USER_HISTORY_COLUMNS)
+
+
+def _monthly_frame(raw, now):
+    has_user = raw['user_id'].notna()
+    has_lot = raw['lot_name'].notna()
+    name = (raw['first_name'].fillna('') + ' ' + raw['last_name'].fillna('')).str.strip()
+    return pd.DataFrame({
+        'Booking ID': raw['id'],
+        'User ID': or_na(raw['user_id'].astype('Int64').astype(object), has_user),
+        'User Name': or_na(name, has_user),
+        'User Email': or_na(raw['email'], has_user),
+        'User Phone': or_na(raw['phone'], has_user),
+        'Parking Lot': or_na(raw['lot_name'], has_lot),
+        'Lot Address': or_na(raw['address'], has_lot),
+        'Spot Number': or_na(raw['spot_number'], raw['spot_number'].notna()),
+        'Vehicle Number': raw['vehicle_number'].fillna('N/A').replace('', 'N/A'),
+        'Booking Time': local_time(raw['created_at']),
+        'Parked In Time': local_time(raw['parked_in_time']),
+        'Released Time': local_time(raw['released_time']),
+        'Duration': duration_text(raw['parking_timestamp'], raw['leaving_timestamp'], now),
+        'Cost': cost_text(raw['total_cost'], raw['parking_cost']),
+        'Status': raw['status'],
+        'Updated At': local_time(raw['updated_at']),
+    }, columns=MONTHLY_COLUMNS)
+
+
+def _monthly_typed_frame(raw, now):
+    """Monthly layout with native types, for columnar formats"""
+    start = pd.to_datetime(raw['parking_timestamp'])
+    end = pd.to_datetime(raw['leaving_timestamp']).fillna(pd.Timestamp(now))
+    total = pd.to_numeric(raw['total_cost']).fillna(0)
+    parking = pd.to_numeric(raw['parking_cost']).fillna(0)
+    return pd.DataFrame({
+        'booking_id': raw['id'].astype('int64'),
+        'user_id': raw['user_id'].astype('Int64'),
+        'user_name': (raw['first_name'].fillna('') + ' ' + raw['last_name'].fillna('')).str.strip().where(raw['user_id'].notna()),
+        'user_email': raw['email'],
+        'user_phone': raw['phone'],
+        'lot': raw['lot_name'],
+        'lot_address': raw['address'],
+        'spot_number': raw['spot_number'],
+        'vehicle_number': raw['vehicle_number'],
+        'booking_time': pd.to_datetime(raw['created_at']).dt.tz_localize('UTC'),
+        'parked_in_time': pd.to_datetime(raw['parked_in_time']).dt.tz_localize('UTC'),
+        'released_time': pd.to_datetime(raw['released_time']).dt.tz_localize('UTC'),
+        'duration_hours': ((end - start).dt.total_seconds() / 3600).round(2).clip(lower=0).fillna(0),
+        'cost': total.where(total != 0, parking).astype('float64'),
+        'status': raw['status'],
+        'updated_at': pd.to_datetime(raw['updated_at']).dt.tz_localize('UTC'),
+    })
+
+
+def _parquet_schema(pa):
+    timestamp = pa.timestamp('us', tz='UTC')
+    category = pa.dictionary(pa.int32(), pa.string())
+    return pa.schema([
+        ('booking_id', pa.int64()), ('user_id', pa.int64()), ('user_name', pa.string()),
+        ('user_email', pa.string()), ('user_phone', pa.string()), ('lot', category),
+        ('lot_address', pa.string()), ('spot_number', pa.string()), ('vehicle_number', pa.string()),
+        ('booking_time', timestamp), ('parked_in_time', timestamp), ('released_time', timestamp),
+        ('duration_hours', pa.float64()), ('cost', pa.float64()), ('status', category),
+        ('updated_at', timestamp),
+    ])
+
+
+# --- engine ------------------------------------------------------------------
+
+def fetch_frames(query, chunk_rows=CHUNK_ROWS):
+    """Run a column query with a streaming cursor and yield raw DataFrames of up to chunk_rows"""
+    # yield_per (which implies stream_results) keeps the driver from buffering the whole result
+    result = db.session.execute(query.statement, execution_options={'yield_per': chunk_rows})
+    columns = list(result.keys())
+    for rows in result.partitions():
+        yield pd.DataFrame.from_records(rows, columns=columns, coerce_float=True)
+
+
+def user_history_frames(user_id, now=None, chunk_rows=CHUNK_ROWS):
+    now = now or datetime.utcnow()
+    for raw in fetch_frames(user_history_query(user_id), chunk_rows):
+        yield _user_history_frame(raw, now)
+
+
+def monthly_frames(since, now=None, chunk_rows=CHUNK_ROWS):
+    now = now or datetime.utcnow()
+    for raw in fetch_frames(monthly_bookings_query(since), chunk_rows):
+        yield _monthly_frame(raw, now)
+
+
+def monthly_typed_frames(since, now=None, chunk_rows=CHUNK_ROWS):
+    """Typed monthly frames in booking-time order"""
+    now = now or datetime.utcnow()
+    query = monthly_bookings_query(since).order_by(None).order_by(Reservation.created_at, Reservation.id)
+    for raw in fetch_frames(query, chunk_rows):
+        yield _monthly_typed_frame(raw, now)
+
+
+def iter_csv(frames, header):
+    """CSV text for the header and then one string per formatted frame"""
+    yield ','.join(header) + '\n'
+    for frame in frames:
+        yield frame.to_csv(index=False, header=False, lineterminator='\n')
+
+
+def write_csv(path, frames, header):
+    """Write formatted frames to a CSV file and return how many rows were written"""
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    count = 0
+
+    def counted():
+        nonlocal count
+        for frame in frames:
+            count += len(frame)
+            yield frame
+
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        for chunk in iter_csv(counted(), header):
+            f.write(chunk)
+    return count
+
+
+def write_monthly_parquet(path, since, now=None):
+    """Write the monthly report as Parquet, one row group per UTC booking day
+
+    Returns how many rows were written. Raises ImportError without pyarrow.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    schema = _parquet_schema(pa)
+    count = 0
+    with pq.ParquetWriter(path, schema, compression='zstd') as writer:
+        def write_day(frame):
+            nonlocal count
+            table = pa.Table.from_pandas(frame, schema=schema, preserve_index=False)
+            writer.write_table(table, row_group_size=len(frame) or 1)
+            count += len(frame)
+
+        # Rows arrive in booking-time order; a day can straddle two fetched
+        # chunks, so the last (possibly incomplete) day is carried over.
+        pending = None
+        for frame in monthly_typed_frames(since, now):
+            if pending is not None:
+                frame = pd.concat([pending, frame], ignore_index=True)
+            day = frame['booking_time'].dt.floor('D')
+            last_day = day.iloc[-1]
+            for _, group in frame[day < last_day].groupby(day[day < last_day], sort=True):
+                write_day(group)
+            pending = frame[day == last_day]
+        if pending is not None and len(pending):
+            write_day(pending)
+    return count
+
+
+def export_monthly_file(export_format='csv', now=None, directory=os.path.join('static', 'exports')):
+    """Write this month's bookings to `directory` and return (filename, path, row count)"""
+    if export_format not in EXPORT_FORMATS:
+        raise ValueError(f"Unsupported export format '{export_format}'. Use one of: {', '.join(EXPORT_FORMATS)}")
+    now = now or datetime.utcnow()
+    month_start = start_of_month(now)
+    filename = f"monthly_bookings_{now.strftime('%Y_%m')}_{now.strftime('%Y%m%d_%H%M%S')}.{export_format}"
+    path = os.path.join(directory, filename)
+    if export_format == 'parquet':
+        count = write_monthly_parquet(path, month_start, now)
+    else:
+        count = write_csv(path, monthly_frames(month_start, now), MONTHLY_COLUMNS)
+    return filename, path, count
@@ -0,0 +1,124 @@
+"""Write-behind buffer for user.last_login.
+
+Logins record their timestamp in a Redis hash (user id -> ISO timestamp of
+the latest login) instead of committing an UPDATE each, and the
+flush_last_logins Celery task moves the hash into the user table with one
+batched UPDATE per chunk. A row is only ever moved forward in time, so a
+late flush cannot undo a newer login.
+
+Keys:
+    users:last_login           timestamps waiting for the next flush
+    users:last_login:flushing  the batch being flushed; a failed flush leaves
+                               it in place and the next run retries it
+    users:last_login:lock      held by the running flush (SET NX, expires
+                               after LOCK_TTL), so the beat task and readers
+                               never flush at the same time
+
+When Redis is unavailable the login writes last_login directly, as before.
+Readers (reminders, monthly report) call flush() first; the admin analytics
+count may lag by one flush interval.
+"""
+import time
+import uuid
+from datetime import datetime
+
+import redis
+from sqlalchemy import bindparam, or_
+
+from extensions import db, redis_client
+from models import User
+from services import cache
+
+PENDING_KEY = 'users:last_login'
+FLUSHING_KEY = 'users:last_login:flushing'
+LOCK_KEY = 'users:last_login:lock'
+FLUSH_CHUNK = 1000
+LOCK_TTL = 300   # seconds a flush may hold the lock
+LOCK_WAIT = 10   # how long a caller waits for a running flush to finish
+LOCK_POLL = 0.1
+
+
+def record(user, when=None):
+    """Note a login; returns False when it had to be written to the database instead"""
+    when = when or datetime.utcnow()
+    try:
+        redis_client.hset(PENDING_KEY, user.id, when.isoformat())
+        return True
+    except redis.RedisError as e:
+        print(f"Warning: last-login buffer unavailable, writing through: {e}")
+    user.last_login = when
+    db.session.commit()
+    return False
+
+
+def _update_statement():
+    table = User.__table__
+    return table.update().where(
+        table.c.id == bindparam('user_id'),
+        or_(table.c.last_login.is_(None), table.c.last_login < bindparam('ts'))
+    ).values(last_login=bindparam('ts'))
+
+
+def _acquire():
+    """The lock token once no other flush is running, or None after LOCK_WAIT"""
+    token = uuid.uuid4().hex
+    deadline = time.monotonic() + LOCK_WAIT
+    while not redis_client.set(LOCK_KEY, token, nx=True, ex=LOCK_TTL):
+        if time.monotonic() >= deadline:
+            return None
+        time.sleep(LOCK_POLL)
+    return token
+
+
+def _release(token):
+    try:
+        with redis_client.pipeline() as pipe:
+            pipe.watch(LOCK_KEY)
+            if pipe.get(LOCK_KEY) == token:
+                pipe.multi()
+                pipe.delete(LOCK_KEY)
+                pipe.execute()
+    except redis.RedisError:
+        pass  # the lock expires on its own
+
+
+def flush():
+    """Write buffered timestamps to the user table and commit; returns how many were flushed
+
+    Waits for a flush already running elsewhere, then flushes what is left.
+    """
+    try:
+        token = _acquire()
+    except redis.RedisError as e:
+        print(f"Warning: last-login buffer unavailable: {e}")
+        return 0
+    if token is None:
+        print("Warning: another last-login flush is still running; skipping")
+        return 0
+    try:
+        return _flush_locked()
+    finally:
+        _release(token)
+
+
+def _flush_locked():
+    try:
+        if not redis_client.exists(FLUSHING_KEY):
+            try:
+                redis_client.rename(PENDING_KEY, FLUSHING_KEY)
+            except redis.ResponseError:
+                return 0  # nothing buffered
+        pending = redis_client.hgetall(FLUSHING_KEY)
+    except redis.RedisError as e:
+        print(f"Warning: last-login buffer unavailable: {e}")
+        return 0
+
+    rows = [{'user_id': int(user_id), 'ts': datetime.fromisoformat(ts)} for user_id, ts in pending.items()]
+    statement = _update_statement()
+    for i in range(0, len(rows), FLUSH_CHUNK):
+        db.session.execute(statement, rows[i:i + FLUSH_CHUNK])
+    db.session.commit()
+    redis_client.delete(FLUSHING_KEY)
+    if rows:
+        cache.bump('users')
+    return len(rows)
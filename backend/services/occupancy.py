@@ -0,0 +1,169 @@
+"""Occupancy over time, reconstructed from the spot_event log.
+
+Each lot's occupied-spot count is a step function: +1 for every transition
+into 'O', -1 for every transition out of it. The level at the start of a
+range is anchored on the lot's current occupied_spots counter minus every
+change logged since then, so history recorded before the log existed does
+not skew recent curves.
+
+The database reduces the events to two sums per lot and bucket, the net
+change D and the sum of change * time S, in one grouped scan of the
+covering ix_spot_event_lot_created index. The occupied spot-seconds of a
+bucket [e0, e1) starting at level L are then L * (e1 - e0) + D * e1 - S,
+and L is a running sum of D, so the sweep over every lot and bucket is a
+handful of NumPy array operations however many events there are.
+"""
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from extensions import db
+from models import ParkingLot, SpotEvent
+from services import stats
+from services.exports import IST_OFFSET
+
+EPOCH = datetime(1970, 1, 1)
+WEEKDAYS = ('Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun')
+
+_INTO_OCCUPIED = SpotEvent.new_status == 'O'
+_OUT_OF_OCCUPIED = SpotEvent.old_status == 'O'
+_OCCUPANCY_DELTA = db.case([(_INTO_OCCUPIED, 1)], else_=-1)
+
+
+def _epoch_seconds(column):
+    if db.engine.dialect.name == 'postgresql':
+        return db.func.extract('epoch', column)
+    return (db.func.julianday(column) - 2440587.5) * 86400.0
+
+
+def _bucket_index(seconds, step):
+    # seconds >= 0 here, so SQLite's truncating CAST is a floor; PostgreSQL's CAST rounds
+    if db.engine.dialect.name == 'postgresql':
+        return db.cast(db.func.floor(seconds / step), db.Integer)
+    return db.cast(seconds / step, db.Integer)
+
+
+def _to_epoch(value):
+    return (value - EPOCH).total_seconds()
+
+
+def bucket_changes(first, step, until, lot_ids=None):
+    """(lot_id, bucket, net change, sum of change * seconds since `first`) for events in [first, until)"""
+    seconds = _epoch_seconds(SpotEvent.created_at) - _to_epoch(first)
+    bucket = _bucket_index(seconds, step)
+    query = db.session.query(
+        SpotEvent.lot_id, bucket, db.func.sum(_OCCUPANCY_DELTA), db.func.sum(_OCCUPANCY_DELTA * seconds)
+    ).filter(
+        _INTO_OCCUPIED | _OUT_OF_OCCUPIED,
+        SpotEvent.created_at >= first,
+        SpotEvent.created_at < until
+    )
+    if lot_ids is not None:
+        query = query.filter(SpotEvent.lot_id.in_(lot_ids))
+    rows = [tuple(row) for row in query.group_by(SpotEvent.lot_id, bucket)]
+    data = np.array(rows, dtype=np.float64) if rows else np.empty((0, 4))
+    return data[:, 0].astype(np.int64), data[:, 1].astype(np.int64), data[:, 2], data[:, 3]
+
+
+def _lots(since, lot_ids):
+    """{lot_id: (capacity, occupied spots at `since`)}"""
+    query = db.session.query(ParkingLot.id, ParkingLot.number_of_spots, ParkingLot.occupied_spots)
+    changes = db.session.query(SpotEvent.lot_id, db.func.sum(_OCCUPANCY_DELTA)).filter(
+        _INTO_OCCUPIED | _OUT_OF_OCCUPIED,
+        SpotEvent.created_at >= since
+    )
+    if lot_ids is not None:
+        query = query.filter(ParkingLot.id.in_(lot_ids))
+        changes = changes.filter(SpotEvent.lot_id.in_(lot_ids))
+    lots = {lot_id: (capacity or 0, occupied or 0) for lot_id, capacity, occupied in query}
+    for lot_id, change in changes.group_by(SpotEvent.lot_id):
+        if lot_id in lots:
+            capacity, occupied = lots[lot_id]
+            lots[lot_id] = (capacity, occupied - int(change or 0))
+    return lots
+
+
+def _edges(since, until, bucket, offset):
+    """First bucket start and the bucket edges in seconds after it
+
+    Buckets are aligned in UTC+offset and the last one may be partial.
+    """
+    if bucket not in stats.BUCKETS:
+        raise ValueError(f"bucket must be one of: {', '.join(stats.BUCKETS)}")
+    if until <= since:
+        raise ValueError("end must be after start")
+    first = stats.bucket_start(since + offset, bucket) - offset
+    step = stats.BUCKETS[bucket].total_seconds()
+    count = int(np.ceil((until - first).total_seconds() / step))
+    if count > stats.MAX_BUCKETS:
+        raise ValueError(f"range too long for {bucket} buckets (at most {stats.MAX_BUCKETS})")
+    edges = step * np.arange(count + 1, dtype=np.float64)
+    edges[-1] = (until - first).total_seconds()
+    return first, edges
+
+
+def _integrals(since, until, bucket, lot_ids, offset):
+    """(first, edges, lot ids, capacities, occupied spot-seconds per lot and bucket)"""
+    since, until = stats.naive_utc(since), stats.naive_utc(until)
+    first, edges = _edges(since, until, bucket, offset)
+    lots = _lots(first, lot_ids)
+    ids = np.array(sorted(lots), dtype=np.int64)
+    capacity = np.array([lots[i][0] for i in ids], dtype=np.float64)
+    level = np.array([lots[i][1] for i in ids], dtype=np.float64)
+
+    buckets = len(edges) - 1
+    lot_of, bucket_of, change, weighted = bucket_changes(first, stats.BUCKETS[bucket].total_seconds(), until, lot_ids)
+    known = np.isin(lot_of, ids)
+    # Clipping absorbs float rounding of events right on the first or last edge
+    cell = np.searchsorted(ids, lot_of[known]) * buckets + np.clip(bucket_of[known], 0, buckets - 1)
+    shape = (len(ids), buckets)
+    change = np.bincount(cell, weights=change[known], minlength=len(ids) * buckets).reshape(shape)
+    weighted = np.bincount(cell, weights=weighted[known], minlength=len(ids) * buckets).reshape(shape)
+
+    start_level = level[:, None] + np.cumsum(change, axis=1) - change
+    integrals = start_level * np.diff(edges) + change * edges[1:] - weighted
+    return first, edges, ids, capacity, integrals
+
+
+def _rates(occupied, capacity):
+    return np.round(np.divide(occupied, capacity, out=np.zeros_like(occupied), where=capacity > 0), 4)
+
+
+def occupancy_curves(since, until=None, bucket='hour', lot_ids=None):
+    """Average occupied spots and occupancy rate per lot for each UTC hour/day/week bucket"""
+    now = datetime.utcnow()
+    until = min(stats.naive_utc(until), now) if until else now
+    first, edges, ids, capacity, integrals = _integrals(since, until, bucket, lot_ids, offset=timedelta(0))
+    occupied = np.clip(integrals / np.diff(edges), 0, capacity[:, None])
+    rates = _rates(occupied, np.broadcast_to(capacity[:, None], occupied.shape))
+    curves = {
+        int(lot_id): {'capacity': int(capacity[i]), 'occupied': np.round(occupied[i], 3).tolist(), 'rate': rates[i].tolist()}
+        for i, lot_id in enumerate(ids)
+    }
+    starts = [(first + timedelta(seconds=float(t))).isoformat() for t in edges[:-1]]
+    return {'bucket': bucket, 'buckets': starts, 'lots': curves}
+
+
+def hour_of_week_heatmap(since, until=None, lot_ids=None):
+    """Average occupancy rate for each weekday and hour (IST), across the selected lots
+
+    Returns 7 rows (Monday first) of 24 hourly rates; None where no lot had capacity.
+    """
+    now = datetime.utcnow()
+    until = min(stats.naive_utc(until), now) if until else now
+    first, edges, ids, capacity, integrals = _integrals(since, until, 'hour', lot_ids, offset=IST_OFFSET)
+    durations = np.diff(edges)
+    occupied = integrals.sum(axis=0)
+    capacity = capacity.sum() * durations
+
+    local = _to_epoch(first + IST_OFFSET) + edges[:-1]
+    # 1970-01-01 was a Thursday (weekday 3 with Monday as 0)
+    weekday = (np.floor_divide(local, 86400).astype(np.int64) + 3) % 7
+    hour = (np.mod(local, 86400) // 3600).astype(np.int64)
+    cell = weekday * 24 + hour
+    occupied = np.bincount(cell, weights=occupied, minlength=7 * 24)
+    capacity = np.bincount(cell, weights=capacity, minlength=7 * 24)
+    rates = _rates(occupied, capacity)
+    rows = [[float(rates[d * 24 + h]) if capacity[d * 24 + h] > 0 else None for h in range(24)]
+            for d in range(7)]
+    return {'timezone': 'IST', 'days': list(WEEKDAYS), 'rate': rows}
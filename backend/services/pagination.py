@@ -0,0 +1,59 @@
+"""Keyset (cursor) pagination.
+
+Pages are addressed by the (sort value, id) of the last row already seen
+instead of an OFFSET, so fetching page N costs the same as page 1 and no
+COUNT(*) is needed. Cursors are opaque URL-safe strings.
+
+Rows whose sort column is NULL are skipped by the cursor comparison; the
+sort columns used with this helper all have non-null defaults.
+"""
+import base64
+import json
+from datetime import datetime
+
+from extensions import db
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(sort_value, row_id):
+    if isinstance(sort_value, datetime):
+        sort_value = sort_value.isoformat()
+    raw = json.dumps([sort_value, row_id], separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor, sort_col):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        sort_value, row_id = json.loads(raw)
+        if sort_value is not None and isinstance(sort_col.type, db.DateTime):
+            sort_value = datetime.fromisoformat(sort_value)
+        return sort_value, int(row_id)
+    except (ValueError, TypeError, json.JSONDecodeError):
+        raise InvalidCursor('Invalid cursor')
+
+
+def keyset_page(query, sort_col, id_col, cursor=None, per_page=10, descending=True):
+    """Return (items, next_cursor) for the page after `cursor` (None or '' for the first page)"""
+    if cursor:
+        sort_value, last_id = decode_cursor(cursor, sort_col)
+        if descending:
+            query = query.filter(db.or_(sort_col < sort_value, db.and_(sort_col == sort_value, id_col < last_id)))
+        else:
+            query = query.filter(db.or_(sort_col > sort_value, db.and_(sort_col == sort_value, id_col > last_id)))
+
+    if descending:
+        query = query.order_by(sort_col.desc(), id_col.desc())
+    else:
+        query = query.order_by(sort_col.asc(), id_col.asc())
+
+    rows = query.limit(per_page + 1).all()
+    items = rows[:per_page]
+    next_cursor = None
+    if len(rows) > per_page:
+        last = items[-1]
+        next_cursor = encode_cursor(getattr(last, sort_col.key), getattr(last, id_col.key))
+    return items, next_cursor
@@ -0,0 +1,187 @@
+"""Set-based spot provisioning for parking lots.
+
+Spots are inserted with one multi-row INSERT per chunk and removed with
+DELETE ... WHERE id IN (...), never as ORM objects, so a 10,000-spot garage
+costs a few statements rather than 10,000 session operations. Spot numbers
+come either from the lot name ("<lot name>-001", as before) or from a
+template such as "L{level}-{row}{n:02d}" expanded over ranges like
+{"level": "1-3", "row": "A-F", "n": 40}.
+
+Added and removed spots go through services.availability like single
+changes (lot counters, spot_event rows, Redis index). Everything runs in the
+caller's transaction; the caller commits and then rebuilds the lot's
+free-spot index (spot_index.refresh_lot).
+"""
+import re
+from datetime import datetime
+from itertools import product
+from string import Formatter
+
+from extensions import db
+from models import ParkingSpot, Reservation
+from services.availability import spots_status_changed
+
+INSERT_CHUNK = 5000
+DELETE_CHUNK = 500  # ids per IN (...), well below SQLite's bound-parameter limit
+MAX_BULK_SPOTS = 50000
+
+_NUMBER_RANGE = re.compile(r'\s*(\d+)\s*-\s*(\d+)\s*')
+_LETTER_RANGE = re.compile(r'\s*([A-Za-z])\s*-\s*([A-Za-z])\s*')
+
+
+def _range_values(name, spec):
+    """Values for one placeholder: N (1..N), "a-b" (numbers), "A-F" (letters) or a list"""
+    if isinstance(spec, bool):
+        raise ValueError(f"Invalid range for {{{name}}}: {spec!r}")
+    if isinstance(spec, int):
+        values = list(range(1, spec + 1))
+    elif isinstance(spec, list):
+        values = list(spec)
+    elif isinstance(spec, str) and _NUMBER_RANGE.fullmatch(spec):
+        first, last = map(int, _NUMBER_RANGE.fullmatch(spec).groups())
+        values = list(range(first, last + 1))
+    elif isinstance(spec, str) and _LETTER_RANGE.fullmatch(spec):
+        first, last = _LETTER_RANGE.fullmatch(spec).groups()
+        values = [chr(c) for c in range(ord(first), ord(last) + 1)]
+    else:
+        raise ValueError(f"Invalid range for {{{name}}}: {spec!r} (use a count, \"1-40\", \"A-F\" or a list)")
+    if not values:
+        raise ValueError(f"Range for {{{name}}} is empty")
+    return values
+
+
+def expand_template(template, ranges):
+    """Spot numbers for every combination of `ranges`, the template's first placeholder outermost
+
+    expand_template("L{level}-{row}{n:02d}", {"level": "1-2", "row": "A-B", "n": 2})
+    -> ["L1-A01", "L1-A02", "L1-B01", "L1-B02", "L2-A01", ...]
+    """
+    if not template or not isinstance(template, str):
+        raise ValueError("A spot number template is required")
+    ranges = ranges or {}
+    names = []
+    for _, name, _, _ in Formatter().parse(template):
+        if name is not None and name not in names:
+            if not name.isidentifier():
+                raise ValueError(f"Template placeholders must be named, e.g. {{level}}; got {{{name}}}")
+            names.append(name)
+    missing = [name for name in names if name not in ranges]
+    unused = [name for name in ranges if name not in names]
+    if missing or unused:
+        raise ValueError(f"Template placeholders and ranges must match (missing: {', '.join(missing) or '-'}, "
+                         f"unused: {', '.join(unused) or '-'})")
+
+    values = [_range_values(name, ranges[name]) for name in names]
+    total = 1
+    for options in values:
+        total *= len(options)
+    if total > MAX_BULK_SPOTS:
+        raise ValueError(f"Template expands to {total} spots (at most {MAX_BULK_SPOTS})")
+
+    try:
+        numbers = [template.format(**dict(zip(names, combination))) for combination in product(*values)]
+    except (ValueError, TypeError) as e:
+        raise ValueError(f"Cannot format spot numbers with {template!r}: {e}")
+    if len(set(numbers)) != len(numbers):
+        raise ValueError("Template produces duplicate spot numbers; separate the placeholders")
+    limit = ParkingSpot.spot_number.type.length
+    too_long = next((number for number in numbers if len(number) > limit), None)
+    if too_long is not None:
+        raise ValueError(f"Spot number {too_long!r} is longer than {limit} characters")
+    return numbers
+
+
+def default_spot_numbers(lot_name, start, stop):
+    """Numbers for the lot's spots start+1..stop, as lots have always been numbered"""
+    return [f"{lot_name}-{i + 1:03d}" for i in range(start, stop)]
+
+
+def insert_spots(lot_id, spot_numbers, status='A'):
+    """Insert spots in chunks and record them like single adds; returns how many were inserted
+
+    The new ids are read back (ids above the previous maximum, in this lot) so
+    the lot counters, spot_event log and Redis index follow through
+    spots_status_changed.
+    """
+    if not spot_numbers:
+        return 0
+    now = datetime.utcnow()
+    table = ParkingSpot.__table__
+    last_id = db.session.query(db.func.max(ParkingSpot.id)).scalar() or 0
+    for i in range(0, len(spot_numbers), INSERT_CHUNK):
+        db.session.execute(table.insert(), [
+            {'lot_id': lot_id, 'spot_number': number, 'status': status, 'created_at': now, 'updated_at': now}
+            for number in spot_numbers[i:i + INSERT_CHUNK]
+        ])
+    spot_ids = [spot_id for (spot_id,) in db.session.query(ParkingSpot.id).filter(
+        ParkingSpot.lot_id == lot_id, ParkingSpot.id > last_id
+    )]
+    if len(spot_ids) != len(spot_numbers):
+        raise ValueError("Spots were added to the lot concurrently; please try again")
+    spots_status_changed(lot_id, spot_ids, None, status)
+    return len(spot_ids)
+
+
+def spot_count(lot_id):
+    return db.session.query(db.func.count(ParkingSpot.id)).filter(ParkingSpot.lot_id == lot_id).scalar()
+
+
+def remove_spots(lot_id, keep):
+    """Delete the lot's available spots past its first `keep` (by id); occupied ones stay
+
+    Their reservations go too, as the ORM cascade did. Returns how many spots were removed.
+    """
+    if keep > 0:
+        boundary = db.session.query(ParkingSpot.id).filter(ParkingSpot.lot_id == lot_id).order_by(
+            ParkingSpot.id).offset(keep - 1).limit(1).scalar()
+        if boundary is None:
+            return 0
+    else:
+        boundary = 0
+    spot_ids = [spot_id for (spot_id,) in db.session.query(ParkingSpot.id).filter(
+        ParkingSpot.lot_id == lot_id, ParkingSpot.status == 'A', ParkingSpot.id > boundary
+    )]
+
+    removed = 0
+    for i in range(0, len(spot_ids), DELETE_CHUNK):
+        chunk = spot_ids[i:i + DELETE_CHUNK]
+        Reservation.query.filter(Reservation.spot_id.in_(chunk)).delete(synchronize_session=False)
+        removed += ParkingSpot.query.filter(
+            ParkingSpot.id.in_(chunk), ParkingSpot.status == 'A'
+        ).delete(synchronize_session=False)
+    if removed != len(spot_ids):
+        raise ValueError("Spots were booked while the lot was being resized; please try again")
+    spots_status_changed(lot_id, spot_ids, 'A', None)
+    return removed
+
+
+def resize_lot(lot, new_count):
+    """Grow the lot with default-numbered spots or shrink it, and set number_of_spots
+
+    Returns the change in spot count (occupied spots are never removed, so a
+    shrink can fall short of new_count).
+    """
+    if new_count < 0:
+        raise ValueError("Number of spots cannot be negative")
+    current = spot_count(lot.id)
+    if new_count - current > MAX_BULK_SPOTS:
+        raise ValueError(f"Cannot add more than {MAX_BULK_SPOTS} spots at once")
+    if new_count > current:
+        change = insert_spots(lot.id, default_spot_numbers(lot.name, current, new_count))
+    elif new_count < current:
+        change = -remove_spots(lot.id, new_count)
+    else:
+        change = 0
+    lot.number_of_spots = new_count
+    return change
+
+
+def add_template_spots(lot, template, ranges):
+    """Add the template's spots that the lot does not have yet; returns how many were added"""
+    numbers = expand_template(template, ranges)
+    existing = {number for (number,) in db.session.query(ParkingSpot.spot_number).filter(
+        ParkingSpot.lot_id == lot.id
+    )}
+    added = insert_spots(lot.id, [number for number in numbers if number not in existing])
+    lot.number_of_spots = (lot.number_of_spots or 0) + added
+    return added
@@ -0,0 +1,227 @@
+"""Live availability index in Redis.
+
+Keys:
+    lot:<id>:free_spots  set of free spot ids, so auto-assignment is one SPOP
+    lots:availability    hash of "<lot_id>:A" / "<lot_id>:O" spot counters
+    lots:meta            hash of lot_id -> JSON lot fields (plus a build marker)
+
+Lot listings combine the lot fields (cached in-process, see services.cache)
+with the availability hash, so a listing is a single HGETALL.
+The database stays authoritative: popped spots are still claimed with a
+conditional UPDATE, and `reconcile()` repairs any drift.
+"""
+import json
+
+import redis
+
+from extensions import db, redis_client
+from models import ParkingLot, ParkingSpot
+from services import cache
+
+AVAILABILITY_KEY = 'lots:availability'
+META_KEY = 'lots:meta'
+BUILT_FIELD = '__built__'
+REBUILD_CHUNK = 5000
+COUNTED_STATUSES = ('A', 'O')
+
+
+def free_spots_key(lot_id):
+    return f"lot:{lot_id}:free_spots"
+
+
+def lot_meta(lot):
+    """Static part of ParkingLot.to_dict(); the counters come from AVAILABILITY_KEY"""
+    data = lot.to_dict()
+    data.pop('available_spots')
+    data.pop('occupied_spots')
+    return data
+
+
+def pop_free_spot(lot_id):
+    """Remove and return a random free spot id for the lot, or None"""
+    if not redis_client:
+        return None
+    try:
+        spot_id = redis_client.spop(free_spots_key(lot_id))
+    except redis.RedisError as e:
+        print(f"Warning: free-spot index unavailable: {e}")
+        return None
+    return int(spot_id) if spot_id is not None else None
+
+
+def mark_free(lot_id, spot_id):
+    if redis_client:
+        try:
+            redis_client.sadd(free_spots_key(lot_id), spot_id)
+        except redis.RedisError as e:
+            # reconcile() puts the spot back
+            print(f"Warning: free-spot index update failed: {e}")
+
+
+def apply(changes):
+    """Apply committed (lot_id, spot_id, old_status, new_status) changes in one pipeline"""
+    if not redis_client or not changes:
+        return
+    pipe = redis_client.pipeline(transaction=True)
+    for lot_id, spot_id, old_status, new_status in changes:
+        if new_status == 'A':
+            pipe.sadd(free_spots_key(lot_id), spot_id)
+        else:
+            pipe.srem(free_spots_key(lot_id), spot_id)
+        if old_status in COUNTED_STATUSES:
+            pipe.hincrby(AVAILABILITY_KEY, f"{lot_id}:{old_status}", -1)
+        if new_status in COUNTED_STATUSES:
+            pipe.hincrby(AVAILABILITY_KEY, f"{lot_id}:{new_status}", 1)
+    pipe.execute()
+
+
+def drop_lot(lot_id):
+    if redis_client:
+        pipe = redis_client.pipeline(transaction=True)
+        pipe.delete(free_spots_key(lot_id))
+        pipe.hdel(AVAILABILITY_KEY, f"{lot_id}:A", f"{lot_id}:O")
+        pipe.hdel(META_KEY, lot_id)
+        pipe.execute()
+
+
+def _lot_meta_map():
+    meta = redis_client.hgetall(META_KEY)
+    if BUILT_FIELD not in meta:
+        return None
+    return {lot_id: json.loads(payload) for lot_id, payload in meta.items() if lot_id != BUILT_FIELD}
+
+
+def lot_listing():
+    """All lots as ParkingLot.to_dict() payloads, or None when the index is not built or unreachable
+
+    The lot fields only change on lot edits, so they are kept in the local cache
+    tier; each call reads just the availability counters from Redis.
+    """
+    if not redis_client:
+        return None
+    try:
+        meta = cache.get_or_compute('lot_meta', ('lots',), cache.LOCAL_TTL, _lot_meta_map, shared=False)
+        if meta is None:
+            return None
+        counts = redis_client.hgetall(AVAILABILITY_KEY)
+    except redis.RedisError as e:
+        print(f"Warning: availability index unavailable: {e}")
+        return None
+    if meta and not counts:
+        return None
+
+    lots = []
+    for lot_id, fields in meta.items():
+        data = dict(fields)
+        data['available_spots'] = int(counts.get(f"{lot_id}:A", 0))
+        data['occupied_spots'] = int(counts.get(f"{lot_id}:O", 0))
+        lots.append(data)
+    lots.sort(key=lambda data: data['id'])
+    return lots
+
+
+def rebuild(lot_id=None):
+    """Rebuild the index from the database (cold start, lot edits, drift repair).
+
+    Free-spot sets are filled under a temporary key and swapped in with RENAME,
+    and everything is written in one MULTI, so readers never see a half-built lot.
+    """
+    if not redis_client:
+        return 0
+
+    lots = ParkingLot.query.all() if lot_id is None else ParkingLot.query.filter_by(id=lot_id).all()
+    query = db.session.query(ParkingSpot.lot_id, ParkingSpot.id, ParkingSpot.status).filter(
+        ParkingSpot.status.in_(COUNTED_STATUSES)
+    )
+    if lot_id is not None:
+        query = query.filter(ParkingSpot.lot_id == lot_id)
+
+    free = {lot.id: [] for lot in lots}
+    counts = {}
+    for spot_lot_id, spot_id, status in query:
+        if status == 'A':
+            free.setdefault(spot_lot_id, []).append(spot_id)
+        counts[(spot_lot_id, status)] = counts.get((spot_lot_id, status), 0) + 1
+
+    pipe = redis_client.pipeline(transaction=True)
+    if lot_id is None:
+        pipe.delete(AVAILABILITY_KEY, META_KEY)
+    elif not lots:
+        pipe.delete(free_spots_key(lot_id))
+        pipe.hdel(AVAILABILITY_KEY, f"{lot_id}:A", f"{lot_id}:O")
+        pipe.hdel(META_KEY, lot_id)
+    for lot in lots:
+        key = free_spots_key(lot.id)
+        tmp_key = key + ':rebuild'
+        spot_ids = free.get(lot.id, [])
+        pipe.delete(tmp_key)
+        for i in range(0, len(spot_ids), REBUILD_CHUNK):
+            pipe.sadd(tmp_key, *spot_ids[i:i + REBUILD_CHUNK])
+        if spot_ids:
+            pipe.rename(tmp_key, key)
+        else:
+            pipe.delete(key)
+        pipe.hset(AVAILABILITY_KEY, mapping={
+            f"{lot.id}:{status}": counts.get((lot.id, status), 0) for status in COUNTED_STATUSES
+        })
+        pipe.hset(META_KEY, lot.id, json.dumps(lot_meta(lot)))
+    pipe.hset(META_KEY, BUILT_FIELD, 1)
+    pipe.execute()
+    return sum(len(spot_ids) for spot_ids in free.values())
+
+
+def refresh_lot(lot_id):
+    """rebuild(lot_id) after a lot change has committed (a deleted lot is dropped)
+
+    Redis failures are only reported: the database change stands and
+    reconcile() repairs the lot on its next run.
+    """
+    try:
+        rebuild(lot_id)
+    except redis.RedisError as e:
+        print(f"Warning: free-spot index refresh failed for lot {lot_id}: {e}")
+
+
+def reconcile():
+    """Compare the Redis counters with the database and rebuild lots that drifted"""
+    if not redis_client:
+        return []
+
+    expected = {}
+    rows = db.session.query(ParkingSpot.lot_id, ParkingSpot.status, db.func.count(ParkingSpot.id)).filter(
+        ParkingSpot.status.in_(COUNTED_STATUSES)
+    ).group_by(ParkingSpot.lot_id, ParkingSpot.status)
+    for lot_id, status, total in rows:
+        expected[(lot_id, status)] = total
+
+    pipe = redis_client.pipeline(transaction=False)
+    pipe.hgetall(AVAILABILITY_KEY)
+    pipe.hgetall(META_KEY)
+    lots = ParkingLot.query.all()
+    lot_ids = [lot.id for lot in lots]
+    for lot_id in lot_ids:
+        pipe.scard(free_spots_key(lot_id))
+    counts, meta, *free_sizes = pipe.execute()
+
+    if BUILT_FIELD not in meta:
+        rebuild()
+        return lot_ids
+
+    drifted = []
+    for lot, free_size in zip(lots, free_sizes):
+        lot_id = lot.id
+        available = expected.get((lot_id, 'A'), 0)
+        occupied = expected.get((lot_id, 'O'), 0)
+        # Lot fields too: an edit whose refresh_lot() failed leaves the old ones behind
+        if (str(lot_id) not in meta or json.loads(meta[str(lot_id)]) != lot_meta(lot)
+                or free_size != available
+                or int(counts.get(f"{lot_id}:A", 0)) != available
+                or int(counts.get(f"{lot_id}:O", 0)) != occupied):
+            rebuild(lot_id)
+            drifted.append(lot_id)
+
+    stale = {field for field in meta if field != BUILT_FIELD} - {str(lot_id) for lot_id in lot_ids}
+    for lot_id in stale:
+        drop_lot(lot_id)
+        drifted.append(int(lot_id))
+    return drifted
@@ -0,0 +1,254 @@
+"""Reservation totals backed by the daily_lot_stats rollup.
+
+refresh() recomputes the per-lot rows of every UTC day that changed since
+its previous run (new days, plus days whose reservations were updated),
+scanning each run of consecutive dirty days with one grouped range query.
+Readers sum the rollup rows for complete days and only query reservation
+directly for what came after the last refresh (normally just today), using
+range predicates on created_at so ix_reservation_created_at applies.
+timeseries() buckets the raw rows by hour, day or week for charts.
+"""
+from datetime import date, datetime, time, timedelta, timezone
+
+from extensions import db
+from models import ParkingSpot, Reservation, DailyLotStats
+
+# Re-read a little before the previous run to catch rows committed while it ran
+REFRESH_OVERLAP = timedelta(minutes=5)
+
+
+def day_start(value):
+    """Midnight (UTC, naive) of a date or datetime"""
+    if isinstance(value, datetime):
+        value = value.date()
+    return datetime.combine(value, time.min)
+
+
+def naive_utc(value):
+    # Columns hold naive UTC; convert aware inputs (e.g. "...+05:30")
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def _as_date(value):
+    # func.date() returns a string on SQLite and a date elsewhere
+    return date.fromisoformat(value) if isinstance(value, str) else value
+
+
+def _hours_between(start, end):
+    if db.engine.dialect.name == 'postgresql':
+        return db.func.extract('epoch', end - start) / 3600.0
+    return (db.func.julianday(end) - db.func.julianday(start)) * 24.0
+
+
+def _occupied_hours():
+    """Hours parked, for bookings that have ended"""
+    return db.case(
+        [(Reservation.leaving_timestamp != None,
+          _hours_between(Reservation.parking_timestamp, Reservation.leaving_timestamp))],
+        else_=0.0
+    )
+
+
+def _raw_lot_day_totals(start, end):
+    """(day, lot_id, reservations, revenue, occupied_hours, unique_users) from reservation"""
+    day = db.func.date(Reservation.created_at)
+    query = db.session.query(
+        day, ParkingSpot.lot_id, db.func.count(Reservation.id), db.func.sum(Reservation.parking_cost),
+        db.func.sum(_occupied_hours()), db.func.count(db.distinct(Reservation.user_id))
+    ).join(ParkingSpot, Reservation.spot_id == ParkingSpot.id).filter(
+        Reservation.created_at >= start,
+        Reservation.created_at < end
+    ).group_by(day, ParkingSpot.lot_id)
+    for row_day, lot_id, count, revenue, occupied, users in query:
+        yield _as_date(row_day), lot_id, count, float(revenue or 0), float(occupied or 0), users
+
+
+def _day_ranges(days):
+    """[start, end) datetime ranges covering the sorted dates `days`, one per run of consecutive days"""
+    ranges = []
+    for d in days:
+        start = day_start(d)
+        if ranges and ranges[-1][1] == start:
+            ranges[-1][1] = start + timedelta(days=1)
+        else:
+            ranges.append([start, start + timedelta(days=1)])
+    return ranges
+
+
+def last_refresh():
+    return db.session.query(db.func.max(DailyLotStats.computed_at)).scalar()
+
+
+def refresh(now=None, full=False):
+    """Bring daily_lot_stats up to date for every complete day; returns the days recomputed
+
+    Runs in the caller's transaction; the caller commits.
+    """
+    now = now or datetime.utcnow()
+    today = day_start(now)
+    previous = None if full else last_refresh()
+
+    if previous is None:
+        first = db.session.query(db.func.min(Reservation.created_at)).scalar()
+        if first is None or first >= today:
+            return []
+        dirty = {first.date() + timedelta(days=i) for i in range((today.date() - first.date()).days)}
+        DailyLotStats.query.delete(synchronize_session=False)
+    else:
+        # Days that were still in progress at the previous run, plus any day with updated bookings
+        dirty = {previous.date() + timedelta(days=i) for i in range((today.date() - previous.date()).days)}
+        # Filtered on updated_at alone so ix_reservation_updated_at is used; today is dropped below
+        touched = db.session.query(db.func.date(Reservation.created_at)).filter(
+            Reservation.updated_at >= previous - REFRESH_OVERLAP
+        ).distinct()
+        dirty.update(_as_date(d) for (d,) in touched)
+    dirty = sorted(d for d in dirty if d < today.date())
+    if not dirty:
+        _restamp(previous, now)
+        return []
+
+    # Only the dirty days are scanned: scattered updates to old days stay cheap
+    rows = [
+        {'day': d, 'lot_id': lot_id, 'reservations': count, 'revenue': revenue,
+         'occupied_hours': occupied, 'unique_users': users, 'computed_at': now}
+        for start, end in _day_ranges(dirty)
+        for d, lot_id, count, revenue, occupied, users in _raw_lot_day_totals(start, end)
+    ]
+    DailyLotStats.query.filter(DailyLotStats.day.in_(dirty)).delete(synchronize_session=False)
+    if rows:
+        db.session.execute(DailyLotStats.__table__.insert(), rows)
+    else:
+        _restamp(previous, now)
+    return dirty
+
+
+def _restamp(previous, now):
+    """Advance the refresh watermark (max computed_at) when a run had nothing to write"""
+    if previous is not None:
+        DailyLotStats.query.filter(DailyLotStats.computed_at == previous).update(
+            {'computed_at': now}, synchronize_session=False
+        )
+
+
+def lot_totals(since, now=None):
+    """{lot_id: {'reservations', 'revenue', 'occupied_hours'}} for bookings created since `since`
+
+    `since` should fall on a UTC day boundary (e.g. the start of the month).
+    """
+    now = now or datetime.utcnow()
+    since = day_start(since)
+    previous = last_refresh()
+    boundary = min(day_start(previous), day_start(now)) if previous else since
+    boundary = max(boundary, since)
+
+    totals = {}
+
+    def add(lot_id, count, revenue, occupied):
+        entry = totals.setdefault(lot_id, {'reservations': 0, 'revenue': 0.0, 'occupied_hours': 0.0})
+        entry['reservations'] += int(count or 0)
+        entry['revenue'] += float(revenue or 0)
+        entry['occupied_hours'] += float(occupied or 0)
+
+    if boundary > since:
+        rolled = db.session.query(
+            DailyLotStats.lot_id, db.func.sum(DailyLotStats.reservations),
+            db.func.sum(DailyLotStats.revenue), db.func.sum(DailyLotStats.occupied_hours)
+        ).filter(
+            DailyLotStats.day >= since.date(),
+            DailyLotStats.day < boundary.date()
+        ).group_by(DailyLotStats.lot_id)
+        for row in rolled:
+            add(*row)
+
+    # Raw delta: only bookings created after the last refresh
+    delta = db.session.query(
+        ParkingSpot.lot_id, db.func.count(Reservation.id),
+        db.func.sum(Reservation.parking_cost), db.func.sum(_occupied_hours())
+    ).join(ParkingSpot, Reservation.spot_id == ParkingSpot.id).filter(
+        Reservation.created_at >= boundary
+    ).group_by(ParkingSpot.lot_id)
+    for row in delta:
+        add(*row)
+    return totals
+
+
+def period_totals(since, now=None):
+    """Reservations, revenue and occupied hours across all lots since `since`"""
+    result = {'reservations': 0, 'revenue': 0.0, 'occupied_hours': 0.0}
+    for entry in lot_totals(since, now).values():
+        for key in result:
+            result[key] += entry[key]
+    return result
+
+
+def revenue_between(start, end):
+    """Raw revenue for bookings created in [start, end), e.g. today so far"""
+    return float(db.session.query(db.func.sum(Reservation.parking_cost)).filter(
+        Reservation.created_at >= start,
+        Reservation.created_at < end
+    ).scalar() or 0)
+
+
+BUCKETS = {'hour': timedelta(hours=1), 'day': timedelta(days=1), 'week': timedelta(weeks=1)}
+MAX_BUCKETS = 2000
+
+
+def bucket_start(value, bucket):
+    """Start of the hour, day or week (weeks start on Monday) containing `value`"""
+    if bucket == 'hour':
+        return value.replace(minute=0, second=0, microsecond=0)
+    start = day_start(value)
+    if bucket == 'week':
+        start -= timedelta(days=start.weekday())
+    return start
+
+
+def _bucket_expr(column, bucket):
+    if db.engine.dialect.name == 'postgresql':
+        return db.func.date_trunc(bucket, column)
+    if bucket == 'hour':
+        return db.func.strftime('%Y-%m-%d %H:00:00', column)
+    if bucket == 'day':
+        return db.func.strftime('%Y-%m-%d 00:00:00', column)
+    # 'weekday 0' moves to the coming Sunday (or stays on one); back 6 days is its Monday
+    return db.func.strftime('%Y-%m-%d 00:00:00', column, 'weekday 0', '-6 days')
+
+
+def timeseries(start, end, bucket='day', lot_id=None):
+    """Reservations and revenue per UTC hour/day/week for bookings created in [start, end)
+
+    One grouped query over the raw rows; buckets without bookings are filled with zeros.
+    """
+    if bucket not in BUCKETS:
+        raise ValueError(f"bucket must be one of: {', '.join(BUCKETS)}")
+    start, end = naive_utc(start), naive_utc(end)
+    if end <= start:
+        raise ValueError("end must be after start")
+    first = bucket_start(start, bucket)
+    if (end - first) / BUCKETS[bucket] > MAX_BUCKETS:
+        raise ValueError(f"range too long for {bucket} buckets (at most {MAX_BUCKETS})")
+
+    key = _bucket_expr(Reservation.created_at, bucket)
+    query = db.session.query(
+        key, db.func.count(Reservation.id), db.func.sum(Reservation.parking_cost)
+    ).filter(
+        Reservation.created_at >= start,
+        Reservation.created_at < end
+    )
+    if lot_id is not None:
+        query = query.join(ParkingSpot, Reservation.spot_id == ParkingSpot.id).filter(ParkingSpot.lot_id == lot_id)
+    totals = {}
+    for row_bucket, count, revenue in query.group_by(key):
+        if isinstance(row_bucket, str):
+            row_bucket = datetime.fromisoformat(row_bucket)
+        totals[row_bucket.replace(tzinfo=None)] = (count, float(revenue or 0))
+
+    series = []
+    current = first
+    while current < end:
+        count, revenue = totals.get(current, (0, 0.0))
+        series.append({'bucket': current.isoformat(), 'reservations': count, 'revenue': revenue})
+        current += BUCKETS[bucket]
+    return series
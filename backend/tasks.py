@@ -1,13 +1,9 @@
 from celery import Celery
+from flask import has_app_context
 from extensions import celery, redis_client, db
 from models import User, Reservation, ParkingLot
 from datetime import datetime, timedelta
-import pandas as pd
 import json
-from reportlab.lib import colors
-from reportlab.lib.pagesizes import letter
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
-from reportlab.lib.styles import getSampleStyleSheet
 import os
 
 # Configure Celery
@@ -19,12 +15,50 @@ celery.conf.update(
     result_serializer='json',
     timezone='UTC',
     enable_utc=True,
+    beat_schedule={
+        'reconcile-availability-index': {
+            'task': 'tasks.reconcile_availability_index',
+            'schedule': 300.0,
+        },
+        'refresh-daily-stats': {
+            'task': 'tasks.refresh_daily_stats',
+            'schedule': 600.0,
+        },
+        'flush-last-logins': {
+            'task': 'tasks.flush_last_logins',
+            'schedule': 60.0,
+        },
+        'rebuild-daily-stats': {
+            'task': 'tasks.refresh_daily_stats',
+            'schedule': 86400.0,
+            'kwargs': {'full': True},
+        },
+    },
 )
 
+
+class ContextTask(celery.Task):
+    """Run tasks inside a Flask app context so models, the session and mail work in the worker"""
+    _flask_app = None
+
+    def __call__(self, *args, **kwargs):
+        if has_app_context():
+            return self.run(*args, **kwargs)
+        if ContextTask._flask_app is None:
+            from app import create_app
+            ContextTask._flask_app = create_app()
+        with ContextTask._flask_app.app_context():
+            return self.run(*args, **kwargs)
+
+
+celery.Task = ContextTask
+
 @celery.task
 def send_daily_reminders():
     """Send daily reminders to inactive users"""
     try:
+        from services import last_login
+        last_login.flush()
         # Find users who haven't logged in for 7 days
         week_ago = datetime.utcnow() - timedelta(days=7)
         inactive_users = User.query.filter(
@@ -49,13 +83,17 @@ def generate_monthly_report():
         now = datetime.utcnow()
         start_of_month = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
         
-        total_reservations = Reservation.query.filter(
-            Reservation.created_at >= start_of_month
-        ).count()
+        from services import last_login, stats
+        last_login.flush()
+        # Loaded here so worker start-up does not pay for reportlab
+        from reportlab.lib import colors
+        from reportlab.lib.pagesizes import letter
+        from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
+        from reportlab.lib.styles import getSampleStyleSheet
         
-        total_revenue = db.session.query(db.func.sum(Reservation.parking_cost)).filter(
-            Reservation.created_at >= start_of_month
-        ).scalar() or 0
+        month_totals = stats.period_totals(start_of_month, now)
+        total_reservations = month_totals['reservations']
+        total_revenue = month_totals['revenue']
         
         active_users = User.query.filter(
             User.last_login >= start_of_month,
@@ -111,66 +149,29 @@ def generate_monthly_report():
             'total_revenue': total_revenue,
             'active_users': active_users
         }
-        redis_client.setex(f"monthly_report:{now.strftime('%Y_%m')}", 2592000, json.dumps(report_info))  # 30 days
+        if redis_client:
+            redis_client.setex(f"monthly_report:{now.strftime('%Y_%m')}", 2592000, json.dumps(report_info))  # 30 days
         
         return f"Monthly report generated: {report_filename}"
     except Exception as e:
         return f"Error generating monthly report: {str(e)}"
 
 @celery.task
-def export_user_data_csv(user_id):
-    """Export user's parking history to CSV"""
+def export_user_data_csv(user_id, send_email=False):
+    """Export user's parking history to CSV, optionally emailing it to the user"""
     try:
         user = User.query.get(user_id)
         if not user:
             return f"User {user_id} not found"
         
         
-        reservations = Reservation.query.filter_by(user_id=user_id).all()
+        from services import exports
         
-        # Prepare data for CSV
-        data = []
-        for reservation in reservations:
-            spot = reservation.parking_spot
-            lot = spot.parking_lot if spot else None
-            
-            def format_local_time(utc_timestamp):
-                if not utc_timestamp:
-                    return 'N/A'
-                
-                local_time = utc_timestamp + timedelta(hours=5, minutes=30)
-                return local_time.strftime('%Y-%m-%d %H:%M:%S IST')
-            
-            duration = reservation.calculate_duration()
-            duration_str = f"{duration}h" if duration > 0 else "-"
-            
-            cost = reservation.total_cost or reservation.parking_cost or 0
-            cost_str = f"₹{cost:.2f}"
-            
-            data.append({
-                'ID': reservation.id,
-                'Location': lot.name if lot else 'N/A',
-                'Address': lot.address if lot else 'N/A',
-                'Spot': spot.spot_number if spot else 'N/A',
-                'Vehicle': reservation.vehicle_number or 'N/A',
-                'Start Time': format_local_time(reservation.parking_timestamp),
-                'End Time': format_local_time(reservation.released_time or reservation.leaving_timestamp),
-                'Duration': duration_str,
-                'Cost': cost_str,
-                'Status': reservation.status
-            })
-        
-        
-        df = pd.DataFrame(data)
         csv_filename = f"user_{user_id}_parking_history_{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}.csv"
         csv_path = os.path.join('static', 'exports', csv_filename)
+        count = exports.write_csv(csv_path, exports.user_history_frames(user_id), exports.USER_HISTORY_COLUMNS)
         
-        
-        os.makedirs(os.path.dirname(csv_path), exist_ok=True)
-        
-        df.to_csv(csv_path, index=False)
-        
-        print(f"CSV export completed: {csv_filename} with {len(data)} records")
+        print(f"CSV export completed: {csv_filename} with {count} records")
         
         # Store export info in Redis
         export_info = {
@@ -178,9 +179,22 @@ def export_user_data_csv(user_id):
             'path': csv_path,
             'user_id': user_id,
             'generated_at': datetime.utcnow().isoformat(),
-            'record_count': len(data)
+            'record_count': count
         }
-        redis_client.setex(f"csv_export:{user_id}:{datetime.utcnow().strftime('%Y%m%d')}", 86400, json.dumps(export_info))  # 24 hours
+        if redis_client:
+            redis_client.setex(f"csv_export:{user_id}:{datetime.utcnow().strftime('%Y%m%d')}", 86400, json.dumps(export_info))  # 24 hours
+        
+        if send_email:
+            from flask_mail import Message
+            from extensions import mail
+            with open(csv_path, 'rb') as f:
+                msg = Message(
+                    subject="Your Parking History Report",
+                    recipients=[user.email],
+                    body="Attached is your parking history report as requested. All timestamps are in Indian Standard Time (IST)."
+                )
+                msg.attach(csv_filename, "text/csv", f.read())
+                mail.send(msg)
         
         return f"CSV export completed: {csv_filename}"
     except Exception as e:
@@ -188,87 +202,84 @@ def export_user_data_csv(user_id):
         return f"Error exporting CSV: {str(e)}"
 
 @celery.task
-def export_monthly_bookings_csv():
-    """Export monthly booking data as CSV with detailed information"""
+def export_monthly_bookings_csv(export_format='csv'):
+    """Export monthly booking data as CSV (or typed Parquet) with detailed information"""
     try:
         
-        now = datetime.utcnow()
-        start_of_month = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-        
-        
-        reservations = Reservation.query.filter(
-            Reservation.created_at >= start_of_month
-        ).all()
-        
+        from services import exports
         
-        data = []
-        for reservation in reservations:
-            spot = reservation.parking_spot
-            lot = spot.parking_lot if spot else None
-            user = reservation.user
-            
-            def format_local_time(utc_timestamp):
-                if not utc_timestamp:
-                    return 'N/A'
-                
-                local_time = utc_timestamp + timedelta(hours=5, minutes=30)
-                return local_time.strftime('%Y-%m-%d %H:%M:%S IST')
-            
-            
-            duration = reservation.calculate_duration()
-            duration_str = f"{duration}h" if duration > 0 else "-"
-            
-            
-            cost = reservation.total_cost or reservation.parking_cost or 0
-            cost_str = f"₹{cost:.2f}"
-            
-            data.append({
-                'Booking ID': reservation.id,
-                'User ID': user.id if user else 'N/A',
-                'User Name': f"{user.first_name} {user.last_name}".strip() if user else 'N/A',
-                'User Email': user.email if user else 'N/A',
-                'User Phone': user.phone if user else 'N/A',
-                'Parking Lot': lot.name if lot else 'N/A',
-                'Lot Address': lot.address if lot else 'N/A',
-                'Spot Number': spot.spot_number if spot else 'N/A',
-                'Vehicle Number': reservation.vehicle_number or 'N/A',
-                'Booking Time': format_local_time(reservation.created_at),
-                
-                'Parked In Time': format_local_time(reservation.parked_in_time),
-                'Released Time': format_local_time(reservation.released_time),
-                'Duration': duration_str,
-                'Cost': cost_str,
-                'Status': reservation.status,
-                'Updated At': format_local_time(reservation.updated_at)
-            })
-        
-        
-        df = pd.DataFrame(data)
-        csv_filename = f"monthly_bookings_{now.strftime('%Y_%m')}_{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}.csv"
-        csv_path = os.path.join('static', 'exports', csv_filename)
-        
-        
-        os.makedirs(os.path.dirname(csv_path), exist_ok=True)
-        
-        df.to_csv(csv_path, index=False)
+        now = datetime.utcnow()
+        filename, path, count = exports.export_monthly_file(export_format, now)
         
-        print(f"Monthly CSV export completed: {csv_filename} with {len(data)} records")
+        print(f"Monthly {export_format.upper()} export completed: {filename} with {count} records")
         
         # Store export info in Redis
         export_info = {
-            'filename': csv_filename,
-            'path': csv_path,
+            'filename': filename,
+            'path': path,
             'generated_at': datetime.utcnow().isoformat(),
-            'record_count': len(data),
+            'record_count': count,
+            'format': export_format,
             'month': now.strftime('%Y_%m')
         }
-        redis_client.setex(f"monthly_csv_export:{now.strftime('%Y_%m')}", 2592000, json.dumps(export_info))  # 30 days
+        if redis_client:
+            redis_client.setex(f"monthly_csv_export:{now.strftime('%Y_%m')}", 2592000, json.dumps(export_info))  # 30 days
         
-        return f"Monthly bookings CSV export completed: {csv_filename}"
+        return f"Monthly bookings CSV export completed: {filename}"
     except Exception as e:
         print(f"Error exporting monthly CSV: {str(e)}")
         return f"Error exporting monthly CSV: {str(e)}"
 
+@celery.task
+def rebuild_free_spot_index(lot_id=None):
+    """Rebuild the Redis free-spot sets used for auto-assignment from the database"""
+    try:
+        from services import spot_index
+        free_spots = spot_index.rebuild(lot_id)
+        return f"Free-spot index rebuilt: {free_spots} free spots"
+    except Exception as e:
+        return f"Error rebuilding free-spot index: {str(e)}"
+
+@celery.task
+def reconcile_availability_index():
+    """Repair drift between the stored/Redis availability counters and parking_spot"""
+    try:
+        from services import spot_index
+        ParkingLot.recount_spots()
+        db.session.commit()
+        drifted = spot_index.reconcile()
+        return f"Availability index reconciled: {len(drifted)} lots repaired"
+    except Exception as e:
+        db.session.rollback()
+        return f"Error reconciling availability index: {str(e)}"
+
+@celery.task
+def refresh_daily_stats(full=False):
+    """Roll completed days of reservations up into daily_lot_stats
+
+    Incremental by default; full=True recomputes every day, which also picks up
+    reservations removed together with their spot.
+    """
+    try:
+        from services import stats
+        days = stats.refresh(full=full)
+        db.session.commit()
+        return f"Daily stats refreshed for {len(days)} days"
+    except Exception as e:
+        db.session.rollback()
+        return f"Error refreshing daily stats: {str(e)}"
+
+@celery.task
+def flush_last_logins():
+    """Write the buffered login timestamps to user.last_login in batched UPDATEs"""
+    try:
+        from services import last_login
+        flushed = last_login.flush()
+        return f"Last logins flushed for {flushed} users"
+    except Exception as e:
+        db.session.rollback()
+        return f"Error flushing last logins: {str(e)}"
+
 @celery.task
 def cleanup_old_data():
     """Clean up old data and cache entries"""
@@ -51,8 +51,9 @@ export const adminAPI = {
   getUsers: () => api.get('/admin/users'),
   toggleUserStatus: (userId) => api.post(`/admin/users/${userId}/toggle-status`, {}),
   getAnalytics: () => api.get('/admin/analytics'),
+  getAnalyticsTimeseries: (params = {}) => api.get('/admin/analytics/timeseries', { params }),
   generateMonthlyReport: () => api.post('/admin/reports/generate-monthly', {}),
-  exportMonthlyCSV: () => api.post('/admin/reports/export-monthly-csv', {}),
+  exportMonthlyCSV: (format = 'csv') => api.post('/admin/reports/export-monthly-csv', { format }),
   getCSVExportStatus: (taskId) => api.get(`/admin/reports/csv-status/${taskId}`),
   getReportStatus: (taskId) => api.get(`/admin/reports/status/${taskId}`),
   downloadReport: (filename) => api.get(`/admin/reports/download/${filename}`),